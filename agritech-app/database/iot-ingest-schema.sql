@@ -0,0 +1,12 @@
+-- =====================================================
+-- AgriTech Backend - IoT Ingest Extensions
+-- Run after supabase-schema.sql
+-- =====================================================
+
+-- 1. Insert order of sensor readings
+-- Reading timestamps come from devices and may be old (bulk uploads) or reach
+-- the table late (retried flushes), so backend workers follow each other's
+-- inserts by seq rather than by timestamp. Existing rows are numbered too.
+ALTER TABLE public.iot_sensors ADD COLUMN IF NOT EXISTS seq BIGINT GENERATED ALWAYS AS IDENTITY;
+
+CREATE INDEX IF NOT EXISTS idx_iot_sensors_seq ON public.iot_sensors(seq);
@@ -0,0 +1,202 @@
+"""
+Offline bulk scoring of an image archive with the disease model (no HTTP).
+
+Usage:
+    python bulk_score.py <image_dir> [--out scores.csv | --out scores.parquet]
+                         [--model ../agritech-app/plant_disease_model.h5]
+                         [--batch-size 256] [--workers N] [--mode quality|fast]
+
+Images are decoded by a process pool with the same preprocess_image used by
+/predict and scored in large batches. Results are written after every
+batch: appended to a CSV, or as part files in a Parquet dataset directory
+(readable with pandas.read_parquet(<dir>)). Re-running the same command
+skips images the same model version already scored into the output, so an
+interrupted run resumes; after a model change every image is scored again
+and the new rows sit next to the old ones (filter on model_version).
+Images that failed to decode or read (status "error") are retried on every
+re-run; their error rows are kept, so take the last row per path.
+
+Parquet output needs pandas + pyarrow.
+"""
+import argparse
+import csv
+import functools
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from utils.image_processing import PREPROCESS_MODES, preprocess_image
+from utils.inference_backends import backend_for_path, load_backend
+from utils.response_table import severity_for
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL = os.path.join(BASE_DIR, "..", "agritech-app", "plant_disease_model.h5")
+DEFAULT_CLASSES = os.path.join(BASE_DIR, "..", "agritech-app", "class_names.json")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+COLUMNS = ["path", "status", "class_index", "raw_class", "confidence", "severity", "model_version", "error"]
+
+
+def find_images(root):
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.relpath(os.path.join(dirpath, name), root))
+    return sorted(paths)
+
+
+def decode_one(rel_path, root, target_size, mode):
+    """Pool worker: (rel_path, array or None, error)."""
+    try:
+        with open(os.path.join(root, rel_path), "rb") as f:
+            return rel_path, preprocess_image(f.read(), target_size, mode=mode)[0], None
+    except Exception as e:
+        return rel_path, None, str(e)
+
+
+def model_version(backend, path):
+    st = os.stat(path)
+    return f"{backend}-{st.st_size:x}-{int(st.st_mtime):x}"
+
+
+class CSVSink:
+    """Appends rows to a CSV; a torn last line from a crash is cut off on resume."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def done(self):
+        """{(path, model_version)} already scored (error rows are left out, so they are retried)."""
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            cut = data.rfind(b"\n") + 1
+            if cut != len(data):
+                f.truncate(cut)
+        with open(self.path, newline="", encoding="utf-8") as f:
+            return {(row["path"], row.get("model_version") or "") for row in csv.DictReader(f)
+                    if row.get("path") and row.get("status") != "error"}
+
+    def write(self, rows):
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            if new_file:
+                writer.writeheader()
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class ParquetSink:
+    """One part file per batch in a dataset directory; parts are written via a temp name and renamed."""
+
+    def __init__(self, path):
+        import pandas  # noqa: F401  (fail early if missing)
+
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _parts(self):
+        return sorted(p for p in os.listdir(self.path) if p.startswith("part-") and p.endswith(".parquet"))
+
+    def done(self):
+        """{(path, model_version)} already scored (error rows are left out, so they are retried)."""
+        import pandas as pd
+
+        keys = set()
+        for part in self._parts():
+            frame = pd.read_parquet(os.path.join(self.path, part), columns=["path", "status", "model_version"])
+            frame = frame[frame["status"] != "error"]
+            keys.update(zip(frame["path"], frame["model_version"].fillna("")))
+        return keys
+
+    def write(self, rows):
+        import pandas as pd
+
+        parts = self._parts()
+        index = int(parts[-1][5:10]) + 1 if parts else 0
+        final = os.path.join(self.path, f"part-{index:05d}.parquet")
+        pd.DataFrame(rows, columns=COLUMNS).to_parquet(final + ".tmp", index=False)
+        os.replace(final + ".tmp", final)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("image_dir")
+    parser.add_argument("--out", default="scores.csv")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--classes", default=DEFAULT_CLASSES)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--mode", choices=PREPROCESS_MODES, default="quality")
+    args = parser.parse_args()
+
+    # The version comes from the file alone, so resume can be decided before loading the model
+    kind = backend_for_path(args.model)
+    version = model_version(kind, args.model)
+
+    sink = ParquetSink(args.out) if args.out.endswith(".parquet") else CSVSink(args.out)
+    done = sink.done()
+    scored_now = {p for p, v in done if v == version}
+    other_versions = sorted({v for _, v in done if v != version})
+    if other_versions:
+        print(f"Output also holds rows from other model versions {other_versions}; they are kept and not resumed")
+    paths = [p for p in find_images(args.image_dir) if p not in scored_now]
+    print(f"{len(scored_now)} images already scored by {version}, {len(paths)} to go -> {args.out}")
+    if not paths:
+        return
+
+    with open(args.classes) as f:
+        raw = json.load(f)
+    class_names = [raw[str(i)] for i in range(len(raw))]
+
+    model = load_backend(kind, args.model)
+    target_size = (model.input_shape[1], model.input_shape[2])
+    print(f"Model {os.path.basename(args.model)} ({version}), input {target_size}, {args.workers} decode workers")
+
+    decode = functools.partial(decode_one, root=args.image_dir, target_size=target_size, mode=args.mode)
+    started = time.perf_counter()
+    scored = 0
+
+    def flush(pending):
+        rows = [{"path": p, "status": "error", "model_version": version, "error": err}
+                for p, arr, err in pending if arr is None]
+        ok = [(p, arr) for p, arr, _ in pending if arr is not None]
+        if ok:
+            probs = model.predict(np.stack([arr for _, arr in ok]))
+            top = probs.argmax(axis=1)
+            for (p, _), idx, row in zip(ok, top, probs):
+                confidence = float(row[idx]) * 100
+                rows.append({
+                    "path": p, "status": "ok", "class_index": int(idx),
+                    "raw_class": class_names[idx] if idx < len(class_names) else f"Unknown_Disease_Index_{idx}",
+                    "confidence": round(confidence, 2), "severity": severity_for(confidence),
+                    "model_version": version,
+                })
+        sink.write(rows)
+
+    # spawn: workers must not inherit the parent's TensorFlow state
+    with multiprocessing.get_context("spawn").Pool(args.workers) as pool:
+        pending = []
+        for item in pool.imap(decode, paths, chunksize=16):
+            pending.append(item)
+            if len(pending) >= args.batch_size:
+                flush(pending)
+                scored += len(pending)
+                pending = []
+                rate = scored / (time.perf_counter() - started)
+                print(f"  {scored}/{len(paths)} scored ({rate:.1f} img/s)")
+        if pending:
+            flush(pending)
+            scored += len(pending)
+
+    print(f"Done: {scored} images in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
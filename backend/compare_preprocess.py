@@ -0,0 +1,101 @@
+"""
+Accuracy/latency comparison of the "quality" and "fast" preprocessing modes.
+
+Usage:
+    python compare_preprocess.py <image_dir> [--size 128] [--repeat 3] [--model ../agritech-app/plant_disease_model.h5]
+
+--model accepts .h5, .tflite or .onnx files.
+
+For every image both modes are timed (best of --repeat runs) and the
+per-pixel difference between their outputs is measured. With --model the
+top-1 agreement and confidence drift of the disease model are reported too.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from utils.image_processing import preprocess_image
+from utils.inference_backends import backend_for_path, load_backend
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+
+
+def best_time(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("image_dir")
+    parser.add_argument("--size", type=int, default=128)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--model", default=None)
+    args = parser.parse_args()
+
+    paths = sorted(
+        os.path.join(args.image_dir, f) for f in os.listdir(args.image_dir)
+        if f.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if not paths:
+        print(f"No images found in {args.image_dir}")
+        return 1
+
+    model = None
+    if args.model:
+        model = load_backend(backend_for_path(args.model), args.model)
+
+    target = (args.size, args.size)
+    quality_ms, fast_ms, pixel_mae = [], [], []
+    quality_batch, fast_batch = [], []
+
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            t_q, arr_q = best_time(lambda: preprocess_image(data, target, mode="quality"), args.repeat)
+            t_f, arr_f = best_time(lambda: preprocess_image(data, target, mode="fast"), args.repeat)
+        except (ValueError, OSError) as e:
+            print(f"Skipping {os.path.basename(path)}: {e}")
+            continue
+        quality_ms.append(t_q)
+        fast_ms.append(t_f)
+        pixel_mae.append(float(np.mean(np.abs(arr_q - arr_f))))
+        quality_batch.append(arr_q[0])
+        fast_batch.append(arr_f[0])
+
+    if not quality_ms:
+        print(f"No images processed: all {len(paths)} were unreadable or unsupported")
+        return 1
+
+    print(f"Images compared: {len(quality_ms)}")
+    print(f"{'mode':<10}{'mean ms':>10}{'median ms':>12}{'p95 ms':>10}")
+    for name, times in (("quality", quality_ms), ("fast", fast_ms)):
+        p95 = sorted(times)[min(len(times) - 1, int(len(times) * 0.95))]
+        print(f"{name:<10}{statistics.mean(times):>10.2f}{statistics.median(times):>12.2f}{p95:>10.2f}")
+    print(f"Speed-up (mean): {statistics.mean(quality_ms) / statistics.mean(fast_ms):.2f}x")
+    print(f"Pixel MAE (0-1 scale): mean {statistics.mean(pixel_mae):.4f}, max {max(pixel_mae):.4f}")
+
+    if model is not None:
+        probs_q = model.predict(np.stack(quality_batch))
+        probs_f = model.predict(np.stack(fast_batch))
+        top_q = probs_q.argmax(axis=1)
+        top_f = probs_f.argmax(axis=1)
+        rows = np.arange(len(top_q))
+        drift = np.abs(probs_q[rows, top_q] - probs_f[rows, top_q]) * 100
+        print(f"Top-1 agreement: {np.mean(top_q == top_f) * 100:.2f}%")
+        print(f"Confidence drift on quality top-1 class: mean {drift.mean():.2f} pts, max {drift.max():.2f} pts")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
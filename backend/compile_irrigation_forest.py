@@ -0,0 +1,121 @@
+"""
+Compile the irrigation RandomForest into flat NumPy arrays for serving.
+
+Usage:
+    python compile_irrigation_forest.py [--models-dir models] [--out models/irrigation_forest.npz]
+                                        [--samples 20000] [--seed 0]
+
+Reads irrigation_model_v2.pkl, feature_encoders.pkl, target_encoder.pkl and
+feature_columns.pkl, flattens the forest (feature, threshold, children and
+leaf values per node) and stores it in one pickle-free .npz together with the
+encoder categories, column order and target labels.
+
+Before writing, predictions are checked against irr_model.predict on a
+generated test set: random valid categories, values spread over each
+feature's split range, and values sitting exactly on split thresholds. Any
+mismatch aborts without writing. The written file is reloaded and checked
+again. The server picks the .npz up automatically (IRRIGATION_ENGINE=auto)
+and then never imports scikit-learn.
+
+Needs scikit-learn + joblib (compile time only).
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from utils.feature_encoding import FeatureEncoder
+from utils.flat_forest import FlatForest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODELS_DIR = os.path.join(BASE_DIR, "models")
+CATEGORICAL_COLUMNS = ("Soil_Type", "Crop_Type", "Crop_Growth_Stage", "Season", "Irrigation_Type", "Region")
+
+
+def generate_rows(forest, encoder, n, rng):
+    """(n, n_features) float32 test rows covering categories, split ranges and exact thresholds."""
+    X = np.empty((n, forest.n_features), dtype=np.float32)
+    is_split = forest.left != np.arange(forest.n_nodes)
+    for j, col in enumerate(encoder.columns):
+        if col in encoder.categories:
+            X[:, j] = rng.integers(0, len(encoder.categories[col]), n)
+            continue
+        thresholds = forest.threshold[is_split & (forest.feature == j)]
+        if len(thresholds) == 0:
+            X[:, j] = rng.normal(0, 1, n)
+            continue
+        low, high = thresholds.min(), thresholds.max()
+        pad = max(1.0, (high - low) * 0.1)
+        spread = rng.uniform(low - pad, high + pad, n)
+        on_split = thresholds[rng.integers(0, len(thresholds), n)].astype(np.float32)
+        above = np.nextafter(on_split, np.float32(np.inf))
+        pick = rng.integers(0, 3, n)
+        X[:, j] = np.where(pick == 0, spread, np.where(pick == 1, on_split, above))
+    return X
+
+
+def time_per_call(fn, X, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(X)
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+def compare(name, forest, model, X):
+    expected = model.predict(X)
+    got = forest.predict(X)
+    mismatches = int(np.sum(got != expected))
+    proba_diff = float(np.max(np.abs(forest.predict_proba(X) - model.predict_proba(X))))
+    print(f"  {name:<10} {len(X)} rows  mismatches {mismatches}  max |proba diff| {proba_diff:.2e}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR)
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import joblib
+
+    out = args.out or os.path.join(args.models_dir, "irrigation_forest.npz")
+    names = ["irrigation_model_v2.pkl", "feature_encoders.pkl", "target_encoder.pkl", "feature_columns.pkl"]
+    model, encoders, target, columns = [joblib.load(os.path.join(args.models_dir, name)) for name in names]
+    # Test rows are plain arrays in feature_columns order, as the server sends them
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    encoder = FeatureEncoder.from_label_encoders(columns, encoders, CATEGORICAL_COLUMNS)
+    forest = FlatForest.from_sklearn(model)
+    info = forest.info()
+    print(f"Forest: {info['trees']} trees, {info['nodes']} nodes, max depth {info['max_depth']}, "
+          f"{info['classes']} classes, {info['size_mb']} MB flattened")
+
+    X = generate_rows(forest, encoder, args.samples, np.random.default_rng(args.seed))
+    print("Verifying against irr_model.predict:")
+    if compare("in-memory", forest, model, X):
+        print("Flattened forest disagrees with scikit-learn; nothing written.")
+        sys.exit(1)
+
+    forest.save(out, **encoder.arrays(), target_labels=np.asarray([str(label) for label in target.classes_]))
+    reloaded, _ = FlatForest.load(out)
+    if compare("reloaded", reloaded, model, X):
+        os.remove(out)
+        print("Reloaded forest disagrees with scikit-learn; file removed.")
+        sys.exit(1)
+    print(f"Wrote {out} ({os.path.getsize(out) / (1024 * 1024):.2f} MB)")
+
+    print("Latency (ms per call):")
+    for rows in (1, 500):
+        batch = X[:rows]
+        repeats = 200 if rows == 1 else 20
+        print(f"  {rows:>4} row(s)  sklearn {time_per_call(model.predict, batch, repeats):8.3f}  "
+              f"flat {time_per_call(reloaded.predict, batch, repeats):8.3f}")
+
+
+if __name__ == "__main__":
+    main()
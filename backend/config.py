@@ -0,0 +1,34 @@
+import os
+
+from dotenv import load_dotenv
+
+# Load env variables
+load_dotenv()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Paths
+#    The real model and class_names live in agritech-app/ (sibling of backend/)
+# ──────────────────────────────────────────────────────────────────────────────
+BASE_DIR   = os.path.dirname(os.path.abspath(__file__))          # .../backend
+APP_DIR    = os.path.join(BASE_DIR, "..", "agritech-app")         # .../agritech-app
+MODELS_DIR = os.path.join(BASE_DIR, "models")
+MODEL_PATH = os.path.join(APP_DIR, "plant_disease_model.h5")
+CLASS_PATH = os.path.join(APP_DIR, "class_names.json")
+CSV_PATH   = os.path.join(APP_DIR, "master_recommendation_dataset.csv")
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Subsystem selection
+#    ENABLED_SUBSYSTEMS=community,tasks runs a cheap CRUD-only worker that never
+#    imports TensorFlow, pandas, sklearn or the Gemini SDK.
+# ──────────────────────────────────────────────────────────────────────────────
+ALL_SUBSYSTEMS = ("disease", "irrigation", "iot", "community", "tasks", "chat")
+
+def enabled_subsystems() -> list:
+    raw = os.getenv("ENABLED_SUBSYSTEMS", "all").strip().lower()
+    if raw in ("", "all", "*"):
+        return list(ALL_SUBSYSTEMS)
+    selected = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in ALL_SUBSYSTEMS]
+    if unknown:
+        raise ValueError(f"Unknown subsystem(s) in ENABLED_SUBSYSTEMS: {unknown}. Expected {ALL_SUBSYSTEMS}.")
+    return [name for name in ALL_SUBSYSTEMS if name in selected]
@@ -0,0 +1,36 @@
+import os
+
+from utils.metrics import SUPABASE_SECONDS
+from utils.startup import SubsystemUnavailable
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Supabase client, shared by the CRUD and IoT routers.
+# Created once in the lifespan hook; routers read db.supabase at call time.
+# ──────────────────────────────────────────────────────────────────────────────
+supabase = None
+
+def init_supabase():
+    global supabase
+    SUPABASE_URL = os.getenv("SUPABASE_URL")
+    SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+    if not (SUPABASE_URL and SUPABASE_KEY):
+        print("Supabase Connection: FAILED (Env variables missing)")
+        raise SubsystemUnavailable("SUPABASE_URL / SUPABASE_KEY not set")
+
+    from supabase import create_client
+    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+    # Verify Connection
+    try:
+        # Simple test query to verify connection
+        supabase.table("users").select("id").limit(1).execute()
+        print(f"Supabase Connection: SUCCESS (Project: {SUPABASE_URL})")
+    except Exception as e:
+        print(f"Supabase Connection: SEMI-CONNECTED (Auth works, but DB access error: {e})")
+        print(f"Note: Using ANON key. If RLS is enabled, DB access might be restricted.")
+
+
+def execute(query, operation):
+    """Run a Supabase query builder, recording its latency as `operation` (e.g. "posts.select")."""
+    with SUPABASE_SECONDS.labels(operation).time():
+        return query.execute()
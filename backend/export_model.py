@@ -0,0 +1,146 @@
+"""
+Export the Keras disease model to TFLite and/or ONNX for lightweight serving.
+
+Usage:
+    python export_model.py [--model ../agritech-app/plant_disease_model.h5]
+                           [--formats tflite,onnx] [--variants fp32,fp16,int8]
+                           [--calibration-dir path/to/photos] [--out-dir ../agritech-app]
+
+Outputs (next to the .h5 by default):
+    plant_disease_model.tflite        plant_disease_model.onnx
+    plant_disease_model.fp16.tflite   plant_disease_model.fp16.onnx
+    plant_disease_model.int8.tflite   plant_disease_model.int8.onnx
+
+int8 TFLite uses full-integer weight/activation quantization calibrated on
+--calibration-dir (real field photos; random noise is used as a last resort).
+int8 ONNX uses dynamic weight quantization, which suits the Dense-heavy head.
+Every export is checked against the Keras model for top-1 agreement.
+
+Extra dependencies (export only, not needed by the server):
+    pip install tf2onnx onnxruntime onnxconverter-common
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from utils.image_processing import preprocess_image
+from utils.inference_backends import load_backend
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL = os.path.join(BASE_DIR, "..", "agritech-app", "plant_disease_model.h5")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+SUFFIX = {"fp32": "", "fp16": ".fp16", "int8": ".int8"}
+
+
+def load_samples(calibration_dir, input_shape, limit=200):
+    """Preprocessed calibration/verification samples, shape (N, H, W, C)."""
+    size = (input_shape[1], input_shape[2])
+    samples = []
+    if calibration_dir:
+        for name in sorted(os.listdir(calibration_dir)):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            with open(os.path.join(calibration_dir, name), "rb") as f:
+                try:
+                    samples.append(preprocess_image(f.read(), size)[0])
+                except ValueError:
+                    continue
+            if len(samples) >= limit:
+                break
+    if not samples:
+        print("Warning: no calibration images, using random noise (int8 accuracy will suffer).")
+        rng = np.random.default_rng(0)
+        samples = list(rng.random((32,) + tuple(input_shape[1:]), dtype=np.float32))
+    return np.stack(samples).astype(np.float32)
+
+
+def export_tflite(model, variant, samples, path):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if variant == "fp16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == "int8":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: ([s[np.newaxis]] for s in samples)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        # Keep float32 I/O so callers do not need to know the quantization params
+        converter.inference_input_type = tf.float32
+        converter.inference_output_type = tf.float32
+    with open(path, "wb") as f:
+        f.write(converter.convert())
+
+
+def export_onnx(model, variant, path):
+    import tensorflow as tf
+    import tf2onnx
+
+    spec = (tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32, name="input"),)
+    fp32_path = path if variant == "fp32" else path + ".tmp"
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=fp32_path)
+
+    if variant == "fp16":
+        import onnx
+        from onnxconverter_common import float16
+
+        converted = float16.convert_float_to_float16(onnx.load(fp32_path), keep_io_types=True)
+        onnx.save(converted, path)
+    elif variant == "int8":
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8)
+    if fp32_path != path:
+        os.remove(fp32_path)
+
+
+def verify(kind, path, samples, reference):
+    backend = load_backend(kind, path)
+    start = time.perf_counter()
+    probs = backend.predict(samples)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(samples)
+    agreement = float(np.mean(probs.argmax(axis=1) == reference.argmax(axis=1))) * 100
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    print(f"  {os.path.basename(path):<36} {size_mb:8.2f} MB  {elapsed_ms:7.2f} ms/img  top-1 agreement {agreement:6.2f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--formats", default="tflite,onnx")
+    parser.add_argument("--variants", default="fp32,fp16,int8")
+    parser.add_argument("--calibration-dir", default=None)
+    parser.add_argument("--out-dir", default=None)
+    args = parser.parse_args()
+
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    out_dir = args.out_dir or os.path.dirname(os.path.abspath(args.model))
+    stem = os.path.splitext(os.path.basename(args.model))[0]
+
+    keras_backend = load_backend("keras", args.model)
+    samples = load_samples(args.calibration_dir, keras_backend.input_shape)
+    reference = keras_backend.predict(samples)
+    print(f"Keras model: {os.path.getsize(args.model) / (1024 * 1024):.2f} MB, {len(samples)} verification samples")
+
+    for fmt in formats:
+        for variant in variants:
+            path = os.path.join(out_dir, f"{stem}{SUFFIX[variant]}.{fmt}")
+            print(f"Exporting {fmt} ({variant}) -> {path}")
+            try:
+                if fmt == "tflite":
+                    export_tflite(keras_backend.model, variant, samples, path)
+                elif fmt == "onnx":
+                    export_onnx(keras_backend.model, variant, path)
+                else:
+                    print(f"  Unknown format '{fmt}', skipping")
+                    continue
+                verify(fmt, path, samples, reference)
+            except Exception as e:
+                print(f"  Export failed: {e}")
+
+
+if __name__ == "__main__":
+    main()
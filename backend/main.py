@@ -1,405 +1,60 @@
-import os
-import json
+import time
 import logging
+import importlib
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import tensorflow as tf
-import numpy as np
-import google.generativeai as genai
-from dotenv import load_dotenv
-from typing import List, Dict
-import joblib
-import pandas as pd
+from fastapi.responses import JSONResponse, Response
 
-# Load env variables
-load_dotenv()
-
-from supabase import create_client, Client
-
-# Supabase Setup
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
-
-# Verify Connection
-if supabase:
-    try:
-        # Simple test query to verify connection
-        supabase.table("users").select("id").limit(1).execute()
-        print(f"Supabase Connection: SUCCESS (Project: {SUPABASE_URL})")
-    except Exception as e:
-        print(f"Supabase Connection: SEMI-CONNECTED (Auth works, but DB access error: {e})")
-        print(f"Note: Using ANON key. If RLS is enabled, DB access might be restricted.")
-else:
-    print("Supabase Connection: FAILED (Env variables missing)")
+# Loads .env before any router reads its settings
+import config
+import db
+from utils.metrics import CONTENT_TYPE, REGISTRY
+from utils.startup import StartupReport
+from utils.upload_ingest import BodySizeLimitMiddleware
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("agritech-ml-api")
 
-# Configure Gemini
-api_key = os.getenv("GEMINI_API_KEY")
-if api_key:
-    genai.configure(api_key=api_key)
-    chat_ai = genai.GenerativeModel('models/gemini-2.5-flash')
-else:
-    chat_ai = None
-
-class ChatRequest(BaseModel):
-    message: str
-    history: list = []
-    language: str = "en"
-    context: dict = None
-
-# New Models for Social & Operations
-class PostCreate(BaseModel):
-    user_id: str
-    content: str
-    image_url: str = None
-
-class CommentCreate(BaseModel):
-    user_id: str
-    post_id: str
-    content: str
-
-class TaskCreate(BaseModel):
-    user_id: str
-    title: str
-    description: str = None
-    due_date: str = None
-    priority: str = "Medium"
-
-class GrowthLogCreate(BaseModel):
-    crop_id: str
-    height_cm: float = None
-    leaf_count: int = None
-    notes: str = None
-    image_url: str = None
-
-# LoginRequest removed - using direct client-side auth
-
-
-class IrrigationRequest(BaseModel):
-    Soil_Type: str
-    Soil_Moisture: float
-    Temperature_C: float
-    Humidity: float
-    Rainfall_mm: float
-    Sunlight_Hours: float
-    Wind_Speed_kmh: float
-    Crop_Type: str
-    Crop_Growth_Stage: str
-    Season: str
-    Irrigation_Type: str
-    Field_Area_hectare: float
-    Previous_Irrigation_mm: float
-    Region: str
-
-# Internal imports
-from models.translations import get_local_translation
-from utils.image_processing import preprocess_image
-
-# ──────────────────────────────────────────────────────────────────────────────
-# 1. Model + class_names paths
-#    The real model and class_names live in agritech-app/ (sibling of backend/)
-# ──────────────────────────────────────────────────────────────────────────────
-BASE_DIR   = os.path.dirname(os.path.abspath(__file__))          # .../backend
-APP_DIR    = os.path.join(BASE_DIR, "..", "agritech-app")         # .../agritech-app
-MODEL_PATH = os.path.join(APP_DIR, "plant_disease_model.h5")
-CLASS_PATH = os.path.join(APP_DIR, "class_names.json")
-CSV_PATH   = os.path.join(APP_DIR, "master_recommendation_dataset.csv")
-
-# ──────────────────────────────────────────────────────────────────────────────
-# 2. Load and Prepare recommendation database
-# ──────────────────────────────────────────────────────────────────────────────
-RECOMMENDATION_DB = {}
-
-def load_recommendations():
-    """Load the CSV into a nested dictionary: {disease_name: {severity: info_dict}}"""
-    import csv
-    global RECOMMENDATION_DB
-    print(f"Loading recommendations from {os.path.abspath(CSV_PATH)}...")
-    try:
-        if not os.path.exists(CSV_PATH):
-            print(f"Recommendation CSV not found at {CSV_PATH}")
-            return
-
-        with open(CSV_PATH, mode='r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                d_name = row['disease_name']
-                sev    = row['severity']
-                
-                if d_name not in RECOMMENDATION_DB:
-                    RECOMMENDATION_DB[d_name] = {}
-                
-                RECOMMENDATION_DB[d_name][sev] = {
-                    "cause":      row['cause'],
-                    "treatment":  row['treatment_solution'],
-                    "prevention": row['prevention_tips'],
-                    "fertilizer": row['fertilizer_recommendation']
-                }
-        print(f"Loaded recommendations for {len(RECOMMENDATION_DB)} diseases.")
-    except Exception as e:
-        print(f"Failed to load recommendation CSV: {e}")
-
-# Initial load
-load_recommendations()
-
 # ──────────────────────────────────────────────────────────────────────────────
-# 2.5 Load class names
+# 1. Subsystems
+#    Routers live in routers/<name>.py and are imported only when enabled, so
+#    a CRUD-only worker (ENABLED_SUBSYSTEMS=community,tasks) never imports
+#    TensorFlow, pandas, sklearn or the Gemini SDK.
 # ──────────────────────────────────────────────────────────────────────────────
-print(f"Loading class names from {os.path.abspath(CLASS_PATH)}...")
-try:
-    with open(CLASS_PATH, "r") as f:
-        raw = json.load(f)
-    # raw is {"0": "Corn___Common_Rust", "1": ..., ...}
-    # Build an ordered list by integer key
-    class_names = [raw[str(i)] for i in range(len(raw))]
-    print(f"Loaded {len(class_names)} class names.")
-except Exception as e:
-    print(f"Failed to load class names: {e}")
-    class_names = []
-
-# ──────────────────────────────────────────────────────────────────────────────
-# 3. Load ML model once at startup
-#    Model input: (None, 128, 128, 3)  →  Flatten(25088)  →  Dense(512)  →  Dense(22)
-# ──────────────────────────────────────────────────────────────────────────────
-print(f"Loading ML model from {os.path.abspath(MODEL_PATH)}...")
-try:
-    if not os.path.exists(MODEL_PATH):
-        raise FileNotFoundError(f"Model file not found at {MODEL_PATH}")
-    ml_model = tf.keras.models.load_model(MODEL_PATH)
-    print(f"ML model loaded. Input shape: {ml_model.input_shape}")
-except Exception as e:
-    print(f"Failed to load ML model: {e}")
-    ml_model = None
-
-# ──────────────────────────────────────────────────────────────────────────────
-# 3.5 Load Irrigation ML Models
-# ──────────────────────────────────────────────────────────────────────────────
-MODELS_DIR     = os.path.join(BASE_DIR, "models")
-IRR_MODEL_PATH = os.path.join(MODELS_DIR, "irrigation_model_v2.pkl")
-FE_PATH        = os.path.join(MODELS_DIR, "feature_encoders.pkl")
-TE_PATH        = os.path.join(MODELS_DIR, "target_encoder.pkl")
-FC_PATH        = os.path.join(MODELS_DIR, "feature_columns.pkl")
-
-irr_model = None
-feature_encoders = None
-target_encoder = None
-feature_columns = None
-
-print(f"Loading Irrigation models from {MODELS_DIR}...")
-try:
-    if all(os.path.exists(p) for p in [IRR_MODEL_PATH, FE_PATH, TE_PATH, FC_PATH]):
-        irr_model = joblib.load(IRR_MODEL_PATH)
-        feature_encoders = joblib.load(FE_PATH)
-        target_encoder = joblib.load(TE_PATH)
-        feature_columns = joblib.load(FC_PATH)
-        print("Irrigation prediction system: READY")
-    else:
-        missing = [p for p in [IRR_MODEL_PATH, FE_PATH, TE_PATH, FC_PATH] if not os.path.exists(p)]
-        print(f"Warning: Missing irrigation files: {[os.path.basename(m) for m in missing]}")
-except Exception as e:
-    print(f"Failed to load Irrigation system: {e}")
+ENABLED_SUBSYSTEMS = config.enabled_subsystems()
+SUBSYSTEMS = {name: importlib.import_module(f"routers.{name}") for name in ENABLED_SUBSYSTEMS}
 
 # ──────────────────────────────────────────────────────────────────────────────
-# 4. Disease info database — all 22 classes from class_names.json
+# 2. FastAPI app
 # ──────────────────────────────────────────────────────────────────────────────
-DISEASE_DB = {
-    "Corn___Common_Rust": {
-        "cause":      "Caused by the fungus Puccinia sorghi, spread by windborne spores in cool, moist conditions.",
-        "treatment":  "Apply fungicides (azoxystrobin, propiconazole) at first sign of pustules. Spray every 10–14 days.",
-        "prevention": "Plant resistant hybrids. Scout fields regularly from early season.",
-        "fertilizer": "Ensure adequate Potassium and balanced NPK to strengthen plant immunity."
-    },
-    "Corn___Gray_Leaf_Spot": {
-        "cause":      "Caused by Cercospora zeae-maydis fungus; thrives in warm, humid, and cloudy conditions.",
-        "treatment":  "Apply foliar fungicides (strobilurin or triazole) when disease appears on lower leaves.",
-        "prevention": "Crop rotation with non-host crops. Manage crop residue by tillage.",
-        "fertilizer": "Optimize Potassium levels to help plant manage drought and disease stress."
-    },
-    "Corn___Healthy": {
-        "cause":      "No disease detected. Plant appears healthy.",
-        "treatment":  "No treatment required. Continue regular monitoring.",
-        "prevention": "Maintain consistent irrigation and pest scouting to keep crop healthy.",
-        "fertilizer": "Apply Nitrogen in split applications for sustained growth."
-    },
-    "Corn___Northern_Leaf_Blight": {
-        "cause":      "Caused by Exserohilum turcicum fungus. Favored by moderate temperatures and leaf wetness.",
-        "treatment":  "Apply fungicides if disease appears early on upper leaves. Foliar sprays help reduce spread.",
-        "prevention": "Crop rotation and tillage to bury infected residue. Use resistant hybrids.",
-        "fertilizer": "Balanced nutrition program improves overall plant health and resistance."
-    },
-    "Jowar___Healthy": {
-        "cause":      "No disease detected. Plant appears healthy.",
-        "treatment":  "No treatment required. Continue regular monitoring.",
-        "prevention": "Practice good field sanitation and proper spacing to maintain airflow.",
-        "fertilizer": "Apply NPK based on soil test. Phosphorus promotes strong root development."
-    },
-    "Jowar___Rust": {
-        "cause":      "Caused by Puccinia purpurea fungus; spreads rapidly via wind in warm, humid weather.",
-        "treatment":  "Apply contact or systemic fungicides (mancozeb, propiconazole) at early infection stage.",
-        "prevention": "Use rust-resistant varieties. Remove infected plant debris after harvest.",
-        "fertilizer": "Ensure adequate Potassium to boost natural disease resistance."
-    },
-    "Mango___Anthracnose": {
-        "cause":      "Caused by Colletotrichum gloeosporioides; infects during wet and humid conditions.",
-        "treatment":  "Spray copper-based fungicides or carbendazim. Apply pre- and post-harvest treatment.",
-        "prevention": "Prune for better airflow. Avoid overhead irrigation. Collect and destroy fallen fruits.",
-        "fertilizer": "Balanced fertilization with adequate Calcium strengthens fruit cell walls."
-    },
-    "Mango___Healthy": {
-        "cause":      "No disease detected. Plant appears healthy.",
-        "treatment":  "No treatment required. Continue regular orchard management.",
-        "prevention": "Regular pruning for light penetration and airflow. Monitor for pests.",
-        "fertilizer": "Apply balanced NPK fertilizer in spring before flowering."
-    },
-    "Mango___Powdery_Mildew": {
-        "cause":      "Caused by Oidium mangiferae; favors dry weather with cool nights and warm days.",
-        "treatment":  "Apply sulfur dust or systemic fungicides (triadimefon, hexaconazole) on affected parts.",
-        "prevention": "Avoid planting in areas with poor air circulation. Prune congested branches.",
-        "fertilizer": "Avoid over-fertilizing with Nitrogen, which creates lush susceptible tissue."
-    },
-    "Potato___Early_Blight": {
-        "cause":      "Caused by Alternaria solani; older leaves infected first during warm, wet periods.",
-        "treatment":  "Apply fungicides containing chlorothalonil or mancozeb. Rotate with legumes or grains.",
-        "prevention": "Manage irrigation to keep foliage dry. Destroy volunteer potato plants.",
-        "fertilizer": "Increase Potassium and Phosphorus if soil test indicates deficiency."
-    },
-    "Potato___Healthy": {
-        "cause":      "No disease detected. Plant appears healthy.",
-        "treatment":  "No treatment required. Continue regular monitoring.",
-        "prevention": "Practice 3-year crop rotation. Use certified seed potatoes.",
-        "fertilizer": "Sufficient Nitrogen early in growth; moderate Potassium throughout season."
-    },
-    "Potato___Late_Blight": {
-        "cause":      "Caused by Phytophthora infestans (oomycete); spreads rapidly in cool, wet conditions. Highly destructive.",
-        "treatment":  "URGENT: Use systemic fungicides (metalaxyl, cymoxanil). Destroy infected plants immediately.",
-        "prevention": "Use certified seed tubers. Avoid cull piles. Apply preventive fungicide sprays.",
-        "fertilizer": "Avoid over-fertilizing with Nitrogen late in the season."
-    },
-    "Rice___Brown_Spot": {
-        "cause":      "Caused by Helminthosporium oryzae; associated with poor soil nutrition and drought stress.",
-        "treatment":  "Apply fungicides (tricyclazole, propiconazole). Ensure proper water management.",
-        "prevention": "Use disease-free seeds. Treat seeds with fungicide before planting.",
-        "fertilizer": "Apply balanced fertilizer. Potassium and Silicon nutrition reduce susceptibility."
-    },
-    "Rice___Healthy": {
-        "cause":      "No disease detected. Plant appears healthy.",
-        "treatment":  "No treatment required. Continue regular field monitoring.",
-        "prevention": "Maintain proper water levels and field sanitation throughout the season.",
-        "fertilizer": "Split Nitrogen applications to support tillering and grain filling."
-    },
-    "Rice___Leaf_Blast": {
-        "cause":      "Caused by Magnaporthe oryzae; favored by high humidity, heavy dew, and warm nights.",
-        "treatment":  "Apply tricyclazole or isoprothiolane fungicide immediately at first signs.",
-        "prevention": "Use resistant varieties. Avoid excessive Nitrogen. Ensure proper plant spacing.",
-        "fertilizer": "Reduce Nitrogen application — excess Nitrogen increases blast susceptibility."
-    },
-    "Rice___Neck_Blast": {
-        "cause":      "Caused by Magnaporthe oryzae attacking the neck node; occurs at panicle emergence stage.",
-        "treatment":  "Apply tricyclazole at panicle initiation and heading stage for protection.",
-        "prevention": "Time planting to avoid panicle emergence during high-risk periods. Use resistant varieties.",
-        "fertilizer": "Balanced NPK; avoid late high-Nitrogen applications which increase severity."
-    },
-    "Sugarcane_Bacterial Blight": {
-        "cause":      "Caused by Xanthomonas albilineans; spreads through infected cuttings and contaminated tools.",
-        "treatment":  "No chemical cure. Rogue out infected stools. Use disease-free planting material.",
-        "prevention": "Use certified disease-free seed setts. Disinfect cutting tools with bleach solution.",
-        "fertilizer": "Balanced NPK to maintain vigorous growth. Avoid stress conditions."
-    },
-    "Sugarcane_Healthy": {
-        "cause":      "No disease detected. Plant appears healthy.",
-        "treatment":  "No treatment required. Continue regular monitoring.",
-        "prevention": "Practice proper field sanitation and use disease-free planting material.",
-        "fertilizer": "Apply Nitrogen in split doses. Ensure adequate Phosphorus and Potassium."
-    },
-    "Sugarcane_Red Rot": {
-        "cause":      "Caused by Colletotrichum falcatum; enters through wounds; spreads in waterlogged soils.",
-        "treatment":  "Remove and destroy affected stools. Treat setts with carbendazim solution before planting.",
-        "prevention": "Use resistant varieties. Ensure good field drainage. Avoid waterlogging.",
-        "fertilizer": "Maintain soil health with organic matter. Avoid excessive Nitrogen."
-    },
-    "Wheat___Brown_Rust": {
-        "cause":      "Caused by Puccinia triticina; wind-dispersed spores; favors mild temperatures and moisture.",
-        "treatment":  "Apply triazole or strobilurin fungicide at flag leaf stage for best results.",
-        "prevention": "Grow resistant varieties. Avoid late sowing to reduce disease risk window.",
-        "fertilizer": "Balanced Nitrogen application; avoid over-application which increases susceptibility."
-    },
-    "Wheat___Healthy": {
-        "cause":      "No disease detected. Plant appears healthy.",
-        "treatment":  "No treatment required. Continue regular field monitoring.",
-        "prevention": "Use certified seeds, proper crop rotation, and balanced nutrition.",
-        "fertilizer": "Apply Nitrogen in 2–3 splits. Ensure adequate Phosphorus at sowing."
-    },
-    "Wheat___Yellow_Rust": {
-        "cause":      "Caused by Puccinia striiformis; favors cool, moist conditions. Highly contagious via wind.",
-        "treatment":  "Apply propiconazole or tebuconazole fungicide immediately at first sign of yellowing stripes.",
-        "prevention": "Grow resistant varieties. Avoid late sowing. Monitor fields from tillering stage.",
-        "fertilizer": "Ensure adequate Potassium. Avoid excess Nitrogen in the growing season."
-    }
-}
-
-def get_disease_info(class_label: str, severity: str = "Medium") -> dict:
-    """Return disease details from RECOMMENDATION_DB or hardcoded DISEASE_DB fallback."""
-    # 1. Try CSV-based database first
-    if class_label in RECOMMENDATION_DB:
-        if severity in RECOMMENDATION_DB[class_label]:
-            return RECOMMENDATION_DB[class_label][severity]
-        # Fallback to Medium if specific severity missing
-        if "Medium" in RECOMMENDATION_DB[class_label]:
-            return RECOMMENDATION_DB[class_label]["Medium"]
-
-    # 2. Try hardcoded DISEASE_DB as fallback
-    if class_label in DISEASE_DB:
-        return DISEASE_DB[class_label]
-
-    # 3. Soft matching for the hardcoded DB
-    normalised = class_label.replace("___", " ").replace("_", " ")
-    for key, val in DISEASE_DB.items():
-        if key.replace("___", " ").replace("_", " ").lower() == normalised.lower():
-            return val
+startup_report = StartupReport()
 
-    # 4. Smart fallback: Extract from class label if possible
-    if '___' in class_label:
-        parts = class_label.split('___')
-        crop_name = parts[0].replace('_', ' ')
-        issue_name = parts[1].replace('_', ' ')
-    elif '_' in class_label:
-        parts = class_label.split('_')
-        crop_name = parts[0]
-        issue_name = " ".join(parts[1:])
-    else:
-        crop_name = "Crop"
-        issue_name = class_label
-
-    return {
-        "cause":      f"Automated analysis indicates {issue_name} potentially affecting your crop.",
-        "treatment":  f"Strategic {('fertilizer' if 'Deficiency' in issue_name else 'fungicide')} application is recommended after verification of {issue_name}.",
-        "prevention": "Sanitize tools between fields and improve crop spacing to reduce future stress.",
-        "fertilizer": f"Maintain balanced soil nutrition with targeted micro-nutrients."
-    }
-
-    # 5. Ultimate fallback
-    return {
-        "cause":      "Leaf pattern analysis detected an anomaly. Consult a local agricultural expert.",
-        "treatment":  "Consult with a local agricultural expert for correct diagnosis and treatment.",
-        "prevention": "Practice good crop rotation and field sanitation.",
-        "fertilizer": "Maintain balanced soil nutrition based on a recent soil test."
-    }
-
-# ──────────────────────────────────────────────────────────────────────────────
-# 5. FastAPI app
-# ──────────────────────────────────────────────────────────────────────────────
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Refresh recommendations on startup
-    load_recommendations()
+    boot_started = time.perf_counter()
+
+    # Independent loaders of every enabled subsystem run concurrently in worker threads
+    loaders = []
+    if any(getattr(module, "USES_SUPABASE", False) for module in SUBSYSTEMS.values()):
+        loaders.append(("supabase", db.init_supabase, False))
+    for module in SUBSYSTEMS.values():
+        loaders.extend(getattr(module, "STARTUP", []))
+    await startup_report.run_all(loaders)
+
+    # Post-load steps (warm-up, background workers)
+    for module in SUBSYSTEMS.values():
+        if hasattr(module, "startup"):
+            await module.startup(app, startup_report)
+
+    print(f"Startup complete in {time.perf_counter() - boot_started:.2f}s "
+          f"(loaders {startup_report.total_seconds:.2f}s, subsystems={ENABLED_SUBSYSTEMS}, ready={startup_report.ready})")
     yield
     print("Shutting down ML API...")
+    for module in SUBSYSTEMS.values():
+        if hasattr(module, "shutdown"):
+            await module.shutdown()
 
 app = FastAPI(
     title="AgriTech ML Disease Detection API",
@@ -408,7 +63,13 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-app.state.model = ml_model
+# Oversized uploads are refused while streaming in, before multipart parsing buffers them.
+# Added before CORS so CORS (added last = outermost) also wraps the 413 responses.
+body_limits = {}
+for module in SUBSYSTEMS.values():
+    body_limits.update(getattr(module, "BODY_LIMITS", {}))
+if body_limits:
+    app.add_middleware(BodySizeLimitMiddleware, limits=body_limits)
 
 app.add_middleware(
     CORSMiddleware,
@@ -418,511 +79,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ──────────────────────────────────────────────────────────────────────────────
-# 5.5 IoT & Irrigation Logic
-# ──────────────────────────────────────────────────────────────────────────────
-
-class SensorReadingRequest(BaseModel):
-    sensor_type: str
-    value: float
-    user_id: str
-    crop_id: str = None
-
-@app.post("/iot/update")
-async def update_sensor_reading(request: SensorReadingRequest):
-    """Update a sensor's current value and log it in history."""
-    if not supabase:
-        raise HTTPException(status_code=500, detail="Supabase not configured")
-
-    try:
-        # Use the table structure from lib/supabase.ts
-        data = {
-            "user_id": request.user_id,
-            "crop_id": request.crop_id,
-            "sensor_type": request.sensor_type,
-            "value": request.value,
-            "timestamp": "now()"
-        }
-        
-        res = supabase.table("iot_sensors").insert(data).execute()
-        
-        return {"status": "success", "data": res.data}
-    except Exception as e:
-        logger.error(f"IoT Update Error: {e}")
-        return {"status": "error", "message": str(e)}
-
-@app.get("/iot/smart-advice/{user_id}")
-async def get_smart_advice(user_id: str):
-    """Analyze all sensor categories and return structured advice per crop."""
-    if not supabase:
-        return {"error": "Supabase not configured"}
-
-    try:
-        # 1. Fetch latest readings for all sensor types
-        # We fetch enough to likely cover all types for several crops
-        res = supabase.table("iot_sensors")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .order("timestamp", desc=True)\
-            .limit(100)\
-            .execute()
-        
-        if not res.data:
-            return {"status": "no_data", "crops": {}}
-
-        # 2. Group by crop and find latest for each type
-        crop_data = {}
-        for r in res.data:
-            c_id = r.get('crop_id') or "general"
-            s_type = r.get('sensor_type', '').lower()
-            val = r.get('value')
-            
-            # Map common variations to standard keys
-            if s_type in ['moisture', 'soil_moisture']: s_key = 'moisture'
-            elif s_type in ['temp', 'temperature', 'soil_temp']: s_key = 'temperature'
-            elif s_type in ['humidity', 'air_humidity']: s_key = 'humidity'
-            elif s_type in ['ph', 'soil_ph']: s_key = 'ph'
-            elif s_type in ['nitrogen', 'n']: s_key = 'nitrogen'
-            elif s_type in ['phosphorus', 'p']: s_key = 'phosphorus'
-            elif s_type in ['potassium', 'k']: s_key = 'potassium'
-            else: s_key = s_type
-            
-            if c_id not in crop_data:
-                crop_data[c_id] = {}
-            
-            if s_key not in crop_data[c_id]:
-                crop_data[c_id][s_key] = val
-
-        # 3. Generate advice per crop
-        results = {}
-        for c_id, sensors in crop_data.items():
-            # Moisture Logic
-            moisture = sensors.get('moisture', 45)
-            m_status = "Optimal"
-            m_advice = "Soil moisture is healthy."
-            if moisture < 30:
-                m_status, m_advice = "Low", "Critical: Water immediately."
-            elif moisture < 42:
-                m_status, m_advice = "Warning", "Moisture dropping. Schedule irrigation."
-            
-            # pH Logic
-            ph = sensors.get('ph', 6.8)
-            ph_status = "Optimal"
-            if ph < 6.0: ph_status = "Acidic"
-            elif ph > 7.5: ph_status = "Alkaline"
-
-            # NPK Logic
-            n = sensors.get('nitrogen', 42)
-            n_status = "Optimal" if 40 <= n <= 60 else ("Low" if n < 40 else "High")
-            
-            p = sensors.get('phosphorus', 68)
-            p_status = "Optimal" if 30 <= p <= 50 else ("Low" if p < 30 else "Good")
-            
-            k = sensors.get('potassium', 55)
-            k_status = "Optimal" if 40 <= k <= 60 else ("Low" if k < 40 else "Good")
-
-            results[c_id] = {
-                "sensors": {
-                    "moisture": {"value": moisture, "status": m_status, "advice": m_advice},
-                    "ph": {"value": ph, "status": ph_status},
-                    "nitrogen": {"value": n, "status": n_status},
-                    "phosphorus": {"value": p, "status": p_status},
-                    "potassium": {"value": k, "status": k_status},
-                    "temperature": {"value": sensors.get('temperature', 24)},
-                    "humidity": {"value": sensors.get('humidity', 65)}
-                },
-                "fertilizer_advice": "Nitrogen is low." if n < 40 else "Nutrients are balanced."
-            }
-
-        return {"status": "success", "crops": results}
-    except Exception as e:
-        logger.error(f"Smart Advice Error: {e}")
-        return {"status": "error", "message": str(e)}
+for module in SUBSYSTEMS.values():
+    app.include_router(module.router)
 
 # ──────────────────────────────────────────────────────────────────────────────
-# 6. Community (Social) Endpoints
-# ──────────────────────────────────────────────────────────────────────────────
-
-@app.get("/community/posts")
-async def get_posts():
-    """Fetch all community posts with user details."""
-    if not supabase: return []
-    try:
-        # Joining with profiles/users table if possible, else just posts
-        res = supabase.table("posts").select("*, users(full_name)").order("created_at", desc=True).execute()
-        return res.data
-    except Exception as e:
-        logger.error(f"Posts fetch error: {e}")
-        return []
-
-@app.post("/community/posts")
-async def create_post(post: PostCreate):
-    """Allow farmers to share updates or ask questions."""
-    if not supabase: return {"status": "error"}
-    try:
-        res = supabase.table("posts").insert(post.dict()).execute()
-        return {"status": "success", "data": res.data}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
-
-@app.post("/community/posts/{post_id}/like")
-async def like_post(post_id: str):
-    """Simple like incrementer."""
-    if not supabase: return {"status": "error"}
-    try:
-        # Get current count
-        curr = supabase.table("posts").select("likes_count").eq("id", post_id).single().execute()
-        new_count = (curr.data['likes_count'] or 0) + 1
-        supabase.table("posts").update({"likes_count": new_count}).eq("id", post_id).execute()
-        return {"likes": new_count}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
-
-# ──────────────────────────────────────────────────────────────────────────────
-# 7. Task Management Endpoints
-# ──────────────────────────────────────────────────────────────────────────────
-
-@app.get("/tasks/{user_id}")
-async def get_tasks(user_id: str):
-    if not supabase: return []
-    res = supabase.table("tasks").select("*").eq("user_id", user_id).order("due_date").execute()
-    return res.data
-
-@app.post("/tasks")
-async def add_task(task: TaskCreate):
-    if not supabase: return {"status": "error"}
-    res = supabase.table("tasks").insert(task.dict()).execute()
-    return res.data
-
-@app.patch("/tasks/{task_id}/toggle")
-async def toggle_task(task_id: str, completed: bool):
-    if not supabase: return {"status": "error"}
-    res = supabase.table("tasks").update({"is_completed": completed}).eq("id", task_id).execute()
-    return res.data
-
-# ──────────────────────────────────────────────────────────────────────────────
-# 8. Notifications
-# ──────────────────────────────────────────────────────────────────────────────
-
-@app.get("/notifications/{user_id}")
-async def get_notifications(user_id: str):
-    if not supabase: return []
-    res = supabase.table("notifications").select("*").eq("user_id", user_id).eq("is_read", False).execute()
-    return res.data
-
-# ──────────────────────────────────────────────────────────────────────────────
-# 8.5 Auth & Role Endpoints
-# ──────────────────────────────────────────────────────────────────────────────
-
-# Auth endpoints removed - migrated to standard Supabase client flow.
-
-
-# ──────────────────────────────────────────────────────────────────────────────
-# 9. Crop Growth Analytics
-# ──────────────────────────────────────────────────────────────────────────────
-
-@app.post("/crops/logs")
-async def log_growth(log: GrowthLogCreate):
-    """Log physical growth metrics for lifecycle tracking."""
-    if not supabase: return {"status": "error"}
-    res = supabase.table("growth_logs").insert(log.dict()).execute()
-    return res.data
-
-@app.get("/crops/{crop_id}/history")
-async def get_crop_history(crop_id: str):
-    res = supabase.table("growth_logs").select("*").eq("crop_id", crop_id).order("log_date").execute()
-    return res.data
-
-# ──────────────────────────────────────────────────────────────────────────────
-# 9.5 Irrigation Intelligence
-# ──────────────────────────────────────────────────────────────────────────────
-
-@app.post("/predict-irrigation")
-async def predict_irrigation(request: IrrigationRequest):
-    """
-    Predict high-precision irrigation levels using Random Forest.
-    """
-    if irr_model is None or feature_encoders is None or target_encoder is None or feature_columns is None:
-        raise HTTPException(
-            status_code=503, 
-            detail="Irrigation ML service is down (Model files not loaded)."
-        )
-
-    try:
-        # 1. Prepare data
-        df = pd.DataFrame([request.dict()])
-
-        # 2. Sequential Encoding
-        categorical_cols = ["Soil_Type", "Crop_Type", "Crop_Growth_Stage", "Season", "Irrigation_Type", "Region"]
-        for col in categorical_cols:
-            if col in feature_encoders:
-                le = feature_encoders[col]
-                val = str(df[col].iloc[0])
-                if hasattr(le, 'transform'):
-                    # Handle unknown with fallback
-                    if val in le.classes_:
-                        df[col] = le.transform([val])
-                    else:
-                        df[col] = le.transform([le.classes_[0]])
-
-        # 3. Predict with consistent columns
-        df = df[feature_columns]
-        prediction = irr_model.predict(df)
-
-        # 4. Decode
-        irrigation_level = target_encoder.inverse_transform(prediction)[0]
-
-        return {"irrigation_level": str(irrigation_level)}
-
-    except Exception as e:
-        logger.error(f"Irrigation Error: {e}")
-        raise HTTPException(status_code=500, detail=f"ML Processing Exception: {str(e)}")
-
-# ──────────────────────────────────────────────────────────────────────────────
-# 10. Endpoints (Legacy Path Preservation)
+# 3. Health, readiness & metrics
 # ──────────────────────────────────────────────────────────────────────────────
 
 @app.get("/")
 async def health_check():
-    return {
+    status = {
         "status":          "AgriTech ML API Running",
-        "disease_model":   "Loaded" if ml_model is not None else "Error",
-        "irrigation_model": "Active" if irr_model is not None else "Down",
-        "ai_chat_status":  "Active" if chat_ai is not None else "Fallback"
+        "subsystems":      ENABLED_SUBSYSTEMS,
     }
-
-# Mock IoT crop data
-MOCK_CROPS = [
-    {
-        "crop": "Wheat",
-        "field_id": 1,
-        "stage": "Vegetative",
-        "sensor": {
-            "moisture": 28,
-            "temperature": 24,
-            "humidity": 65,
-            "ph": 6.5,
-        },
-    },
-    {
-        "crop": "Cotton",
-        "field_id": 2,
-        "stage": "Flowering",
-        "sensor": {
-            "moisture": 42,
-            "temperature": 26,
-            "humidity": 70,
-            "ph": 6.8,
-        },
-    },
-]
-
-@app.get("/crops")
-async def get_crops() -> List[Dict]:
-    """Return mock crop data for all registered fields."""
-    return MOCK_CROPS
-
-
-@app.post("/chat")
-async def chat_with_ai(request: ChatRequest):
-    """Dynamic AI Chatbot endpoint using Gemini (with smart history and multi-lang fallback)."""
-    user_message = request.message
-    lang = request.language
-
-    gemini_history = []
-    for h in request.history:
-        role = "user" if h.get("sender") == "user" else "model"
-        text = h.get("text", "")
-        gemini_history.append({"role": role, "parts": [text]})
-
-    context_str = ""
-    if request.context:
-        context_str = "\n\n### Context Information ###\n"
-        
-        # All Crops Context
-        if "crops" in request.context:
-            context_str += "Farmer Registered Crops & Real-time IoT Data:\n"
-            for c in request.context["crops"]:
-                s = c.get("sensor", {})
-                context_str += f"- Crop: {c.get('crop')}, Stage: {c.get('stage')}, Soil Moisture: {s.get('moisture')}%, Soil Temp: {s.get('temperature')}°C, Soil pH: {s.get('ph')}\n"
-            context_str += "\n"
-
-        if "crop" in request.context:
-            c = request.context["crop"]
-            context_str += f"Current Viewed Crop: {c.get('name', 'Unknown')}\nVariety: {c.get('variety', 'Unknown')}\nGrowth Stage: {c.get('stage', 'Unknown')}\nArea: {c.get('area', 'Unknown')}\nPlanted Date / Days Since Sowing: {c.get('daysSinceSowing', 'Unknown')}\n\n"
-        if "sensor" in request.context:
-            s = request.context["sensor"]
-            context_str += f"Current Viewed Field IoT Sensors -> Soil Moisture: {s.get('moisture', 'Unknown')}, Soil Temperature: {s.get('temperature', 'Unknown')}, Air Humidity: {s.get('humidity', 'Unknown')}, Soil pH: {s.get('ph', 'Unknown')}\n\n"
-        if "weather" in request.context:
-            w = request.context["weather"]
-            context_str += f"Local Weather Forecast -> {w.get('prediction', 'Unknown')}, Max Temp: {w.get('maxTemp', 'Unknown')}, Heat/Cold Risk: {w.get('risk', 'None')}\n"
-
-    system_instruction = f"""
-    You are 'AgriTech bot', a crop-stage-aware intelligent farm advisor from Maharashtra/India.
-    MANDATORY: You MUST respond ONLY in the {lang} language.
-    Even if the user asks in English, translate your answer to {lang}.
-    
-    Goal: Transform into a field-specific digital agronomist using real-time farm data provided below.
-    - Identify which crop field the user is asking about (e.g. Wheat, Cotton) based on their question.
-    - Reference specific sensor readings (moisture, pH, temp) for THAT crop in your answer.
-    - Mention both the crop name and its current growth stage.
-    - If it's a general question, analyze all available crop datasets.
-    - Use weather forecast predictive data for actionable advice (e.g. delay irrigation if rain is expected).
-    - Give Stage-specific advice: Watering, Fertilizer, Disease prevention, Heat stress, Pest risk.
-    - Keep it professional and concise (max 3-4 sentences).
-    
-    Current language set to: {lang}
-    {context_str}
-    """
-
-    if chat_ai:
-        try:
-            import asyncio
-            chat = chat_ai.start_chat(history=gemini_history)
-            try:
-                response = await asyncio.wait_for(
-                    chat.send_message_async(f"{system_instruction}\n\nUser Question: {user_message}"),
-                    timeout=10.0
-                )
-                return {"response": response.text}
-            except asyncio.TimeoutError:
-                return {"response": "[Error] AI took too long to respond."}
-            except Exception as timeout_err:
-                return {"response": f"[Gemini Error] {str(timeout_err)}"}
-        except Exception as e:
-            return {"response": f"[System Error] Gemini could not start: {str(e)}"}
-
-    # Smart Contextual Fallback
-    keywords = {
-        "water":      ["पानी", "पाणी", "water", "irrigation", "सिंचाई", "सिंचन", "dry", "wet"],
-        "pest":       ["कीड़े", "कीटक", "pest", "insect", "worm", "कीड", "अळी"],
-        "disease":    ["रोग", "आजार", "disease", "sick", "yellow", "spots", "पिवळे", "डाग"],
-        "crop":       ["crop", "plant", "sugarcane", "wheat", "rice", "पिक", "फसल"],
-        "fertilizer": ["khad", "fertilizer", "urea", "npk", "खत", "उर्वरक"]
-    }
-    match = "general"
-    lower_msg = user_message.lower()
-    for category, kws in keywords.items():
-        if any(kw in lower_msg for kw in kws):
-            match = category
-            break
-
-    knowledge = {
-        "water":      {"en": "During germination, keep soil moist but not waterlogged. Water every 2-3 days."},
-        "pest":       {"en": "Check underside of leaves for insects. Neem oil spray is a safe organic solution."},
-        "disease":    {"en": "Yellowing often indicates nutrient deficiency or overwatering. Check roots for rot."},
-        "crop":       {"en": "Ensure your crop gets enough sunlight and protection from direct wind."},
-        "general":    {"en": "I'm here to help. Could you tell me if you noticed spots on leaves or soil color changes?"}
-    }
-    res_dict = knowledge.get(match, knowledge["general"])
-    response_text = res_dict.get(lang, res_dict["en"])
-    return {"response": f"[Smart Assistant] {response_text}"}
-
-
-@app.post("/predict")
-async def predict_disease(file: UploadFile = File(...), language: str = "en"):
-    """
-    Receive an image, preprocess to 128x128, run model prediction, return structured JSON.
-    Response fields: disease, confidence, severity, cause, treatment, prevention, fertilizer
-    """
-    # 1. Check model
-    if ml_model is None:
-        raise HTTPException(status_code=503, detail="ML model is not loaded. Check server logs.")
-
-    # 2. Check class names loaded
-    if not class_names:
-        raise HTTPException(status_code=503, detail="Class names not loaded. Check server logs.")
-
-    # 3. Validate file type
-    if not file.content_type or not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Uploaded file is not an image.")
-
-    try:
-        # 4. Read image bytes
-        image_bytes = await file.read()
-        logger.info(f"📸 Received: {file.filename} ({len(image_bytes)} bytes)")
-
-        if len(image_bytes) == 0:
-            raise ValueError("Empty image file received.")
-
-        # 6. Preprocess image
-        # Dynamically get input size from model
-        input_shape = ml_model.input_shape
-        target_size = (input_shape[1], input_shape[2]) if len(input_shape) >= 3 else (224, 224)
-        
-        logger.info(f"🚀 Predicting with target size: {target_size}")
-        processed_image = preprocess_image(image_bytes, target_size=target_size)
-        logger.info(f"🔧 Preprocessed shape: {processed_image.shape}")
-
-        # 6. Predict
-        predictions = ml_model.predict(processed_image, verbose=0)
-        logger.info(f"📊 Raw predictions shape: {predictions.shape}, values: {predictions[0][:5]}...")
-
-        # 7. Extract result
-        probs = predictions[0]
-        class_index = int(np.argmax(probs))
-        confidence  = float(np.max(probs)) * 100
-        
-        # 8. Log Top 5 for debugging
-        top_5_indices = np.argsort(probs)[-5:][::-1]
-        top_5_diagnostics = []
-        for idx in top_5_indices:
-            name = class_names[idx] if idx < len(class_names) else f"Unknown_{idx}"
-            c = float(probs[idx]) * 100
-            top_5_diagnostics.append(f"{name} ({c:.1f}%)")
-        
-        logger.info(f"🔍 Top 5 Predictions: {', '.join(top_5_diagnostics)}")
-
-        # 9. Map to class name
-        if class_index < len(class_names):
-            class_label = class_names[class_index]
-        else:
-            class_label = f"Unknown_Disease_Index_{class_index}"
-
-        # 10. Metadata / Severity
-        display_name = class_label.replace("___", " ").replace("_", " ")
-        if confidence >= 85:
-            severity = "High"
-        elif confidence >= 60:
-            severity = "Medium"
-        else:
-            severity = "Low"
-
-        # 9. Get disease info (now with severity lookup)
-        info = get_disease_info(class_label, severity)
-
-        # 10. Format disease name for display (e.g. "Potato___Early_Blight" → "Potato Early Blight")
-        display_name = class_label.replace("___", " ").replace("_", " ")
-
-        # 10.5 Apply Localization if available
-        localized = get_local_translation(class_index, language)
-        if localized:
-            display_name = localized.get("disease", display_name)
-            info["cause"] = localized.get("cause", info["cause"]) # Fallback to info cause if missing in localized
-            info["treatment"] = localized.get("solution", info["treatment"])
-            info["prevention"] = localized.get("prevention", info["prevention"])
-            info["fertilizer"] = localized.get("fertilizer_advice", info["fertilizer"])
-
-        logger.info(f"🔮 Predicted: {display_name} | Confidence: {confidence:.2f}% | Severity: {severity} | Lang: {language}")
-
-        # 11. Return — exact fields the frontend expects
-        return {
-            "disease":    display_name,
-            "raw_class":  class_label,
-            "confidence": round(confidence, 2),
-            "severity":   severity,
-            "cause":      info["cause"],
-            "treatment":  info["treatment"],
-            "prevention": info["prevention"],
-            "fertilizer": info["fertilizer"]
-        }
-
-    except ValueError as ve:
-        logger.error(f"❌ Image error: {ve}")
-        raise HTTPException(status_code=400, detail=str(ve))
-    except Exception as e:
-        logger.error(f"❌ Prediction error: {e}")
-        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+    for module in SUBSYSTEMS.values():
+        if hasattr(module, "health"):
+            status.update(module.health())
+    return status
+
+@app.get("/ready")
+async def readiness_probe():
+    """Readiness probe: 200 once required subsystems are up, 503 otherwise."""
+    report = startup_report.snapshot()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition: per-stage latency histograms, in-flight gauges, cache figures."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,137 @@
+# Hardcoded disease info — fallback when a class is missing from the
+# recommendation CSV. Keys match class_names.json labels.
+
+DISEASE_DB = {
+    "Corn___Common_Rust": {
+        "cause":      "Caused by the fungus Puccinia sorghi, spread by windborne spores in cool, moist conditions.",
+        "treatment":  "Apply fungicides (azoxystrobin, propiconazole) at first sign of pustules. Spray every 10–14 days.",
+        "prevention": "Plant resistant hybrids. Scout fields regularly from early season.",
+        "fertilizer": "Ensure adequate Potassium and balanced NPK to strengthen plant immunity."
+    },
+    "Corn___Gray_Leaf_Spot": {
+        "cause":      "Caused by Cercospora zeae-maydis fungus; thrives in warm, humid, and cloudy conditions.",
+        "treatment":  "Apply foliar fungicides (strobilurin or triazole) when disease appears on lower leaves.",
+        "prevention": "Crop rotation with non-host crops. Manage crop residue by tillage.",
+        "fertilizer": "Optimize Potassium levels to help plant manage drought and disease stress."
+    },
+    "Corn___Healthy": {
+        "cause":      "No disease detected. Plant appears healthy.",
+        "treatment":  "No treatment required. Continue regular monitoring.",
+        "prevention": "Maintain consistent irrigation and pest scouting to keep crop healthy.",
+        "fertilizer": "Apply Nitrogen in split applications for sustained growth."
+    },
+    "Corn___Northern_Leaf_Blight": {
+        "cause":      "Caused by Exserohilum turcicum fungus. Favored by moderate temperatures and leaf wetness.",
+        "treatment":  "Apply fungicides if disease appears early on upper leaves. Foliar sprays help reduce spread.",
+        "prevention": "Crop rotation and tillage to bury infected residue. Use resistant hybrids.",
+        "fertilizer": "Balanced nutrition program improves overall plant health and resistance."
+    },
+    "Jowar___Healthy": {
+        "cause":      "No disease detected. Plant appears healthy.",
+        "treatment":  "No treatment required. Continue regular monitoring.",
+        "prevention": "Practice good field sanitation and proper spacing to maintain airflow.",
+        "fertilizer": "Apply NPK based on soil test. Phosphorus promotes strong root development."
+    },
+    "Jowar___Rust": {
+        "cause":      "Caused by Puccinia purpurea fungus; spreads rapidly via wind in warm, humid weather.",
+        "treatment":  "Apply contact or systemic fungicides (mancozeb, propiconazole) at early infection stage.",
+        "prevention": "Use rust-resistant varieties. Remove infected plant debris after harvest.",
+        "fertilizer": "Ensure adequate Potassium to boost natural disease resistance."
+    },
+    "Mango___Anthracnose": {
+        "cause":      "Caused by Colletotrichum gloeosporioides; infects during wet and humid conditions.",
+        "treatment":  "Spray copper-based fungicides or carbendazim. Apply pre- and post-harvest treatment.",
+        "prevention": "Prune for better airflow. Avoid overhead irrigation. Collect and destroy fallen fruits.",
+        "fertilizer": "Balanced fertilization with adequate Calcium strengthens fruit cell walls."
+    },
+    "Mango___Healthy": {
+        "cause":      "No disease detected. Plant appears healthy.",
+        "treatment":  "No treatment required. Continue regular orchard management.",
+        "prevention": "Regular pruning for light penetration and airflow. Monitor for pests.",
+        "fertilizer": "Apply balanced NPK fertilizer in spring before flowering."
+    },
+    "Mango___Powdery_Mildew": {
+        "cause":      "Caused by Oidium mangiferae; favors dry weather with cool nights and warm days.",
+        "treatment":  "Apply sulfur dust or systemic fungicides (triadimefon, hexaconazole) on affected parts.",
+        "prevention": "Avoid planting in areas with poor air circulation. Prune congested branches.",
+        "fertilizer": "Avoid over-fertilizing with Nitrogen, which creates lush susceptible tissue."
+    },
+    "Potato___Early_Blight": {
+        "cause":      "Caused by Alternaria solani; older leaves infected first during warm, wet periods.",
+        "treatment":  "Apply fungicides containing chlorothalonil or mancozeb. Rotate with legumes or grains.",
+        "prevention": "Manage irrigation to keep foliage dry. Destroy volunteer potato plants.",
+        "fertilizer": "Increase Potassium and Phosphorus if soil test indicates deficiency."
+    },
+    "Potato___Healthy": {
+        "cause":      "No disease detected. Plant appears healthy.",
+        "treatment":  "No treatment required. Continue regular monitoring.",
+        "prevention": "Practice 3-year crop rotation. Use certified seed potatoes.",
+        "fertilizer": "Sufficient Nitrogen early in growth; moderate Potassium throughout season."
+    },
+    "Potato___Late_Blight": {
+        "cause":      "Caused by Phytophthora infestans (oomycete); spreads rapidly in cool, wet conditions. Highly destructive.",
+        "treatment":  "URGENT: Use systemic fungicides (metalaxyl, cymoxanil). Destroy infected plants immediately.",
+        "prevention": "Use certified seed tubers. Avoid cull piles. Apply preventive fungicide sprays.",
+        "fertilizer": "Avoid over-fertilizing with Nitrogen late in the season."
+    },
+    "Rice___Brown_Spot": {
+        "cause":      "Caused by Helminthosporium oryzae; associated with poor soil nutrition and drought stress.",
+        "treatment":  "Apply fungicides (tricyclazole, propiconazole). Ensure proper water management.",
+        "prevention": "Use disease-free seeds. Treat seeds with fungicide before planting.",
+        "fertilizer": "Apply balanced fertilizer. Potassium and Silicon nutrition reduce susceptibility."
+    },
+    "Rice___Healthy": {
+        "cause":      "No disease detected. Plant appears healthy.",
+        "treatment":  "No treatment required. Continue regular field monitoring.",
+        "prevention": "Maintain proper water levels and field sanitation throughout the season.",
+        "fertilizer": "Split Nitrogen applications to support tillering and grain filling."
+    },
+    "Rice___Leaf_Blast": {
+        "cause":      "Caused by Magnaporthe oryzae; favored by high humidity, heavy dew, and warm nights.",
+        "treatment":  "Apply tricyclazole or isoprothiolane fungicide immediately at first signs.",
+        "prevention": "Use resistant varieties. Avoid excessive Nitrogen. Ensure proper plant spacing.",
+        "fertilizer": "Reduce Nitrogen application — excess Nitrogen increases blast susceptibility."
+    },
+    "Rice___Neck_Blast": {
+        "cause":      "Caused by Magnaporthe oryzae attacking the neck node; occurs at panicle emergence stage.",
+        "treatment":  "Apply tricyclazole at panicle initiation and heading stage for protection.",
+        "prevention": "Time planting to avoid panicle emergence during high-risk periods. Use resistant varieties.",
+        "fertilizer": "Balanced NPK; avoid late high-Nitrogen applications which increase severity."
+    },
+    "Sugarcane_Bacterial Blight": {
+        "cause":      "Caused by Xanthomonas albilineans; spreads through infected cuttings and contaminated tools.",
+        "treatment":  "No chemical cure. Rogue out infected stools. Use disease-free planting material.",
+        "prevention": "Use certified disease-free seed setts. Disinfect cutting tools with bleach solution.",
+        "fertilizer": "Balanced NPK to maintain vigorous growth. Avoid stress conditions."
+    },
+    "Sugarcane_Healthy": {
+        "cause":      "No disease detected. Plant appears healthy.",
+        "treatment":  "No treatment required. Continue regular monitoring.",
+        "prevention": "Practice proper field sanitation and use disease-free planting material.",
+        "fertilizer": "Apply Nitrogen in split doses. Ensure adequate Phosphorus and Potassium."
+    },
+    "Sugarcane_Red Rot": {
+        "cause":      "Caused by Colletotrichum falcatum; enters through wounds; spreads in waterlogged soils.",
+        "treatment":  "Remove and destroy affected stools. Treat setts with carbendazim solution before planting.",
+        "prevention": "Use resistant varieties. Ensure good field drainage. Avoid waterlogging.",
+        "fertilizer": "Maintain soil health with organic matter. Avoid excessive Nitrogen."
+    },
+    "Wheat___Brown_Rust": {
+        "cause":      "Caused by Puccinia triticina; wind-dispersed spores; favors mild temperatures and moisture.",
+        "treatment":  "Apply triazole or strobilurin fungicide at flag leaf stage for best results.",
+        "prevention": "Grow resistant varieties. Avoid late sowing to reduce disease risk window.",
+        "fertilizer": "Balanced Nitrogen application; avoid over-application which increases susceptibility."
+    },
+    "Wheat___Healthy": {
+        "cause":      "No disease detected. Plant appears healthy.",
+        "treatment":  "No treatment required. Continue regular field monitoring.",
+        "prevention": "Use certified seeds, proper crop rotation, and balanced nutrition.",
+        "fertilizer": "Apply Nitrogen in 2–3 splits. Ensure adequate Phosphorus at sowing."
+    },
+    "Wheat___Yellow_Rust": {
+        "cause":      "Caused by Puccinia striiformis; favors cool, moist conditions. Highly contagious via wind.",
+        "treatment":  "Apply propiconazole or tebuconazole fungicide immediately at first sign of yellowing stripes.",
+        "prevention": "Grow resistant varieties. Avoid late sowing. Monitor fields from tillering stage.",
+        "fertilizer": "Ensure adequate Potassium. Avoid excess Nitrogen in the growing season."
+    }
+}
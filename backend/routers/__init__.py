@@ -0,0 +1,11 @@
+# API routers, one per subsystem. main.py imports only the enabled ones
+# (ENABLED_SUBSYSTEMS), so heavy dependencies load only where needed.
+#
+# Each router module exposes:
+#   router                    FastAPI APIRouter with the subsystem's endpoints
+#   STARTUP                   list of (name, loader, required) run concurrently at startup
+#   async startup(app, report)  optional post-load step (warm-up, background workers)
+#   async shutdown()          optional cleanup
+#   health()                  dict merged into the GET / health payload
+#   BODY_LIMITS               optional {path: max_body_bytes} enforced before parsing
+#   USES_SUPABASE             True if the endpoints need db.supabase (initialised once, shared)
@@ -0,0 +1,141 @@
+import os
+import asyncio
+import logging
+from fastapi import APIRouter
+from pydantic import BaseModel
+
+from utils.metrics import STAGE_SECONDS, instrument
+from utils.startup import SubsystemUnavailable
+
+logger = logging.getLogger("agritech-ml-api")
+
+router = APIRouter(tags=["chat"])
+
+chat_ai = None
+
+class ChatRequest(BaseModel):
+    message: str
+    history: list = []
+    language: str = "en"
+    context: dict = None
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 1. Gemini client (SDK imported only when this subsystem is enabled)
+# ──────────────────────────────────────────────────────────────────────────────
+def init_gemini():
+    global chat_ai
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise SubsystemUnavailable("GEMINI_API_KEY not set")
+
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    chat_ai = genai.GenerativeModel('models/gemini-2.5-flash')
+
+STARTUP = [
+    ("gemini", init_gemini, False),
+]
+
+def health() -> dict:
+    return {"ai_chat_status": "Active" if chat_ai is not None else "Fallback"}
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 2. Chat Endpoint
+# ──────────────────────────────────────────────────────────────────────────────
+GEMINI_SECONDS = STAGE_SECONDS.labels("/chat", "gemini")
+
+@router.post("/chat")
+@instrument("/chat")
+async def chat_with_ai(request: ChatRequest):
+    """Dynamic AI Chatbot endpoint using Gemini (with smart history and multi-lang fallback)."""
+    user_message = request.message
+    lang = request.language
+
+    gemini_history = []
+    for h in request.history:
+        role = "user" if h.get("sender") == "user" else "model"
+        text = h.get("text", "")
+        gemini_history.append({"role": role, "parts": [text]})
+
+    context_str = ""
+    if request.context:
+        context_str = "\n\n### Context Information ###\n"
+        
+        # All Crops Context
+        if "crops" in request.context:
+            context_str += "Farmer Registered Crops & Real-time IoT Data:\n"
+            for c in request.context["crops"]:
+                s = c.get("sensor", {})
+                context_str += f"- Crop: {c.get('crop')}, Stage: {c.get('stage')}, Soil Moisture: {s.get('moisture')}%, Soil Temp: {s.get('temperature')}°C, Soil pH: {s.get('ph')}\n"
+            context_str += "\n"
+
+        if "crop" in request.context:
+            c = request.context["crop"]
+            context_str += f"Current Viewed Crop: {c.get('name', 'Unknown')}\nVariety: {c.get('variety', 'Unknown')}\nGrowth Stage: {c.get('stage', 'Unknown')}\nArea: {c.get('area', 'Unknown')}\nPlanted Date / Days Since Sowing: {c.get('daysSinceSowing', 'Unknown')}\n\n"
+        if "sensor" in request.context:
+            s = request.context["sensor"]
+            context_str += f"Current Viewed Field IoT Sensors -> Soil Moisture: {s.get('moisture', 'Unknown')}, Soil Temperature: {s.get('temperature', 'Unknown')}, Air Humidity: {s.get('humidity', 'Unknown')}, Soil pH: {s.get('ph', 'Unknown')}\n\n"
+        if "weather" in request.context:
+            w = request.context["weather"]
+            context_str += f"Local Weather Forecast -> {w.get('prediction', 'Unknown')}, Max Temp: {w.get('maxTemp', 'Unknown')}, Heat/Cold Risk: {w.get('risk', 'None')}\n"
+
+    system_instruction = f"""
+    You are 'AgriTech bot', a crop-stage-aware intelligent farm advisor from Maharashtra/India.
+    MANDATORY: You MUST respond ONLY in the {lang} language.
+    Even if the user asks in English, translate your answer to {lang}.
+    
+    Goal: Transform into a field-specific digital agronomist using real-time farm data provided below.
+    - Identify which crop field the user is asking about (e.g. Wheat, Cotton) based on their question.
+    - Reference specific sensor readings (moisture, pH, temp) for THAT crop in your answer.
+    - Mention both the crop name and its current growth stage.
+    - If it's a general question, analyze all available crop datasets.
+    - Use weather forecast predictive data for actionable advice (e.g. delay irrigation if rain is expected).
+    - Give Stage-specific advice: Watering, Fertilizer, Disease prevention, Heat stress, Pest risk.
+    - Keep it professional and concise (max 3-4 sentences).
+    
+    Current language set to: {lang}
+    {context_str}
+    """
+
+    if chat_ai:
+        try:
+            chat = chat_ai.start_chat(history=gemini_history)
+            try:
+                with GEMINI_SECONDS.time():
+                    response = await asyncio.wait_for(
+                        chat.send_message_async(f"{system_instruction}\n\nUser Question: {user_message}"),
+                        timeout=10.0
+                    )
+                return {"response": response.text}
+            except asyncio.TimeoutError:
+                return {"response": "[Error] AI took too long to respond."}
+            except Exception as timeout_err:
+                return {"response": f"[Gemini Error] {str(timeout_err)}"}
+        except Exception as e:
+            return {"response": f"[System Error] Gemini could not start: {str(e)}"}
+
+    # Smart Contextual Fallback
+    keywords = {
+        "water":      ["पानी", "पाणी", "water", "irrigation", "सिंचाई", "सिंचन", "dry", "wet"],
+        "pest":       ["कीड़े", "कीटक", "pest", "insect", "worm", "कीड", "अळी"],
+        "disease":    ["रोग", "आजार", "disease", "sick", "yellow", "spots", "पिवळे", "डाग"],
+        "crop":       ["crop", "plant", "sugarcane", "wheat", "rice", "पिक", "फसल"],
+        "fertilizer": ["khad", "fertilizer", "urea", "npk", "खत", "उर्वरक"]
+    }
+    match = "general"
+    lower_msg = user_message.lower()
+    for category, kws in keywords.items():
+        if any(kw in lower_msg for kw in kws):
+            match = category
+            break
+
+    knowledge = {
+        "water":      {"en": "During germination, keep soil moist but not waterlogged. Water every 2-3 days."},
+        "pest":       {"en": "Check underside of leaves for insects. Neem oil spray is a safe organic solution."},
+        "disease":    {"en": "Yellowing often indicates nutrient deficiency or overwatering. Check roots for rot."},
+        "crop":       {"en": "Ensure your crop gets enough sunlight and protection from direct wind."},
+        "general":    {"en": "I'm here to help. Could you tell me if you noticed spots on leaves or soil color changes?"}
+    }
+    res_dict = knowledge.get(match, knowledge["general"])
+    response_text = res_dict.get(lang, res_dict["en"])
+    return {"response": f"[Smart Assistant] {response_text}"}
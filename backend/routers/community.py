@@ -0,0 +1,61 @@
+import logging
+from fastapi import APIRouter
+from pydantic import BaseModel
+
+import db
+
+logger = logging.getLogger("agritech-ml-api")
+
+router = APIRouter(tags=["community"])
+
+USES_SUPABASE = True
+
+class PostCreate(BaseModel):
+    user_id: str
+    content: str
+    image_url: str = None
+
+class CommentCreate(BaseModel):
+    user_id: str
+    post_id: str
+    content: str
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 1. Community (Social) Endpoints
+# ──────────────────────────────────────────────────────────────────────────────
+
+@router.get("/community/posts")
+async def get_posts():
+    """Fetch all community posts with user details."""
+    if not db.supabase: return []
+    try:
+        # Joining with profiles/users table if possible, else just posts
+        res = db.execute(db.supabase.table("posts").select("*, users(full_name)").order("created_at", desc=True), "posts.select")
+        return res.data
+    except Exception as e:
+        logger.error(f"Posts fetch error: {e}")
+        return []
+
+@router.post("/community/posts")
+async def create_post(post: PostCreate):
+    """Allow farmers to share updates or ask questions."""
+    if not db.supabase: return {"status": "error"}
+    try:
+        res = db.execute(db.supabase.table("posts").insert(post.dict()), "posts.insert")
+        return {"status": "success", "data": res.data}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@router.post("/community/posts/{post_id}/like")
+async def like_post(post_id: str):
+    """Simple like incrementer."""
+    if not db.supabase: return {"status": "error"}
+    try:
+        # Get current count
+        curr = db.execute(db.supabase.table("posts").select("likes_count").eq("id", post_id).single(), "posts.select")
+        new_count = (curr.data['likes_count'] or 0) + 1
+        db.execute(db.supabase.table("posts").update({"likes_count": new_count}).eq("id", post_id), "posts.update")
+        return {"likes": new_count}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
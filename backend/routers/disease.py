@@ -0,0 +1,865 @@
+import os
+import hmac
+import json
+import importlib
+import time
+import asyncio
+import logging
+import zipfile
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Header
+from fastapi.responses import Response, StreamingResponse
+import numpy as np
+from pydantic import BaseModel
+from typing import List, Optional
+
+from config import APP_DIR, BASE_DIR, MODELS_DIR, MODEL_PATH, CLASS_PATH, CSV_PATH
+from models.disease_db import DISEASE_DB
+from models import translations
+from utils.batching import MicroBatcher
+from utils.inference_backends import backend_for_path, load_backend
+from utils.executors import InferenceExecutor
+from utils.batch_scan import is_zip_upload, expand_zip, summarize_field
+from utils.prediction_cache import PredictionCache
+from utils.perceptual_hash import NearDuplicateIndex, dhash
+from utils.response_table import ResponseTable, source_signature
+from utils.startup import SubsystemUnavailable
+from utils.diagnostics import DiagnosticsSampler, TopK
+from utils.metrics import REGISTRY, STAGE_SECONDS, Gauge, instrument
+from utils.model_registry import ModelRegistry, ModelSlot, REGISTRY_MODES
+from utils.tiling import prepare_tiles, summarize_tiles
+from utils.upload_ingest import read_upload
+
+logger = logging.getLogger("agritech-ml-api")
+
+router = APIRouter(tags=["disease"])
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 1. Load and Prepare recommendation database
+# ──────────────────────────────────────────────────────────────────────────────
+RECOMMENDATION_DB = {}
+
+def read_recommendations() -> dict:
+    """Load the CSV into a nested dictionary: {disease_name: {severity: info_dict}}"""
+    import csv
+    print(f"Loading recommendations from {os.path.abspath(CSV_PATH)}...")
+    if not os.path.exists(CSV_PATH):
+        raise SubsystemUnavailable(f"Recommendation CSV not found at {CSV_PATH}")
+
+    db = {}
+    with open(CSV_PATH, mode='r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            d_name = row['disease_name']
+            sev    = row['severity']
+            
+            if d_name not in db:
+                db[d_name] = {}
+            
+            db[d_name][sev] = {
+                "cause":      row['cause'],
+                "treatment":  row['treatment_solution'],
+                "prevention": row['prevention_tips'],
+                "fertilizer": row['fertilizer_recommendation']
+            }
+    print(f"Loaded recommendations for {len(db)} diseases.")
+    return db
+
+def load_recommendations():
+    global RECOMMENDATION_DB
+    RECOMMENDATION_DB = read_recommendations()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 1.5 Load class names
+#    class_names / ml_model below are what the startup loaders produced; once
+#    the first registry slot is built, requests read everything from the slot.
+# ──────────────────────────────────────────────────────────────────────────────
+class_names = []
+
+def read_class_names(path: str = CLASS_PATH) -> list:
+    print(f"Loading class names from {os.path.abspath(path)}...")
+    with open(path, "r") as f:
+        raw = json.load(f)
+    # raw is {"0": "Corn___Common_Rust", "1": ..., ...}
+    # Build an ordered list by integer key
+    names = [raw[str(i)] for i in range(len(raw))]
+    print(f"Loaded {len(names)} class names.")
+    return names
+
+def load_class_names():
+    global class_names
+    class_names = read_class_names()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 2. Load ML model once at startup
+#    Model input: (None, 128, 128, 3)  →  Flatten(25088)  →  Dense(512)  →  Dense(22)
+#    INFERENCE_BACKEND selects keras (.h5), tflite or onnx (see export_model.py).
+# ──────────────────────────────────────────────────────────────────────────────
+INFERENCE_BACKEND    = os.getenv("INFERENCE_BACKEND", "keras")              # keras | tflite | onnx
+INFERENCE_MODEL_PATH = os.getenv("INFERENCE_MODEL_PATH") or (
+    MODEL_PATH if INFERENCE_BACKEND == "keras"
+    else os.path.join(APP_DIR, f"plant_disease_model.{INFERENCE_BACKEND}")
+)
+INFERENCE_THREADS    = int(os.getenv("INFERENCE_THREADS", "0")) or None
+
+ml_model = None
+
+def load_disease_model():
+    global ml_model
+    print(f"Loading ML model ({INFERENCE_BACKEND}) from {os.path.abspath(INFERENCE_MODEL_PATH)}...")
+    ml_model = load_backend(INFERENCE_BACKEND, INFERENCE_MODEL_PATH, num_threads=INFERENCE_THREADS)
+    print(f"ML model loaded. Input shape: {ml_model.input_shape}")
+
+def validate_model(backend, names: list):
+    """Reject a model whose input or output does not line up with the class list."""
+    shape = backend.input_shape
+    if len(shape) != 4 or shape[-1] != 3:
+        raise ValueError(f"Unexpected model input shape {shape}; expected (None, H, W, 3).")
+    if backend.output_dim != len(names):
+        raise ValueError(f"Model has {backend.output_dim} outputs but the class list has {len(names)} entries.")
+
+def warm_up_model(backend):
+    """Forward passes at batch 1 and max batch size so graph tracing happens before traffic."""
+    sample_shape = tuple(d or 1 for d in backend.input_shape[1:])
+    for n in sorted({1, PREDICT_BATCH_MAX_SIZE}):
+        probs = backend.predict(np.zeros((n,) + sample_shape, dtype=np.float32))
+        if probs.shape[0] != n or not np.all(np.isfinite(probs)):
+            raise ValueError(f"Warm-up produced invalid output of shape {probs.shape}.")
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 2.1 Inference executor + micro-batching
+#    Decode and forward passes run on a thread or process pool, never on the
+#    event loop. Concurrent /predict calls are grouped into one forward pass.
+#    Each model version (registry slot) gets its own executor and batcher.
+# ──────────────────────────────────────────────────────────────────────────────
+INFERENCE_EXECUTOR        = os.getenv("INFERENCE_EXECUTOR", "thread")      # thread | process
+INFERENCE_WORKERS         = int(os.getenv("INFERENCE_WORKERS", "0")) or None
+PREPROCESS_MODE           = os.getenv("PREPROCESS_MODE", "quality")        # quality | fast
+PREPROCESS_MAX_PIXELS     = int(os.getenv("PREPROCESS_MAX_PIXELS", "16000000"))
+PREDICT_BATCH_MAX_SIZE    = int(os.getenv("PREDICT_BATCH_MAX_SIZE", "32"))
+PREDICT_BATCH_MAX_WAIT_MS = float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "5"))
+
+def make_slot(spec: dict, version: str, backend, table: ResponseTable) -> ModelSlot:
+    executor = InferenceExecutor(
+        kind=INFERENCE_EXECUTOR,
+        workers=INFERENCE_WORKERS,
+        backend=spec["backend"],
+        model_path=spec["model_path"],
+        preprocess_mode=PREPROCESS_MODE,
+        max_pixels=PREPROCESS_MAX_PIXELS,
+    )
+    batcher = MicroBatcher(
+        backend.predict,
+        max_batch_size=PREDICT_BATCH_MAX_SIZE,
+        max_wait_ms=PREDICT_BATCH_MAX_WAIT_MS,
+        runner=executor.run_batch,
+    )
+    batcher.observer = observe_batch
+    return ModelSlot(spec, version, backend, table, executor, batcher)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 2.2 Prediction result cache
+#    Re-submitted photos (3G retries, WhatsApp shares) skip decode + inference.
+# ──────────────────────────────────────────────────────────────────────────────
+def compute_model_version(kind: str = INFERENCE_BACKEND, path: str = INFERENCE_MODEL_PATH, explicit: str = None) -> str:
+    """Explicit version, else derived from the backend and model file's size and mtime."""
+    if explicit:
+        return explicit
+    try:
+        st = os.stat(path)
+        return f"{kind}-{st.st_size:x}-{int(st.st_mtime):x}"
+    except OSError:
+        return "unknown"
+
+PREDICT_CACHE_ENABLED = os.getenv("PREDICT_CACHE_ENABLED", "1") == "1"
+prediction_cache = PredictionCache(
+    max_entries=int(os.getenv("PREDICT_CACHE_MAX_ENTRIES", "2048")),
+    max_bytes=int(os.getenv("PREDICT_CACHE_MAX_MB", "64")) * 1024 * 1024,
+    ttl_seconds=int(os.getenv("PREDICT_CACHE_TTL_S", "86400")),
+    disk_path=os.getenv("PREDICT_CACHE_DISK_PATH") or None,
+    disk_max_entries=int(os.getenv("PREDICT_CACHE_DISK_MAX_ENTRIES", "100000")),
+) if PREDICT_CACHE_ENABLED else None
+
+# Near-duplicate index: re-photographed / re-compressed / slightly cropped leaves
+# are matched by perceptual hash and reuse the earlier probability row.
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "1") == "1"
+near_duplicate_index = NearDuplicateIndex(
+    max_distance=int(os.getenv("NEAR_DUP_MAX_DISTANCE", "4")),
+    max_entries=int(os.getenv("NEAR_DUP_MAX_ENTRIES", "10000")),
+    ttl_seconds=int(os.getenv("NEAR_DUP_TTL_S", "3600")),
+) if NEAR_DUP_ENABLED else None
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 2.3 Metrics (GET /metrics)
+#    Stage children are bound once here; cache and batching figures are read
+#    from their existing stats only when /metrics is scraped.
+# ──────────────────────────────────────────────────────────────────────────────
+PREDICT_STAGES = {
+    stage: STAGE_SECONDS.labels("/predict", stage)
+    for stage in ("read", "cache_lookup", "preprocess", "near_duplicate", "inference",
+                  "queue_wait", "model_forward", "response")
+}
+MODEL_INFO = Gauge("agritech_model_info", "Disease model versions (1 = active, 0 = retired).", ("backend", "version"))
+
+def observe_batch(batch_size, waits_ms, infer_ms):
+    """MicroBatcher observer: per-item queue wait and per-batch forward pass."""
+    for wait in waits_ms:
+        PREDICT_STAGES["queue_wait"].observe(wait / 1000)
+    PREDICT_STAGES["model_forward"].observe(infer_ms / 1000)
+
+def collect_disease_metrics():
+    slot = model_registry.active
+    if slot is not None:
+        batching = slot.batcher.stats.snapshot()
+        yield ("agritech_inference_batches_total", "counter", "Forward passes run by the active model's micro-batcher.",
+               [({}, batching["batches"])])
+        yield ("agritech_inference_batch_mean_size", "gauge", "Mean micro-batch size.",
+               [({}, batching["mean_batch_size"])])
+    if model_registry.candidate is not None:
+        shadow = model_registry.shadow_stats.snapshot()
+        labels = {"candidate": model_registry.candidate.version}
+        yield ("agritech_shadow_compared_total", "counter", "Images scored by the shadow candidate.",
+               [(labels, shadow["compared"])])
+        yield ("agritech_shadow_agreement_ratio", "gauge", "Top-1 agreement of the shadow candidate with the active model.",
+               [(labels, shadow["agreement"] or 0.0)])
+    for name, cache in (("prediction_cache", prediction_cache), ("near_duplicate_index", near_duplicate_index)):
+        if cache is None:
+            continue
+        stats = cache.stats()
+        yield (f"agritech_{name}_hits_total", "counter", f"{name} hits.",
+               [({}, stats["hits"] + stats.get("disk_hits", 0))])
+        yield (f"agritech_{name}_misses_total", "counter", f"{name} misses.", [({}, stats["misses"])])
+        yield (f"agritech_{name}_hit_ratio", "gauge", f"{name} hit ratio since start.", [({}, stats["hit_ratio"])])
+        yield (f"agritech_{name}_entries", "gauge", f"{name} entries held in memory.", [({}, stats["entries"])])
+
+REGISTRY.register_callback(collect_disease_metrics)
+
+# Per-request detail is logged for 1 in PREDICT_LOG_SAMPLE_EVERY requests and
+# for every request slower than PREDICT_LOG_SLOW_MS (all of them at DEBUG).
+predict_diagnostics = DiagnosticsSampler(
+    logger,
+    sample_every=int(os.getenv("PREDICT_LOG_SAMPLE_EVERY", "100")),
+    slow_ms=float(os.getenv("PREDICT_LOG_SLOW_MS", "1000")),
+)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 2.4 Model registry
+#    New model versions are loaded, validated and warmed up in the background,
+#    then swapped in atomically (or attached as a shadow candidate).
+# ──────────────────────────────────────────────────────────────────────────────
+MODEL_SHADOW_FRACTION  = float(os.getenv("MODEL_SHADOW_FRACTION", "0.1"))
+MODEL_DRAIN_TIMEOUT_S  = float(os.getenv("MODEL_DRAIN_TIMEOUT_S", "30"))
+MODEL_RELOAD_ON_CHANGE = os.getenv("MODEL_RELOAD_ON_CHANGE", "1") == "1"
+MODEL_ADMIN_TOKEN      = os.getenv("MODEL_ADMIN_TOKEN")
+# Directories /models/load may read model and class files from (os.pathsep-separated)
+MODEL_LOAD_DIRS        = [os.path.realpath(d) for d in
+                          (os.getenv("MODEL_LOAD_DIRS") or os.pathsep.join((APP_DIR, MODELS_DIR))).split(os.pathsep) if d]
+
+_app = None
+
+def build_slot(spec: dict) -> ModelSlot:
+    """Blocking (runs in a worker thread): load, validate and warm up one model version."""
+    path = spec["model_path"]
+    kind = spec.get("backend") or backend_for_path(path)
+    class_path = spec.get("class_path") or CLASS_PATH
+    names = read_class_names(class_path)
+    backend = load_backend(kind, path, num_threads=INFERENCE_THREADS)
+    validate_model(backend, names)
+    warm_up_model(backend)
+    table = compile_response_table(names, RECOMMENDATION_DB, source_signature(response_sources(class_path)))
+    return make_slot(dict(spec, backend=kind, class_path=class_path), compute_model_version(kind, path), backend, table)
+
+def on_model_activated(slot: ModelSlot, old: ModelSlot):
+    if _app is not None:
+        _app.state.model = slot.backend
+    MODEL_INFO.labels(slot.spec["backend"], slot.version).set(1)
+    if old is not None and old.version != slot.version:
+        MODEL_INFO.labels(old.spec["backend"], old.version).set(0)
+    print(f"Active disease model: {slot.version} ({slot.spec['model_path']})")
+
+model_registry = ModelRegistry(
+    build_slot,
+    shadow_fraction=MODEL_SHADOW_FRACTION,
+    drain_timeout_s=MODEL_DRAIN_TIMEOUT_S,
+    on_activate=on_model_activated,
+)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 3. Disease info lookup
+# ──────────────────────────────────────────────────────────────────────────────
+def get_disease_info(class_label: str, severity: str = "Medium", recommendations: dict = None) -> dict:
+    """Return disease details from RECOMMENDATION_DB or hardcoded DISEASE_DB fallback."""
+    if recommendations is None:
+        recommendations = RECOMMENDATION_DB
+
+    # 1. Try CSV-based database first
+    if class_label in recommendations:
+        if severity in recommendations[class_label]:
+            return recommendations[class_label][severity]
+        # Fallback to Medium if specific severity missing
+        if "Medium" in recommendations[class_label]:
+            return recommendations[class_label]["Medium"]
+
+    # 2. Try hardcoded DISEASE_DB as fallback
+    if class_label in DISEASE_DB:
+        return DISEASE_DB[class_label]
+
+    # 3. Soft matching for the hardcoded DB
+    normalised = class_label.replace("___", " ").replace("_", " ")
+    for key, val in DISEASE_DB.items():
+        if key.replace("___", " ").replace("_", " ").lower() == normalised.lower():
+            return val
+
+    # 4. Smart fallback: Extract from class label if possible
+    if '___' in class_label:
+        parts = class_label.split('___')
+        crop_name = parts[0].replace('_', ' ')
+        issue_name = parts[1].replace('_', ' ')
+    elif '_' in class_label:
+        parts = class_label.split('_')
+        crop_name = parts[0]
+        issue_name = " ".join(parts[1:])
+    else:
+        crop_name = "Crop"
+        issue_name = class_label
+
+    return {
+        "cause":      f"Automated analysis indicates {issue_name} potentially affecting your crop.",
+        "treatment":  f"Strategic {('fertilizer' if 'Deficiency' in issue_name else 'fungicide')} application is recommended after verification of {issue_name}.",
+        "prevention": "Sanitize tools between fields and improve crop spacing to reduce future stress.",
+        "fertilizer": f"Maintain balanced soil nutrition with targeted micro-nutrients."
+    }
+
+    # 5. Ultimate fallback
+    return {
+        "cause":      "Leaf pattern analysis detected an anomaly. Consult a local agricultural expert.",
+        "treatment":  "Consult with a local agricultural expert for correct diagnosis and treatment.",
+        "prevention": "Practice good crop rotation and field sanitation.",
+        "fertilizer": "Maintain balanced soil nutrition based on a recent soil test."
+    }
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 3.1 Precompiled response table
+#    Every (class, severity, language) payload is resolved and JSON-encoded once,
+#    so the post-inference path is a dict lookup. A watcher rebuilds the active
+#    slot's table when its class list, the recommendation CSV or translations.py
+#    change, and reloads the model through the registry when its file changes.
+# ──────────────────────────────────────────────────────────────────────────────
+RESPONSE_TABLE_RELOAD_S = float(os.getenv("RESPONSE_TABLE_RELOAD_S", "5"))   # 0 disables the watcher
+
+_source_watcher = None
+
+def response_sources(class_path: str = CLASS_PATH) -> tuple:
+    return (class_path, CSV_PATH, translations.__file__)
+
+def compile_response_table(names: list, recommendations: dict, signature: tuple) -> ResponseTable:
+    return ResponseTable(
+        names,
+        lambda label, severity: get_disease_info(label, severity, recommendations),
+        translations.DISEASE_TRANSLATIONS,
+        version=ResponseTable.version_for(signature),
+    )
+
+def reload_response_sources(slot: ModelSlot, signature: tuple) -> tuple:
+    """Re-read every source into locals; nothing shared is touched until the swap."""
+    names = read_class_names(slot.spec["class_path"])
+    validate_model(slot.backend, names)
+    try:
+        recommendations = read_recommendations()
+    except SubsystemUnavailable:
+        recommendations = {}
+    importlib.reload(translations)
+    return recommendations, compile_response_table(names, recommendations, signature)
+
+async def watch_model_sources():
+    global RECOMMENDATION_DB
+    seen = {}
+    while True:
+        await asyncio.sleep(RESPONSE_TABLE_RELOAD_S)
+        slot = model_registry.active
+        if slot is None:
+            continue
+        table_sig = source_signature(response_sources(slot.spec["class_path"]))
+        model_sig = source_signature((slot.spec["model_path"],))
+        if seen.get("slot") is not slot:
+            seen = {"slot": slot, "table": table_sig, "model": model_sig}
+            continue
+
+        if MODEL_RELOAD_ON_CHANGE and model_sig != seen["model"]:
+            seen["model"] = model_sig
+            if model_registry.loading is None:
+                logger.info(f"🔄 Model file changed, reloading {slot.spec['model_path']}")
+                model_registry.start_load(slot.spec)   # the new slot builds a fresh table too
+            continue
+
+        if table_sig != seen["table"]:
+            seen["table"] = table_sig
+            try:
+                recommendations, table = await asyncio.to_thread(reload_response_sources, slot, table_sig)
+            except Exception as e:
+                logger.error(f"❌ Response table rebuild failed, keeping version {slot.table.version}: {e}")
+                continue
+            # One attribute swap: requests hold the slot and read slot.table once
+            RECOMMENDATION_DB, slot.table = recommendations, table
+            logger.info(f"🔄 Response table rebuilt (version {table.version}, {table.stats()['entries']} entries)")
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 3.5 Subsystem lifecycle
+# ──────────────────────────────────────────────────────────────────────────────
+STARTUP = [
+    ("recommendations", load_recommendations, False),
+    ("class_names",     load_class_names,     True),
+    ("disease_model",   load_disease_model,   True),
+]
+
+async def startup(app, report):
+    global _app, _source_watcher
+    _app = app
+    app.state.model = None
+    if ml_model is None or not class_names:
+        return
+
+    spec = {"model_path": INFERENCE_MODEL_PATH, "backend": INFERENCE_BACKEND, "class_path": CLASS_PATH}
+
+    def assemble_initial_slot():
+        validate_model(ml_model, class_names)
+        warm_up_model(ml_model)
+        table = compile_response_table(class_names, RECOMMENDATION_DB, source_signature(response_sources()))
+        version = compute_model_version(explicit=os.getenv("MODEL_VERSION"))
+        return make_slot(spec, version, ml_model, table)
+
+    slot = await report.run("model_warmup", assemble_initial_slot, required=True)
+    if slot is None:
+        return
+    started = time.perf_counter()
+    await slot.start()
+    model_registry.activate(slot)
+    print(f"Inference workers ready in {time.perf_counter() - started:.2f}s")
+    if RESPONSE_TABLE_RELOAD_S > 0:
+        _source_watcher = asyncio.create_task(watch_model_sources())
+
+async def shutdown():
+    if _source_watcher is not None:
+        _source_watcher.cancel()
+    await model_registry.close()
+    if prediction_cache is not None:
+        prediction_cache.close()
+
+def health() -> dict:
+    slot = model_registry.active
+    return {
+        "disease_model":   "Loaded" if slot is not None else "Error",
+        "model_version":   slot.version if slot is not None else None,
+        "inference_backend": slot.spec["backend"] if slot is not None else INFERENCE_BACKEND,
+        "shadow_model":    model_registry.candidate.version if model_registry.candidate is not None else None,
+        "response_table":  slot.table.stats() if slot is not None else "Not built",
+        "inference_executor": slot.executor.info() if slot is not None else None,
+        "inference_batching": slot.batcher.stats.snapshot() if slot is not None else None,
+        "prediction_cache": prediction_cache.stats() if prediction_cache is not None else "Disabled",
+        "near_duplicate_index": near_duplicate_index.stats() if near_duplicate_index is not None else "Disabled"
+    }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 4. Endpoints
+# ──────────────────────────────────────────────────────────────────────────────
+UPLOAD_MAX_MB = int(os.getenv("UPLOAD_MAX_MB", "10"))
+MULTIPART_OVERHEAD = 64 * 1024   # boundaries, part headers, form fields
+
+def acquire_model() -> ModelSlot:
+    """Active model slot for this request; release with model_registry.release()."""
+    slot = model_registry.acquire()
+    if slot is None:
+        raise HTTPException(status_code=503, detail="ML model is not loaded. Check server logs.")
+    return slot
+
+
+def top_prediction(probs: np.ndarray) -> tuple:
+    """(class_index, confidence 0-100) of one probability row."""
+    class_index = int(np.argmax(probs))
+    return class_index, float(probs[class_index]) * 100
+
+
+def build_prediction_result(probs: np.ndarray, table: ResponseTable, language: str = "en") -> dict:
+    """Turn one probability row into the response payload the frontend expects."""
+    class_index, confidence = top_prediction(probs)
+    return table.lookup(class_index, confidence, language).render(confidence)
+
+
+@router.post("/predict")
+@instrument("/predict")
+async def predict_disease(file: UploadFile = File(...), language: str = "en"):
+    """
+    Receive an image, preprocess to 128x128, run model prediction, return structured JSON.
+    Response fields: disease, confidence, severity, cause, treatment, prevention, fertilizer
+    """
+    # 1-2. Pin the active model version (and its class list) for this request
+    slot = acquire_model()
+    table = slot.table
+    started = time.perf_counter()
+
+    try:
+        # 3-4. Read in chunks: format sniffed from magic bytes, size capped (400/413 early)
+        with PREDICT_STAGES["read"].time():
+            image_bytes, image_format = await read_upload(file, UPLOAD_MAX_MB * 1024 * 1024)
+        logger.debug("📸 Received: %s (%d bytes, %s)", file.filename, len(image_bytes), image_format)
+
+        # 4.5 Serve repeated uploads from the result cache
+        with PREDICT_STAGES["cache_lookup"].time():
+            # Hashing a multi-MB upload and the SQLite tier stay off the event loop
+            image_digest = await PredictionCache.image_digest_async(image_bytes)
+            cache_key = cached = None
+            if prediction_cache is not None:
+                # Table version in the key: edited recommendations never serve stale text
+                cache_key = PredictionCache.make_key(image_digest, f"{slot.version}:{table.version}", language)
+                cached = await prediction_cache.get_encoded_async(cache_key)
+        if cached is not None:
+            logger.debug("♻️ Cache hit | Lang: %s", language)
+            return Response(content=cached, media_type="application/json")
+
+        # 5. Preprocess image to the model's input size
+        with PREDICT_STAGES["preprocess"].time():
+            processed_image = await slot.executor.preprocess(image_bytes, slot.target_size)
+
+        # 5.5 Near-duplicate of a recent scan? Reuse its probabilities.
+        near_match = None
+        if near_duplicate_index is not None:
+            with PREDICT_STAGES["near_duplicate"].time():
+                phash = dhash(processed_image)
+                near_match = near_duplicate_index.lookup(phash, accept=lambda v: v["model_version"] == slot.version)
+
+        # 6. Predict (batched with concurrent requests)
+        if near_match is not None:
+            distance, previous = near_match
+            probs = previous["probs"]
+            logger.debug("🪞 Near-duplicate of scan %s (distance %d), skipping inference", previous["reference"], distance)
+        else:
+            infer_started = time.perf_counter()
+            with PREDICT_STAGES["inference"].time():
+                probs = await slot.batcher.submit(processed_image)
+            model_registry.maybe_shadow(slot, processed_image, probs, (time.perf_counter() - infer_started) * 1000)
+            if near_duplicate_index is not None:
+                near_duplicate_index.add(phash, {
+                    "probs": probs,
+                    "reference": image_digest[:16],
+                    "model_version": slot.version
+                })
+        # 8. Class, severity, disease info and localisation: one table lookup
+        with PREDICT_STAGES["response"].time():
+            class_index, confidence = top_prediction(probs)
+            entry = table.lookup(class_index, confidence, language)
+            extra = None
+            if near_match is not None:
+                extra = {"near_duplicate": {"similar_to": near_match[1]["reference"], "distance": near_match[0]}}
+            body = entry.encode(confidence, extra)
+
+        if cache_key is not None:
+            prediction_cache.put_encoded_async(cache_key, body)
+
+        # 7. Sampled diagnostics: top-5 is only computed for requests that get logged
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        reason = predict_diagnostics.reason(elapsed_ms)
+        if reason is not None:
+            logger.info("🔮 [%s] %s | Confidence: %.2f%% | Severity: %s | Lang: %s | %.1f ms | Top 5: %s",
+                        reason, entry.payload["disease"], confidence, entry.payload["severity"], language,
+                        elapsed_ms, TopK(probs, table.class_names))
+
+        # 9. Return — exact fields the frontend expects, pre-encoded
+        return Response(content=body, media_type="application/json")
+
+    except HTTPException:
+        raise
+    except ValueError as ve:
+        logger.error(f"❌ Image error: {ve}")
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"❌ Prediction error: {e}")
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+    finally:
+        model_registry.release(slot)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 5. Batch disease scans (field visits: many photos or one zip)
+# ──────────────────────────────────────────────────────────────────────────────
+SCAN_BATCH_MAX_IMAGES  = int(os.getenv("SCAN_BATCH_MAX_IMAGES", "500"))
+SCAN_BATCH_MAX_MB      = int(os.getenv("SCAN_BATCH_MAX_MB", "512"))
+SCAN_BATCH_MAX_UPLOAD_MB = int(os.getenv("SCAN_BATCH_MAX_UPLOAD_MB", "256"))      # per file (read_upload)
+SCAN_BATCH_MAX_TOTAL_MB  = int(os.getenv("SCAN_BATCH_MAX_TOTAL_MB", "1024"))      # whole request body
+SCAN_BATCH_CHUNK_SIZE  = int(os.getenv("SCAN_BATCH_CHUNK_SIZE", "64"))
+
+
+async def collect_batch_images(files: List[UploadFile]) -> list:
+    """Read uploads into (filename, bytes) pairs, expanding zip archives."""
+    items = []
+    for file in files:
+        data, _ = await read_upload(file, SCAN_BATCH_MAX_UPLOAD_MB * 1024 * 1024, allowed=None)
+        if is_zip_upload(file.filename, file.content_type, data):
+            remaining = SCAN_BATCH_MAX_IMAGES - len(items)
+            items.extend(expand_zip(data, remaining, SCAN_BATCH_MAX_MB * 1024 * 1024))
+        else:
+            items.append((file.filename or f"image_{len(items)}", data))
+        if len(items) > SCAN_BATCH_MAX_IMAGES:
+            raise ValueError(f"Too many images in one batch (max {SCAN_BATCH_MAX_IMAGES}).")
+    return items
+
+
+class SlotStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that releases its model slot once the response is done,
+    however it ends: completed, failed, or the client gone before the first
+    line (the generator's own finally never runs if it was never started).
+    """
+
+    def __init__(self, content, slot, **kwargs):
+        super().__init__(content, **kwargs)
+        self.slot = slot
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            model_registry.release(self.slot)
+
+
+async def scan_chunk(slot: ModelSlot, chunk: list, offset: int, language: str) -> list:
+    """Decode one chunk of images in parallel and score them in a single forward pass."""
+    decoded = await asyncio.gather(
+        *[slot.executor.preprocess(data, slot.target_size) for _, data in chunk],
+        return_exceptions=True
+    )
+
+    results = [None] * len(chunk)
+    ok_positions = []
+    for pos, ((name, data), arr) in enumerate(zip(chunk, decoded)):
+        if isinstance(arr, Exception) or len(data) == 0:
+            error = str(arr) if isinstance(arr, Exception) else "Empty image file received."
+            results[pos] = {"index": offset + pos, "filename": name, "status": "error", "error": error}
+        else:
+            ok_positions.append(pos)
+
+    if ok_positions:
+        stacked = np.concatenate([decoded[pos] for pos in ok_positions])
+        predictions = await slot.executor.run_batch(slot.backend.predict, stacked)
+        for pos, probs in zip(ok_positions, predictions):
+            results[pos] = {
+                "index": offset + pos,
+                "filename": chunk[pos][0],
+                "status": "ok",
+                **build_prediction_result(probs, slot.table, language)
+            }
+    return results
+
+
+@router.post("/predict/batch")
+@instrument("/predict/batch")
+async def predict_disease_batch(files: List[UploadFile] = File(...), language: str = "en", stream: bool = False):
+    """
+    Score many leaf photos (or a single zip of photos) from one field visit.
+    Returns per-image results plus a field-level summary. With stream=true the
+    response is NDJSON: one line per image as each chunk finishes, then the summary.
+    """
+    # One model version for the whole visit, even if a swap happens mid-batch
+    slot = acquire_model()
+    streaming = False
+    try:
+        try:
+            items = await collect_batch_images(files)
+        except (ValueError, zipfile.BadZipFile) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if not items:
+            raise HTTPException(status_code=400, detail="No images found in upload.")
+
+        chunks = [items[i:i + SCAN_BATCH_CHUNK_SIZE] for i in range(0, len(items), SCAN_BATCH_CHUNK_SIZE)]
+        logger.info(f"📦 Batch scan: {len(items)} images in {len(chunks)} chunk(s)")
+
+        if stream:
+            async def ndjson_results():
+                all_results = []
+                for n, chunk in enumerate(chunks):
+                    chunk_results = await scan_chunk(slot, chunk, n * SCAN_BATCH_CHUNK_SIZE, language)
+                    all_results.extend(chunk_results)
+                    for r in chunk_results:
+                        yield json.dumps(r, ensure_ascii=False) + "\n"
+                yield json.dumps({"summary": summarize_field(all_results)}, ensure_ascii=False) + "\n"
+
+            response = SlotStreamingResponse(ndjson_results(), slot, media_type="application/x-ndjson")
+            streaming = True
+            return response
+
+        try:
+            results = []
+            for n, chunk in enumerate(chunks):
+                results.extend(await scan_chunk(slot, chunk, n * SCAN_BATCH_CHUNK_SIZE, language))
+        except Exception as e:
+            logger.error(f"❌ Batch prediction error: {e}")
+            raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+        return {"results": results, "summary": summarize_field(results)}
+    finally:
+        # A streamed response releases the slot itself once it has been sent
+        if not streaming:
+            model_registry.release(slot)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 6. Tiled field-image classification (drone / wide-angle photos)
+#    A model-sized window slides over a higher-resolution copy of the photo;
+#    all tiles are scored in one forward pass.
+# ──────────────────────────────────────────────────────────────────────────────
+TILE_STRIDE         = int(os.getenv("TILE_STRIDE", "64"))
+TILE_MAX_SIDE       = int(os.getenv("TILE_MAX_SIDE", "1024"))
+TILE_MAX_TILES      = int(os.getenv("TILE_MAX_TILES", "1024"))
+TILE_MIN_CONFIDENCE = float(os.getenv("TILE_MIN_CONFIDENCE", "50"))     # percent; below = uncertain
+TILE_UPLOAD_MAX_MB  = int(os.getenv("TILE_UPLOAD_MAX_MB", "32"))
+
+
+@router.post("/predict/tiled")
+@instrument("/predict/tiled")
+async def predict_disease_tiled(file: UploadFile = File(...), language: str = "en",
+                                stride: int = None, max_side: int = None):
+    """
+    Classify every tile of a field photo.
+    Returns a rows x cols class/confidence map and per-class coverage
+    (class_index -1 marks tiles below TILE_MIN_CONFIDENCE).
+    """
+    slot = acquire_model()
+    try:
+        tile = slot.target_size[0]
+        stride = stride or TILE_STRIDE
+        max_side = min(max_side or TILE_MAX_SIDE, TILE_MAX_SIDE)
+        if not 1 <= stride <= tile:
+            raise HTTPException(status_code=400, detail=f"stride must be between 1 and {tile}.")
+
+        image_bytes, _ = await read_upload(file, TILE_UPLOAD_MAX_MB * 1024 * 1024)
+
+        try:
+            batch, grid, image_size = await slot.executor.run(
+                prepare_tiles, image_bytes, tile, stride, max_side, PREPROCESS_MAX_PIXELS, TILE_MAX_TILES
+            )
+        except ValueError as ve:
+            logger.error(f"❌ Tiling error: {ve}")
+            raise HTTPException(status_code=400, detail=str(ve))
+
+        try:
+            probs = await slot.executor.run_batch(slot.backend.predict, batch)
+            summary = summarize_tiles(probs, grid, TILE_MIN_CONFIDENCE / 100)
+        except Exception as e:
+            logger.error(f"❌ Tiled prediction error: {e}")
+            raise HTTPException(status_code=500, detail=f"Tiled prediction failed: {str(e)}")
+    finally:
+        model_registry.release(slot)
+
+    table = slot.table
+    for item in summary["coverage"]:
+        if item["class_index"] < 0:
+            item["disease"], item["raw_class"] = "Uncertain", None
+        else:
+            payload = table.lookup(item["class_index"], item["mean_confidence"], language).payload
+            item["disease"], item["raw_class"] = payload["disease"], payload["raw_class"]
+
+    logger.info(f"🧩 Tiled scan: {grid[0]}x{grid[1]} tiles over {image_size[0]}x{image_size[1]}, "
+                f"top: {summary['coverage'][0]['disease']} ({summary['coverage'][0]['coverage'] * 100:.1f}%)")
+
+    return {
+        "image_size": list(image_size),
+        "tile_size":  tile,
+        "stride":     stride,
+        "grid":       list(grid),
+        **summary,
+    }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 7. Model registry endpoints
+#    Load a new version (swap or shadow), inspect shadow agreement, promote,
+#    drop the candidate or roll back. Writes need X-Admin-Token matching
+#    MODEL_ADMIN_TOKEN and are refused when it is unset; loaded files must
+#    live under MODEL_LOAD_DIRS.
+# ──────────────────────────────────────────────────────────────────────────────
+class ModelLoadRequest(BaseModel):
+    model_path: str
+    backend: Optional[str] = None        # inferred from the file extension when omitted
+    class_path: Optional[str] = None     # defaults to CLASS_PATH
+    mode: str = "activate"               # activate | shadow
+    shadow_fraction: Optional[float] = None
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not MODEL_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Model admin endpoints are disabled (MODEL_ADMIN_TOKEN not set).")
+    if not hmac.compare_digest((x_admin_token or "").encode(), MODEL_ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+def confine_path(path: str, field: str) -> str:
+    """Resolve a requested file (relative to backend/) and require it to sit under MODEL_LOAD_DIRS."""
+    resolved = os.path.realpath(os.path.join(BASE_DIR, path))
+    if not any(os.path.commonpath((resolved, d)) == d for d in MODEL_LOAD_DIRS):
+        raise HTTPException(status_code=400, detail=f"{field} must be inside one of the model directories.")
+    if not os.path.isfile(resolved):
+        raise HTTPException(status_code=400, detail=f"{field} not found: {path}")
+    return resolved
+
+
+@router.get("/models")
+async def list_models():
+    """Active model, shadow candidate (with agreement/latency) and recent registry events."""
+    return model_registry.snapshot()
+
+
+@router.post("/models/load", status_code=202, dependencies=[Depends(require_admin)])
+async def load_model(request: ModelLoadRequest):
+    """Start loading a model version in the background; poll GET /models for the outcome."""
+    if request.mode not in REGISTRY_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {REGISTRY_MODES}.")
+    model_path = confine_path(request.model_path, "model_path")
+    class_path = confine_path(request.class_path, "class_path") if request.class_path else None
+    spec = {"model_path": model_path, "backend": request.backend, "class_path": class_path}
+    try:
+        model_registry.start_load(spec, request.mode)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if request.shadow_fraction is not None:
+        model_registry.shadow_fraction = min(1.0, max(0.0, request.shadow_fraction))
+    logger.info(f"📥 Model load requested: {model_path} ({request.mode})")
+    return {"status": "loading", "mode": request.mode, "model_path": model_path}
+
+
+@router.post("/models/promote", dependencies=[Depends(require_admin)])
+async def promote_model():
+    """Make the shadow candidate the active model."""
+    try:
+        slot = model_registry.promote()
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "promoted", "active": slot.info()}
+
+
+@router.delete("/models/candidate", dependencies=[Depends(require_admin)])
+async def drop_candidate_model():
+    slot = model_registry.drop_candidate()
+    if slot is None:
+        raise HTTPException(status_code=404, detail="No candidate model loaded.")
+    return {"status": "dropped", "version": slot.version}
+
+
+@router.post("/models/rollback", status_code=202, dependencies=[Depends(require_admin)])
+async def rollback_model():
+    """Reload the previously active model version and swap it back in."""
+    if model_registry.previous_spec is None:
+        raise HTTPException(status_code=409, detail="No previous model version to roll back to.")
+    spec = model_registry.previous_spec
+    try:
+        model_registry.start_load(spec, "activate")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "loading", "mode": "activate", "model_path": spec["model_path"]}
+
+
+# Request body caps enforced by main.py's BodySizeLimitMiddleware
+BODY_LIMITS = {
+    "/predict":       UPLOAD_MAX_MB * 1024 * 1024 + MULTIPART_OVERHEAD,
+    "/predict/batch": SCAN_BATCH_MAX_TOTAL_MB * 1024 * 1024 + MULTIPART_OVERHEAD + SCAN_BATCH_MAX_IMAGES * 512,
+    "/predict/tiled": TILE_UPLOAD_MAX_MB * 1024 * 1024 + MULTIPART_OVERHEAD,
+}
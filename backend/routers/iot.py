@@ -0,0 +1,582 @@
+import os
+import json
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import List, Dict
+
+import db
+from config import BASE_DIR
+from utils.bulk_ingest import check_reading, iter_json_rows, validate_readings
+from utils.metrics import REGISTRY, instrument
+from utils.quantized_memo import parse_resolutions
+from utils.sensor_index import GENERAL_CROP, LatestReadingIndex
+from utils.sensor_rollups import RollupStore, series_bytes
+from utils.startup import SubsystemUnavailable
+from utils.write_behind import WriteBehindBuffer
+
+logger = logging.getLogger("agritech-ml-api")
+
+router = APIRouter(tags=["iot"])
+
+USES_SUPABASE = True
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 0. Write-behind buffer for sensor readings
+#    /iot/update acknowledges at once; readings reach iot_sensors in bulk
+#    inserts of IOT_FLUSH_BATCH rows, or IOT_FLUSH_INTERVAL_S after arrival.
+# ──────────────────────────────────────────────────────────────────────────────
+IOT_WRITE_BEHIND     = os.getenv("IOT_WRITE_BEHIND", "1") == "1"
+IOT_BUFFER_MAX_ROWS  = int(os.getenv("IOT_BUFFER_MAX_ROWS", "50000"))
+IOT_FLUSH_BATCH      = int(os.getenv("IOT_FLUSH_BATCH", "500"))
+IOT_FLUSH_INTERVAL_S = float(os.getenv("IOT_FLUSH_INTERVAL_S", "2"))
+IOT_FLUSH_MAX_RETRIES = int(os.getenv("IOT_FLUSH_MAX_RETRIES", "10"))
+IOT_DEAD_LETTER_PATH = os.getenv("IOT_DEAD_LETTER_PATH") or os.path.join(BASE_DIR, "iot_dead_letter.jsonl")
+IOT_RETRY_AFTER_S    = 5
+
+def insert_sensor_rows(rows: list):
+    """Blocking bulk insert (runs in a worker thread)."""
+    if not db.supabase:
+        raise RuntimeError("Supabase not configured")
+    db.execute(db.supabase.table("iot_sensors").insert(rows), "iot_sensors.bulk_insert")
+
+def is_permanent_insert_error(e: Exception) -> bool:
+    """Errors retrying cannot fix: Postgres data (22xxx) / integrity (23xxx) and PostgREST request errors."""
+    code = str(getattr(e, "code", "") or "")
+    return code[:2] in ("22", "23") or code.startswith(("PGRST1", "PGRST2"))
+
+def write_dead_letters(dead: list):
+    """Blocking: append rows iot_sensors would not take to IOT_DEAD_LETTER_PATH (JSON lines)."""
+    failed_at = datetime.now(timezone.utc).isoformat()
+    with open(IOT_DEAD_LETTER_PATH, "a", encoding="utf-8") as f:
+        for row, error in dead:
+            f.write(json.dumps({"row": row, "error": error, "failed_at": failed_at}) + "\n")
+
+sensor_buffer = WriteBehindBuffer(
+    insert_sensor_rows,
+    max_rows=IOT_BUFFER_MAX_ROWS,
+    batch_size=IOT_FLUSH_BATCH,
+    flush_interval_s=IOT_FLUSH_INTERVAL_S,
+    is_permanent=is_permanent_insert_error,
+    dead_letter=write_dead_letters,
+    max_retries=IOT_FLUSH_MAX_RETRIES,
+) if IOT_WRITE_BEHIND else None
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 0.1 Latest-reading index
+#    Newest value per (user, crop, canonical sensor) kept in memory: updated
+#    on ingest, hydrated from iot_sensors in the background after startup and
+#    topped up every IOT_INDEX_REFRESH_S with rows other workers inserted,
+#    followed by the iot_sensors.seq insert order (reading timestamps can be
+#    old, e.g. bulk uploads, or reach the table late, e.g. flush retries).
+#    Until hydration has read the whole table, each user's crops are also
+#    read from iot_sensors once, on that user's first smart-advice request.
+# ──────────────────────────────────────────────────────────────────────────────
+IOT_INDEX_HYDRATE_MAX_ROWS = int(os.getenv("IOT_INDEX_HYDRATE_MAX_ROWS", "200000"))
+IOT_INDEX_REFRESH_S        = float(os.getenv("IOT_INDEX_REFRESH_S", "60"))     # 0 disables
+IOT_INDEX_CROP_BACKFILL    = 500      # rows read per crop for a user hydration did not fully cover
+IOT_INDEX_PAGE_ROWS        = 1000
+# seq values re-read by every refresh: a lower seq can commit after a higher one was read
+IOT_INDEX_REFRESH_OVERLAP_ROWS = 5000
+SENSOR_ROW_COLUMNS = "id,seq,user_id,crop_id,sensor_type,value,timestamp"
+
+latest_readings = LatestReadingIndex()
+_hydration_cursor = None      # (timestamp, id) of the oldest row hydration read
+_refresh_seq = 0              # highest iot_sensors.seq the refresh has read
+_verified_users = set()
+_index_hydrator = None
+_index_refresher = None
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 0.2 Sensor rollups
+#    Ring buffers of min/max/mean per (user, crop, sensor) at raw, 5-minute,
+#    hourly and daily resolution, fed by this process's ingest and by every
+#    row the index reads from iot_sensors (hydration, refresh, per-user
+#    reads), so each worker also sees the others' readings. Readings carry
+#    their iot_sensors id from ingest on, and the store counts an id once.
+#    Memory per series is fixed by IOT_ROLLUP_CAPACITY (see series_bytes)
+#    and capped by IOT_ROLLUP_MAX_SERIES.
+# ──────────────────────────────────────────────────────────────────────────────
+IOT_ROLLUP_ENABLED    = os.getenv("IOT_ROLLUP_ENABLED", "1") == "1"
+IOT_ROLLUP_SENSORS    = os.getenv("IOT_ROLLUP_SENSORS", "moisture,ph,npk,temperature,air_temperature,humidity")
+IOT_ROLLUP_CAPACITY   = parse_resolutions(os.getenv("IOT_ROLLUP_CAPACITY", "raw=720,5m=2016,1h=1440,1d=730"))
+IOT_ROLLUP_MAX_SERIES = int(os.getenv("IOT_ROLLUP_MAX_SERIES", "1000"))
+
+sensor_rollups = RollupStore(
+    [s for s in IOT_ROLLUP_SENSORS.split(",") if s.strip()],
+    capacity=IOT_ROLLUP_CAPACITY,
+    max_series=IOT_ROLLUP_MAX_SERIES,
+) if IOT_ROLLUP_ENABLED else None
+if sensor_rollups is not None:
+    logger.info(f"Sensor rollups: {series_bytes(sensor_rollups.capacity) / 1024:.0f} KiB per series, "
+                f"at most {sensor_rollups.stats()['max_bytes'] / 2**20:.0f} MiB")
+
+def remember_reading(row: dict):
+    """An accepted reading (iot_sensors row with its id): latest-reading index and rollups."""
+    latest_readings.update(row["user_id"], row["crop_id"], row["sensor_type"], row["value"], row["timestamp"])
+    if sensor_rollups is not None:
+        sensor_rollups.add(row["user_id"], row["crop_id"], row["sensor_type"], row["value"], row["timestamp"],
+                           row["id"])
+
+def remember_history(rows: list):
+    """Rows read from iot_sensors; ones this process already counted are skipped by id."""
+    latest_readings.update_many(rows)
+    if sensor_rollups is not None:
+        sensor_rollups.add_many(rows)
+
+def fetch_sensor_rows(max_rows: int, user_id: str = None, crop_id: str = None, before: tuple = None) -> tuple:
+    """
+    Blocking: newest-first iot_sensors rows, keyset-paged on (timestamp, id) so
+    concurrent inserts cannot shift pages. crop_id=GENERAL_CROP selects rows
+    without a crop; before=(timestamp, id) continues below an earlier cursor.
+    Returns (rows, complete, cursor of the last row read).
+    """
+    if not db.supabase:
+        raise SubsystemUnavailable("Supabase not configured")
+    rows, cursor = [], before
+    while len(rows) < max_rows:
+        query = db.supabase.table("iot_sensors").select(SENSOR_ROW_COLUMNS)
+        if user_id is not None:
+            query = query.eq("user_id", user_id)
+        if crop_id == GENERAL_CROP:
+            query = query.is_("crop_id", "null")
+        elif crop_id is not None:
+            query = query.eq("crop_id", crop_id)
+        if cursor is not None:
+            ts, row_id = cursor
+            query = query.or_(f'timestamp.lt."{ts}",and(timestamp.eq."{ts}",id.lt.{row_id})')
+        size = min(IOT_INDEX_PAGE_ROWS, max_rows - len(rows))
+        page = db.execute(query.order("timestamp", desc=True).order("id", desc=True).limit(size),
+                          "iot_sensors.select").data or []
+        rows.extend(page)
+        if page:
+            cursor = (page[-1]["timestamp"], page[-1]["id"])
+        if len(page) < size:
+            return rows, True, cursor
+    return rows, False, cursor
+
+def fetch_user_history(user_id: str, before: tuple = None) -> list:
+    """Blocking: the newest IOT_INDEX_CROP_BACKFILL rows of each of a user's crops (and crop-less rows)."""
+    crops = db.execute(db.supabase.table("crops").select("id").eq("user_id", user_id), "crops.select").data or []
+    rows = []
+    for crop_id in [c["id"] for c in crops] + [GENERAL_CROP]:
+        rows.extend(fetch_sensor_rows(IOT_INDEX_CROP_BACKFILL, user_id=user_id, crop_id=crop_id, before=before)[0])
+    return rows
+
+def latest_sensor_seq() -> int:
+    """Blocking: the highest iot_sensors.seq (0 for an empty table)."""
+    if not db.supabase:
+        raise SubsystemUnavailable("Supabase not configured")
+    page = db.execute(db.supabase.table("iot_sensors").select("seq").order("seq", desc=True).limit(1),
+                      "iot_sensors.select").data or []
+    return page[0]["seq"] if page else 0
+
+def fetch_inserted_rows(after: int, max_rows: int) -> tuple:
+    """
+    Blocking: iot_sensors rows with seq > after, in insert order, whatever
+    their reading timestamp. Returns (rows, complete, highest seq read).
+    """
+    rows = []
+    while len(rows) < max_rows:
+        size = min(IOT_INDEX_PAGE_ROWS, max_rows - len(rows))
+        query = db.supabase.table("iot_sensors").select(SENSOR_ROW_COLUMNS).gt("seq", after)
+        page = db.execute(query.order("seq").limit(size), "iot_sensors.select").data or []
+        rows.extend(page)
+        if page:
+            after = page[-1]["seq"]
+        if len(page) < size:
+            return rows, True, after
+    return rows, False, after
+
+def hydrate_rows() -> tuple:
+    """Blocking: (seq to refresh from, newest rows, complete, cursor)."""
+    # Read first, so rows inserted while hydration pages are still picked up by the refresh
+    start = latest_sensor_seq()
+    return (start, *fetch_sensor_rows(IOT_INDEX_HYDRATE_MAX_ROWS))
+
+async def refresh_latest_readings():
+    """Rows any worker inserted since the last pass (by seq): index and rollups."""
+    global _refresh_seq
+    while True:
+        await asyncio.sleep(IOT_INDEX_REFRESH_S)
+        after, complete = max(0, _refresh_seq - IOT_INDEX_REFRESH_OVERLAP_ROWS), False
+        # Page until caught up; each page is applied as it arrives
+        while not complete:
+            try:
+                rows, complete, after = await asyncio.to_thread(fetch_inserted_rows, after, IOT_INDEX_HYDRATE_MAX_ROWS)
+            except Exception as e:
+                logger.error(f"Latest-reading refresh failed: {e}")
+                break
+            remember_history(rows)
+            _refresh_seq = max(_refresh_seq, after)
+        if sensor_rollups is not None:
+            # Rows at or below the next pass's overlap are never re-read, so their ids can go
+            sensor_rollups.forget_through(_refresh_seq - IOT_INDEX_REFRESH_OVERLAP_ROWS)
+
+async def hydrate_latest_readings(report):
+    """Background: fill the index from iot_sensors; progress shows under /ready components."""
+    global _index_refresher, _hydration_cursor, _refresh_seq
+    hydrated = await report.run("iot_latest_index", hydrate_rows)
+    if hydrated is None:
+        return
+    _refresh_seq, rows, complete, _hydration_cursor = hydrated
+    remember_history(rows)
+    latest_readings.hydrated = complete
+    print(f"Latest-reading index: {latest_readings.stats()['readings']} keys from {len(rows)} rows"
+          f"{'' if complete else ' (partial, older crops read per user on demand)'}")
+    if IOT_INDEX_REFRESH_S > 0:
+        _index_refresher = asyncio.create_task(refresh_latest_readings())
+
+async def startup(app, report):
+    global _index_hydrator
+    if sensor_buffer is not None:
+        sensor_buffer.start()
+    # Not awaited: the API serves (smart-advice falls back to per-user reads) while it runs
+    report.register("iot_latest_index")
+    _index_hydrator = asyncio.create_task(hydrate_latest_readings(report))
+
+async def shutdown():
+    for task in (_index_hydrator, _index_refresher):
+        if task is not None:
+            task.cancel()
+    if sensor_buffer is not None:
+        await sensor_buffer.close()
+
+def health() -> dict:
+    return {
+        "iot_write_buffer": sensor_buffer.stats() if sensor_buffer is not None else "Disabled",
+        "iot_latest_index": dict(latest_readings.stats(), refresh_seq=_refresh_seq),
+        "iot_rollups": sensor_rollups.stats() if sensor_rollups is not None else "Disabled",
+    }
+
+def collect_iot_metrics():
+    index = latest_readings.stats()
+    yield ("agritech_iot_latest_readings", "gauge", "Keys in the in-memory latest-reading index.",
+           [({}, index["readings"])])
+    if sensor_rollups is not None:
+        rollups = sensor_rollups.stats()
+        yield ("agritech_iot_rollup_series", "gauge", "Sensor series held in the rollup store.", [({}, rollups["series"])])
+        yield ("agritech_iot_rollup_bytes", "gauge", "Array memory preallocated for sensor rollups.",
+               [({}, rollups["bytes"])])
+    if sensor_buffer is None:
+        return
+    stats = sensor_buffer.stats()
+    yield ("agritech_iot_buffer_rows", "gauge", "Sensor readings waiting to be written.", [({}, stats["buffered"])])
+    yield ("agritech_iot_readings_accepted_total", "counter", "Sensor readings accepted into the buffer.",
+           [({}, stats["accepted"])])
+    yield ("agritech_iot_readings_rejected_total", "counter", "Sensor readings refused because the buffer was full.",
+           [({}, stats["rejected"])])
+    yield ("agritech_iot_readings_dropped_total", "counter", "Buffered readings dropped after a failed flush.",
+           [({}, stats["dropped"])])
+    yield ("agritech_iot_readings_dead_lettered_total", "counter",
+           "Readings iot_sensors would not take, written to the dead-letter file.", [({}, stats["dead_lettered"])])
+    yield ("agritech_iot_flushes_total", "counter", "Bulk inserts into iot_sensors.", [({}, stats["flushes"])])
+
+REGISTRY.register_callback(collect_iot_metrics)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 1. IoT Sensor Endpoints
+# ──────────────────────────────────────────────────────────────────────────────
+
+class SensorReadingRequest(BaseModel):
+    sensor_type: str
+    value: float
+    user_id: str
+    crop_id: str = None
+    unit: str = None
+
+@router.post("/iot/update")
+async def update_sensor_reading(request: SensorReadingRequest):
+    """Update a sensor's current value and log it in history."""
+    if not db.supabase:
+        raise HTTPException(status_code=500, detail="Supabase not configured")
+
+    # Rejected here rather than acknowledged and then refused by iot_sensors at flush time
+    unit, error = check_reading(request.user_id, request.crop_id, request.sensor_type, request.unit)
+    if error:
+        raise HTTPException(status_code=422, detail=error)
+
+    # Use the table structure from lib/supabase.ts. The timestamp is taken on
+    # arrival, not at flush time, so buffering does not shift readings.
+    data = {
+        "id": str(uuid.uuid4()),     # known before the insert, so rollups count the row once
+        "user_id": request.user_id,
+        "crop_id": request.crop_id,
+        "sensor_type": request.sensor_type,
+        "value": request.value,
+        "unit": unit,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+    if sensor_buffer is not None:
+        if not sensor_buffer.offer(data):
+            raise HTTPException(
+                status_code=503,
+                detail="Sensor ingest is backlogged, retry later.",
+                headers={"Retry-After": str(IOT_RETRY_AFTER_S)},
+            )
+        remember_reading(data)
+        return {"status": "success", "buffered": True}
+
+    try:
+        res = db.execute(db.supabase.table("iot_sensors").insert(data), "iot_sensors.insert")
+        remember_reading(data)
+
+        return {"status": "success", "data": res.data}
+    except Exception as e:
+        logger.error(f"IoT Update Error: {e}")
+        return {"status": "error", "message": str(e)}
+
+# Gateways send many readings per request: a JSON array or NDJSON stream
+IOT_BULK_MAX_MB       = int(os.getenv("IOT_BULK_MAX_MB", "16"))
+IOT_BULK_MAX_ROWS     = int(os.getenv("IOT_BULK_MAX_ROWS", "100000"))
+IOT_BULK_CHUNK_ROWS   = 1000      # rows validated and stored together
+IOT_BULK_MAX_REJECTS_LISTED = 1000
+
+@router.post("/iot/bulk")
+@instrument("/iot/bulk")
+async def bulk_sensor_readings(request: Request):
+    """
+    Ingest many sensor readings in one request. The body is a JSON array or
+    NDJSON (one reading per line) of /iot/update objects, optionally with an
+    ISO 8601 "timestamp". Parsed as it streams in; bad rows are reported by
+    index and the rest are stored. A chunked body that outgrows the size cap
+    gets 413 with resume_from: rows before that index were handled.
+    """
+    if not db.supabase:
+        raise HTTPException(status_code=500, detail="Supabase not configured")
+
+    received_at = datetime.now(timezone.utc).isoformat()
+    accepted, rejected, rows_seen = 0, 0, 0
+    rejects = []
+    backlogged = False
+
+    def reject(index, error):
+        nonlocal rejected
+        rejected += 1
+        if len(rejects) < IOT_BULK_MAX_REJECTS_LISTED:
+            rejects.append({"index": index, "error": error})
+
+    async def store(chunk, offset):
+        nonlocal accepted, backlogged
+        valid, invalid = validate_readings(chunk, received_at)
+        for pos, error in invalid:
+            reject(offset + pos, error)
+        if not valid:
+            return
+        rows = [dict(row, id=str(uuid.uuid4())) for _, row in valid]
+        if sensor_buffer is not None:
+            taken = sensor_buffer.offer_many(rows)
+            for pos, _ in valid[taken:]:
+                reject(offset + pos, "Ingest buffer full, retry later.")
+            backlogged = backlogged or taken < len(rows)
+            rows = rows[:taken]
+        else:
+            for i in range(0, len(rows), IOT_FLUSH_BATCH):
+                await asyncio.to_thread(insert_sensor_rows, rows[i:i + IOT_FLUSH_BATCH])
+        for r in rows:
+            remember_reading(r)
+        accepted += len(rows)
+
+    chunk, kept = [], 0
+    try:
+        async for row in iter_json_rows(request.stream()):
+            if kept >= IOT_BULK_MAX_ROWS:
+                reject(rows_seen, f"Row limit of {IOT_BULK_MAX_ROWS} per request exceeded.")
+            else:
+                chunk.append(row)
+                kept += 1
+                if len(chunk) >= IOT_BULK_CHUNK_ROWS:
+                    await store(chunk, kept - len(chunk))
+                    chunk = []
+            rows_seen += 1
+        await store(chunk, kept - len(chunk))
+    except HTTPException as e:
+        if e.status_code != 413:
+            raise
+        # Chunked body over the size cap: rows read so far are stored, and the
+        # client resends from resume_from instead of duplicating them
+        await store(chunk, kept - len(chunk))
+        logger.error(f"IoT Bulk body over limit after {rows_seen} row(s)")
+        return JSONResponse(status_code=413, content={
+            "status": "error", "message": e.detail, "resume_from": rows_seen,
+            "accepted": accepted, "rejected": rejected, "rejects": rejects,
+        })
+    except ValueError as e:
+        # Malformed array: rows before the error are kept, the rest is unreadable
+        await store(chunk, kept - len(chunk))
+        logger.error(f"IoT Bulk parse error after {rows_seen} row(s): {e}")
+        return JSONResponse(status_code=400, content={
+            "status": "error", "message": str(e),
+            "accepted": accepted, "rejected": rejected, "rejects": rejects,
+        })
+    except Exception as e:
+        logger.error(f"IoT Bulk Error: {e}")
+        raise HTTPException(status_code=500, detail=f"Bulk ingest failed after {accepted} row(s): {str(e)}")
+
+    if rows_seen and accepted:
+        logger.info(f"📡 IoT bulk: {accepted} accepted, {rejected} rejected")
+    return JSONResponse(
+        status_code=200,
+        content={
+            "status": "success" if not rejected else "partial",
+            "received": rows_seen,
+            "accepted": accepted,
+            "rejected": rejected,
+            "rejects": rejects,
+        },
+        headers={"Retry-After": str(IOT_RETRY_AFTER_S)} if backlogged else None,
+    )
+
+@router.get("/iot/smart-advice/{user_id}")
+async def get_smart_advice(user_id: str):
+    """Analyze all sensor categories and return structured advice per crop."""
+    if not db.supabase:
+        return {"error": "Supabase not configured"}
+
+    try:
+        # 1. Until hydration has covered the whole table, every crop of a user is
+        #    read once from history older than what hydration read (all of it while
+        #    hydration is still running); newer index entries are never replaced
+        if not latest_readings.hydrated and user_id not in _verified_users:
+            rows = await asyncio.to_thread(fetch_user_history, user_id, _hydration_cursor)
+            remember_history(rows)
+            _verified_users.add(user_id)
+
+        # 2. Latest value per crop and canonical sensor key, from memory
+        crop_data = latest_readings.latest(user_id)
+        if not crop_data:
+            return {"status": "no_data", "crops": {}}
+
+        # 3. Generate advice per crop
+        results = {}
+        for c_id, sensors in crop_data.items():
+            # Moisture Logic
+            moisture = sensors.get('moisture', 45)
+            m_status = "Optimal"
+            m_advice = "Soil moisture is healthy."
+            if moisture < 30:
+                m_status, m_advice = "Low", "Critical: Water immediately."
+            elif moisture < 42:
+                m_status, m_advice = "Warning", "Moisture dropping. Schedule irrigation."
+            
+            # pH Logic
+            ph = sensors.get('ph', 6.8)
+            ph_status = "Optimal"
+            if ph < 6.0: ph_status = "Acidic"
+            elif ph > 7.5: ph_status = "Alkaline"
+
+            # NPK Logic
+            n = sensors.get('nitrogen', 42)
+            n_status = "Optimal" if 40 <= n <= 60 else ("Low" if n < 40 else "High")
+            
+            p = sensors.get('phosphorus', 68)
+            p_status = "Optimal" if 30 <= p <= 50 else ("Low" if p < 30 else "Good")
+            
+            k = sensors.get('potassium', 55)
+            k_status = "Optimal" if 40 <= k <= 60 else ("Low" if k < 40 else "Good")
+
+            results[c_id] = {
+                "sensors": {
+                    "moisture": {"value": moisture, "status": m_status, "advice": m_advice},
+                    "ph": {"value": ph, "status": ph_status},
+                    "nitrogen": {"value": n, "status": n_status},
+                    "phosphorus": {"value": p, "status": p_status},
+                    "potassium": {"value": k, "status": k_status},
+                    "temperature": {"value": sensors.get('temperature', 24)},
+                    "humidity": {"value": sensors.get('humidity', 65)}
+                },
+                "fertilizer_advice": "Nitrogen is low." if n < 40 else "Nutrients are balanced."
+            }
+
+        return {"status": "success", "crops": results}
+    except Exception as e:
+        logger.error(f"Smart Advice Error: {e}")
+        return {"status": "error", "message": str(e)}
+
+def parse_time_param(value: str, name: str) -> float:
+    """Epoch seconds from an ISO 8601 or numeric epoch query parameter."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid '{name}' (expected ISO 8601 or epoch seconds).")
+
+@router.get("/iot/rollups/{user_id}")
+async def get_sensor_rollups(user_id: str, crop_id: str = None, sensor: str = None,
+                             resolution: str = "1h", start: str = None, end: str = None):
+    """
+    Min/max/mean per bucket for one user and crop, from the in-memory rollups.
+    `sensor` is a comma-separated list (default: every tracked sensor);
+    `start`/`end` default to the window the resolution holds, ending now.
+    """
+    if sensor_rollups is None:
+        raise HTTPException(status_code=503, detail="Sensor rollups are disabled.")
+    if resolution not in sensor_rollups.capacity:
+        raise HTTPException(status_code=400, detail=f"Unknown resolution '{resolution}', "
+                                                    f"expected one of {list(sensor_rollups.capacity)}.")
+    end_s = parse_time_param(end, "end") if end else datetime.now(timezone.utc).timestamp()
+    if start:
+        start_s = parse_time_param(start, "start")
+    else:
+        window = sensor_rollups.window_s(resolution)
+        start_s = end_s - window if window else 0.0
+    if start_s > end_s:
+        raise HTTPException(status_code=400, detail="'start' is after 'end'.")
+
+    sensors = [s.strip() for s in sensor.split(",") if s.strip()] if sensor else None
+    series = sensor_rollups.query(user_id, crop_id, resolution, start_s, end_s, sensors)
+    return {
+        "user_id":    user_id,
+        "crop_id":    crop_id,
+        "resolution": resolution,
+        "start":      datetime.fromtimestamp(start_s, timezone.utc).isoformat(),
+        "end":        datetime.fromtimestamp(end_s, timezone.utc).isoformat(),
+        "series":     series,
+    }
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 2. Mock IoT crop data (chatbot context)
+# ──────────────────────────────────────────────────────────────────────────────
+MOCK_CROPS = [
+    {
+        "crop": "Wheat",
+        "field_id": 1,
+        "stage": "Vegetative",
+        "sensor": {
+            "moisture": 28,
+            "temperature": 24,
+            "humidity": 65,
+            "ph": 6.5,
+        },
+    },
+    {
+        "crop": "Cotton",
+        "field_id": 2,
+        "stage": "Flowering",
+        "sensor": {
+            "moisture": 42,
+            "temperature": 26,
+            "humidity": 70,
+            "ph": 6.8,
+        },
+    },
+]
+
+@router.get("/crops")
+async def get_crops() -> List[Dict]:
+    """Return mock crop data for all registered fields."""
+    return MOCK_CROPS
+
+
+# Request body caps enforced by main.py's BodySizeLimitMiddleware
+BODY_LIMITS = {
+    "/iot/bulk": IOT_BULK_MAX_MB * 1024 * 1024,
+}
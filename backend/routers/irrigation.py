@@ -0,0 +1,327 @@
+import os
+import asyncio
+import logging
+from fastapi import APIRouter, Body, HTTPException
+from pydantic import BaseModel, ValidationError
+from typing import Any, List, Optional
+
+from config import MODELS_DIR
+from utils.feature_encoding import FeatureEncoder
+from utils.flat_forest import FlatForest
+from utils.irrigation_planner import IrrigationPlanner
+from utils.metrics import REGISTRY, STAGE_SECONDS, instrument
+from utils.quantized_memo import QuantizedMemo, parse_resolutions
+from utils.startup import SubsystemUnavailable
+
+logger = logging.getLogger("agritech-ml-api")
+
+router = APIRouter(tags=["irrigation"])
+
+
+class IrrigationRequest(BaseModel):
+    Soil_Type: str
+    Soil_Moisture: float
+    Temperature_C: float
+    Humidity: float
+    Rainfall_mm: float
+    Sunlight_Hours: float
+    Wind_Speed_kmh: float
+    Crop_Type: str
+    Crop_Growth_Stage: str
+    Season: str
+    Irrigation_Type: str
+    Field_Area_hectare: float
+    Previous_Irrigation_mm: float
+    Region: str
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 1. Load Irrigation ML Models
+# ──────────────────────────────────────────────────────────────────────────────
+IRR_MODEL_PATH = os.path.join(MODELS_DIR, "irrigation_model_v2.pkl")
+FE_PATH        = os.path.join(MODELS_DIR, "feature_encoders.pkl")
+TE_PATH        = os.path.join(MODELS_DIR, "target_encoder.pkl")
+FC_PATH        = os.path.join(MODELS_DIR, "feature_columns.pkl")
+# Flattened forest + encoders written by compile_irrigation_forest.py
+IRR_FOREST_PATH = os.getenv("IRRIGATION_FOREST_PATH") or os.path.join(MODELS_DIR, "irrigation_forest.npz")
+IRRIGATION_ENGINE = os.getenv("IRRIGATION_ENGINE", "auto")                 # auto | flat | sklearn
+# Target labels from least to most water needed (used by the planner's cost)
+IRRIGATION_LEVEL_ORDER = [l.strip() for l in os.getenv("IRRIGATION_LEVEL_ORDER", "Low,Medium,High").split(",") if l.strip()]
+
+CATEGORICAL_COLUMNS = ("Soil_Type", "Crop_Type", "Crop_Growth_Stage", "Season", "Irrigation_Type", "Region")
+
+irr_model = None
+irr_engine = None
+feature_encoder = None
+target_labels = None
+irrigation_planner = None
+
+def read_flat_forest() -> tuple:
+    """(model, encoder, labels) from the compiled .npz: NumPy only, no scikit-learn import."""
+    if not os.path.exists(IRR_FOREST_PATH):
+        raise SubsystemUnavailable(f"Compiled irrigation forest not found at {IRR_FOREST_PATH}")
+    forest, extra = FlatForest.load(IRR_FOREST_PATH)
+    return forest, FeatureEncoder.from_arrays(extra), [str(label) for label in extra["target_labels"]]
+
+def read_sklearn_forest() -> tuple:
+    """(model, encoder, labels) from the original joblib pickles."""
+    import joblib
+
+    paths = [IRR_MODEL_PATH, FE_PATH, TE_PATH, FC_PATH]
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        raise SubsystemUnavailable(f"Missing irrigation files: {[os.path.basename(m) for m in missing]}")
+
+    model, encoders, target, columns = [joblib.load(p) for p in paths]
+    encoder = FeatureEncoder.from_label_encoders(columns, encoders, CATEGORICAL_COLUMNS)
+
+    # The forest was fitted on a DataFrame; rows are now plain arrays in the
+    # same column order, so check that order once instead of on every predict.
+    fitted_names = getattr(model, "feature_names_in_", None)
+    if fitted_names is not None:
+        if list(fitted_names) != list(columns):
+            raise ValueError("feature_columns.pkl does not match the model's fitted column order.")
+        del model.feature_names_in_   # silences sklearn's per-call "no feature names" warning
+    return model, encoder, [str(label) for label in target.classes_]
+
+def load_irrigation_models():
+    global irr_model, irr_engine, feature_encoder, target_labels, irrigation_planner
+
+    engine = IRRIGATION_ENGINE
+    if engine == "auto":
+        engine = "flat" if os.path.exists(IRR_FOREST_PATH) else "sklearn"
+    if engine not in ("flat", "sklearn"):
+        raise ValueError(f"Unknown IRRIGATION_ENGINE '{IRRIGATION_ENGINE}'. Expected auto, flat or sklearn.")
+
+    print(f"Loading Irrigation models ({engine}) from {MODELS_DIR}...")
+    # Load into locals first so the endpoint never sees a half-loaded set
+    if engine == "flat":
+        model, encoder, labels = read_flat_forest()
+    else:
+        model, encoder, labels = read_sklearn_forest()
+    planner = IrrigationPlanner(model, encoder, labels, IRRIGATION_LEVEL_ORDER)
+    irr_model, irr_engine, feature_encoder, target_labels = model, engine, encoder, labels
+    irrigation_planner = planner
+    if irrigation_memo is not None:
+        irrigation_memo.clear()    # answers from the previous model must not be served
+    print("Irrigation prediction system: READY")
+
+STARTUP = [
+    ("irrigation_model", load_irrigation_models, False),
+]
+
+def health() -> dict:
+    return {
+        "irrigation_model": "Active" if irr_model is not None else "Down",
+        "irrigation_engine": irr_engine,
+        "irrigation_features": feature_encoder.info() if feature_encoder is not None else None,
+        "irrigation_memo": irrigation_memo.stats() if irrigation_memo is not None else "Disabled",
+    }
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 2. Irrigation Intelligence
+# ──────────────────────────────────────────────────────────────────────────────
+IRRIGATION_STAGES = {stage: STAGE_SECONDS.labels("/predict-irrigation", stage) for stage in ("memo", "encode", "model", "decode")}
+
+# Controllers poll with readings that drift by fractions of a unit: inputs are
+# snapped to these resolutions and the answer per snapped input is memoized.
+IRRIGATION_MEMO_ENABLED = os.getenv("IRRIGATION_MEMO_ENABLED", "1") == "1"
+IRRIGATION_MEMO_RESOLUTIONS = parse_resolutions(os.getenv(
+    "IRRIGATION_MEMO_RESOLUTIONS",
+    "Soil_Moisture=0.5,Temperature_C=0.5,Humidity=1,Rainfall_mm=0.5,Sunlight_Hours=0.25,"
+    "Wind_Speed_kmh=1,Field_Area_hectare=0.01,Previous_Irrigation_mm=1",
+))
+irrigation_memo = QuantizedMemo(
+    IRRIGATION_MEMO_RESOLUTIONS,
+    max_entries=int(os.getenv("IRRIGATION_MEMO_MAX_ENTRIES", "50000")),
+) if IRRIGATION_MEMO_ENABLED else None
+
+def collect_irrigation_metrics():
+    if irrigation_memo is None:
+        return
+    stats = irrigation_memo.stats()
+    yield ("agritech_irrigation_memo_hits_total", "counter", "irrigation_memo hits.", [({}, stats["hits"])])
+    yield ("agritech_irrigation_memo_misses_total", "counter", "irrigation_memo misses.", [({}, stats["misses"])])
+    yield ("agritech_irrigation_memo_hit_ratio", "gauge", "irrigation_memo hit ratio since start.", [({}, stats["hit_ratio"])])
+    yield ("agritech_irrigation_memo_entries", "gauge", "irrigation_memo entries held in memory.", [({}, stats["entries"])])
+
+REGISTRY.register_callback(collect_irrigation_metrics)
+
+@router.post("/predict-irrigation")
+@instrument("/predict-irrigation")
+async def predict_irrigation(request: IrrigationRequest):
+    """
+    Predict high-precision irrigation levels using Random Forest.
+    """
+    if irr_model is None or feature_encoder is None or target_labels is None:
+        raise HTTPException(
+            status_code=503, 
+            detail="Irrigation ML service is down (Model files not loaded)."
+        )
+
+    try:
+        record = request.dict()
+
+        # 0. Repeated poll (same readings at memo resolution)? One dict lookup.
+        memo_key = None
+        if irrigation_memo is not None:
+            with IRRIGATION_STAGES["memo"].time():
+                memo_key, record = irrigation_memo.quantize(record)
+                cached = irrigation_memo.get(memo_key)
+            if cached is not None:
+                return {"irrigation_level": cached}
+
+        # 1-2. Feature row in feature_columns order (dict lookups, unknown -> classes_[0])
+        with IRRIGATION_STAGES["encode"].time():
+            row = feature_encoder.encode(record)
+
+        # 3. Predict
+        with IRRIGATION_STAGES["model"].time():
+            prediction = irr_model.predict(row)
+
+        # 4. Decode
+        with IRRIGATION_STAGES["decode"].time():
+            irrigation_level = target_labels[int(prediction[0])]
+        if memo_key is not None:
+            irrigation_memo.put(memo_key, irrigation_level)
+
+        return {"irrigation_level": str(irrigation_level)}
+
+    except Exception as e:
+        logger.error(f"Irrigation Error: {e}")
+        raise HTTPException(status_code=500, detail=f"ML Processing Exception: {str(e)}")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 3. Batch irrigation (cooperative dashboard: hundreds of fields per call)
+#    Rows are validated one by one so a bad row only fails itself; the valid
+#    rows are encoded into one matrix and scored with a single predict call.
+# ──────────────────────────────────────────────────────────────────────────────
+IRRIGATION_BATCH_MAX_ROWS = int(os.getenv("IRRIGATION_BATCH_MAX_ROWS", "1000"))
+IRRIGATION_BATCH_STAGES = {
+    stage: STAGE_SECONDS.labels("/predict-irrigation/batch", stage) for stage in ("validate", "encode", "model", "decode")
+}
+
+
+def validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in exc.errors())
+
+
+@router.post("/predict-irrigation/batch")
+@instrument("/predict-irrigation/batch")
+async def predict_irrigation_batch(rows: List[Any] = Body(...)):
+    """
+    Predict irrigation levels for a JSON array of IrrigationRequest rows.
+    Results come back in input order; invalid rows get status "error" and
+    do not fail the rest of the batch.
+    """
+    if irr_model is None or feature_encoder is None or target_labels is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Irrigation ML service is down (Model files not loaded)."
+        )
+    if len(rows) > IRRIGATION_BATCH_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"Too many rows in one batch (max {IRRIGATION_BATCH_MAX_ROWS}).")
+
+    # 1. Validate each row on its own
+    results = [None] * len(rows)
+    valid_positions, valid_records = [], []
+    with IRRIGATION_BATCH_STAGES["validate"].time():
+        for i, row in enumerate(rows):
+            try:
+                if not isinstance(row, dict):
+                    raise TypeError("Row must be a JSON object.")
+                valid_records.append(IrrigationRequest.parse_obj(row).dict())
+                valid_positions.append(i)
+            except ValidationError as e:
+                results[i] = {"index": i, "status": "error", "error": validation_message(e)}
+            except TypeError as e:
+                results[i] = {"index": i, "status": "error", "error": str(e)}
+
+    if valid_records:
+        try:
+            # 2. One matrix, one forest call (off the event loop for large batches)
+            with IRRIGATION_BATCH_STAGES["encode"].time():
+                matrix = feature_encoder.encode_many(valid_records)
+            with IRRIGATION_BATCH_STAGES["model"].time():
+                predictions = await asyncio.to_thread(irr_model.predict, matrix)
+
+            # 3. Decode back into input positions
+            with IRRIGATION_BATCH_STAGES["decode"].time():
+                for i, code in zip(valid_positions, predictions):
+                    results[i] = {"index": i, "status": "ok", "irrigation_level": target_labels[int(code)]}
+        except Exception as e:
+            logger.error(f"Irrigation Batch Error: {e}")
+            raise HTTPException(status_code=500, detail=f"ML Processing Exception: {str(e)}")
+
+    errors = len(rows) - len(valid_records)
+    logger.info(f"💧 Irrigation batch: {len(rows)} rows, {errors} invalid")
+    return {"results": results, "summary": {"rows": len(rows), "ok": len(valid_records), "errors": errors}}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 4. Multi-day irrigation planner
+#    A field plus a 1-14 day forecast is expanded into scenarios of daily
+#    irrigation amounts (beam search); each day is one vectorized model call.
+# ──────────────────────────────────────────────────────────────────────────────
+IRRIGATION_PLAN_MAX_DAYS  = int(os.getenv("IRRIGATION_PLAN_MAX_DAYS", "14"))
+IRRIGATION_PLAN_BEAM      = int(os.getenv("IRRIGATION_PLAN_BEAM", "16"))
+IRRIGATION_PLAN_OPTIONS_MM = [float(v) for v in os.getenv("IRRIGATION_PLAN_OPTIONS_MM", "0,10,20,30,40").split(",") if v.strip()]
+
+
+class ForecastDay(BaseModel):
+    date: Optional[str] = None
+    Temperature_C: float
+    Humidity: float
+    Rainfall_mm: float
+    Sunlight_Hours: float
+    Wind_Speed_kmh: float
+
+
+class IrrigationPlanRequest(BaseModel):
+    field: IrrigationRequest
+    forecast: List[ForecastDay]
+    irrigation_options_mm: Optional[List[float]] = None
+    beam_width: Optional[int] = None
+    water_weight: float = 0.3       # trade-off: higher saves water, lower avoids any stress
+
+
+@router.post("/plan-irrigation")
+@instrument("/plan-irrigation")
+async def plan_irrigation(request: IrrigationPlanRequest):
+    """
+    Recommend a daily irrigation schedule over a weather forecast, accounting for
+    forecast rain and the feedback of each irrigation on Soil_Moisture and
+    Previous_Irrigation_mm.
+    """
+    if irrigation_planner is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Irrigation ML service is down (Model files not loaded)."
+        )
+    if not 1 <= len(request.forecast) <= IRRIGATION_PLAN_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"forecast must have 1 to {IRRIGATION_PLAN_MAX_DAYS} days.")
+    options = request.irrigation_options_mm or IRRIGATION_PLAN_OPTIONS_MM
+    if not options or min(options) < 0 or len(options) > 20:
+        raise HTTPException(status_code=400, detail="irrigation_options_mm must hold 1 to 20 non-negative amounts.")
+    beam_width = min(max(1, request.beam_width or IRRIGATION_PLAN_BEAM), 64)
+
+    try:
+        plan = await asyncio.to_thread(
+            irrigation_planner.plan,
+            request.field.dict(),
+            [day.dict() for day in request.forecast],
+            options,
+            beam_width,
+            request.water_weight,
+        )
+    except Exception as e:
+        logger.error(f"Irrigation Planner Error: {e}")
+        raise HTTPException(status_code=500, detail=f"ML Processing Exception: {str(e)}")
+
+    return {"beam_width": beam_width, **plan}
+
+
+# Request body caps enforced by main.py's BodySizeLimitMiddleware (~1 KB per row)
+BODY_LIMITS = {
+    "/predict-irrigation/batch": IRRIGATION_BATCH_MAX_ROWS * 1024,
+}
@@ -0,0 +1,83 @@
+import logging
+from fastapi import APIRouter
+from pydantic import BaseModel
+
+import db
+
+logger = logging.getLogger("agritech-ml-api")
+
+router = APIRouter(tags=["tasks"])
+
+USES_SUPABASE = True
+
+class TaskCreate(BaseModel):
+    user_id: str
+    title: str
+    description: str = None
+    due_date: str = None
+    priority: str = "Medium"
+
+class GrowthLogCreate(BaseModel):
+    crop_id: str
+    height_cm: float = None
+    leaf_count: int = None
+    notes: str = None
+    image_url: str = None
+
+# LoginRequest removed - using direct client-side auth
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 1. Task Management Endpoints
+# ──────────────────────────────────────────────────────────────────────────────
+
+@router.get("/tasks/{user_id}")
+async def get_tasks(user_id: str):
+    if not db.supabase: return []
+    res = db.execute(db.supabase.table("tasks").select("*").eq("user_id", user_id).order("due_date"), "tasks.select")
+    return res.data
+
+@router.post("/tasks")
+async def add_task(task: TaskCreate):
+    if not db.supabase: return {"status": "error"}
+    res = db.execute(db.supabase.table("tasks").insert(task.dict()), "tasks.insert")
+    return res.data
+
+@router.patch("/tasks/{task_id}/toggle")
+async def toggle_task(task_id: str, completed: bool):
+    if not db.supabase: return {"status": "error"}
+    res = db.execute(db.supabase.table("tasks").update({"is_completed": completed}).eq("id", task_id), "tasks.update")
+    return res.data
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 2. Notifications
+# ──────────────────────────────────────────────────────────────────────────────
+
+@router.get("/notifications/{user_id}")
+async def get_notifications(user_id: str):
+    if not db.supabase: return []
+    res = db.execute(db.supabase.table("notifications").select("*").eq("user_id", user_id).eq("is_read", False), "notifications.select")
+    return res.data
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 2.5 Auth & Role Endpoints
+# ──────────────────────────────────────────────────────────────────────────────
+
+# Auth endpoints removed - migrated to standard Supabase client flow.
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 3. Crop Growth Analytics
+# ──────────────────────────────────────────────────────────────────────────────
+
+@router.post("/crops/logs")
+async def log_growth(log: GrowthLogCreate):
+    """Log physical growth metrics for lifecycle tracking."""
+    if not db.supabase: return {"status": "error"}
+    res = db.execute(db.supabase.table("growth_logs").insert(log.dict()), "growth_logs.insert")
+    return res.data
+
+@router.get("/crops/{crop_id}/history")
+async def get_crop_history(crop_id: str):
+    res = db.execute(db.supabase.table("growth_logs").select("*").eq("crop_id", crop_id).order("log_date"), "growth_logs.select")
+    return res.data
+
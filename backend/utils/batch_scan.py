@@ -0,0 +1,67 @@
+import io
+import logging
+import os
+import zipfile
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff", ".gif"}
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed", "application/x-zip"}
+
+
+def is_zip_upload(filename, content_type, data):
+    """Detect zip archives by content type, extension or magic bytes."""
+    if content_type in ZIP_CONTENT_TYPES:
+        return True
+    if filename and filename.lower().endswith(".zip"):
+        return True
+    return data[:4] == b"PK\x03\x04"
+
+
+def expand_zip(data, max_images, max_total_bytes):
+    """
+    Extract image members from a zip archive as (name, bytes) pairs.
+    - Skips directories, macOS metadata and non-image files
+    - Enforces member count and uncompressed size limits (zip bombs)
+    """
+    items = []
+    total = 0
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for member in archive.infolist():
+            name = member.filename
+            if member.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                continue
+            if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            if len(items) >= max_images:
+                raise ValueError(f"Archive contains more than {max_images} images.")
+            total += member.file_size
+            if total > max_total_bytes:
+                raise ValueError(f"Archive expands beyond {max_total_bytes // (1024 * 1024)} MB.")
+            items.append((name, archive.read(member)))
+    return items
+
+
+def summarize_field(results):
+    """Aggregate per-image results into a field-level summary."""
+    scanned = [r for r in results if r.get("status") == "ok"]
+    healthy = [r for r in scanned if "healthy" in r["raw_class"].lower()]
+    diseased = [r for r in scanned if "healthy" not in r["raw_class"].lower()]
+
+    class_counts = Counter(r["disease"] for r in scanned)
+    disease_counts = Counter(r["disease"] for r in diseased)
+    severity_counts = Counter(r["severity"] for r in diseased)
+
+    return {
+        "total_images":     len(results),
+        "scanned":          len(scanned),
+        "failed":           len(results) - len(scanned),
+        "healthy":          len(healthy),
+        "diseased":         len(diseased),
+        "infection_rate":   round(len(diseased) / len(scanned) * 100, 2) if scanned else 0.0,
+        "dominant_disease": disease_counts.most_common(1)[0][0] if disease_counts else None,
+        "mean_confidence":  round(sum(r["confidence"] for r in scanned) / len(scanned), 2) if scanned else 0.0,
+        "class_counts":     dict(class_counts.most_common()),
+        "severity_counts":  dict(severity_counts),
+    }
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class BatchStats:
+    """Running batch-size and queue-wait statistics for the micro-batcher."""
+
+    def __init__(self, window=1024):
+        self.batches = 0
+        self.items = 0
+        self.failures = 0
+        self.max_batch_seen = 0
+        self.size_histogram = {}
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.recent_waits_ms = deque(maxlen=window)
+        self.total_infer_ms = 0.0
+
+    def record(self, batch_size, waits_ms, infer_ms):
+        self.batches += 1
+        self.items += batch_size
+        self.max_batch_seen = max(self.max_batch_seen, batch_size)
+        self.size_histogram[batch_size] = self.size_histogram.get(batch_size, 0) + 1
+        self.total_wait_ms += sum(waits_ms)
+        self.max_wait_ms = max(self.max_wait_ms, max(waits_ms))
+        self.recent_waits_ms.extend(waits_ms)
+        self.total_infer_ms += infer_ms
+
+    def snapshot(self):
+        recent = sorted(self.recent_waits_ms)
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+        return {
+            "batches":            self.batches,
+            "items":              self.items,
+            "failures":           self.failures,
+            "mean_batch_size":    round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size":     self.max_batch_seen,
+            "batch_size_histogram": {str(k): v for k, v in sorted(self.size_histogram.items())},
+            "mean_queue_wait_ms": round(self.total_wait_ms / self.items, 3) if self.items else 0.0,
+            "p95_queue_wait_ms":  round(p95, 3),
+            "max_queue_wait_ms":  round(self.max_wait_ms, 3),
+            "mean_batch_infer_ms": round(self.total_infer_ms / self.batches, 3) if self.batches else 0.0,
+        }
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching scheduler for model inference.
+    - Concurrent callers submit one preprocessed tensor each
+    - Tensors are grouped until max_batch_size is reached or max_wait_ms elapses
+    - The whole group runs in a single forward pass
+    - Each caller receives its own probability row
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5.0, runner=None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        # Optional coroutine function(predict_fn, batch) used to run the forward pass
+        self.runner = runner
+        self.observer = None          # optional callable(batch_size, waits_ms, infer_ms)
+        self.stats = BatchStats()
+        self._queue = None
+        self._worker = None
+
+    @property
+    def running(self):
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+        logger.info(f"Micro-batcher started (max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait * 1000:.1f})")
+
+    async def stop(self):
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        # Fail anything still waiting so callers do not hang
+        while self._queue is not None and not self._queue.empty():
+            _, fut, _ = self._queue.get_nowait()
+            if not fut.done():
+                fut.set_exception(RuntimeError("Inference scheduler shut down."))
+
+    async def submit(self, tensor):
+        """
+        Queue a single tensor of shape (H, W, C) or (1, H, W, C) and wait for its prediction row.
+        """
+        if not self.running:
+            await self.start()
+        if tensor.ndim == 4:
+            tensor = tensor[0]
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((tensor, fut, time.perf_counter()))
+        return await fut
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    # Take whatever is already queued without waiting
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                await self._execute(batch)
+                batch = []
+        except asyncio.CancelledError:
+            # stop() while a batch was being gathered or run: those items are no
+            # longer in the queue, so fail them here or their callers hang
+            for _, fut, _ in batch:
+                if not fut.done():
+                    fut.set_exception(RuntimeError("Inference scheduler shut down."))
+            raise
+
+    async def _execute(self, batch):
+        # Drop callers that gave up (client disconnect / cancellation)
+        batch = [item for item in batch if not item[1].done()]
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        waits_ms = [(started - enqueued) * 1000 for _, _, enqueued in batch]
+        try:
+            stacked = np.stack([tensor for tensor, _, _ in batch])
+            if self.runner is not None:
+                predictions = await self.runner(self.predict_fn, stacked)
+            else:
+                predictions = self.predict_fn(stacked)
+        except Exception as e:
+            self.stats.failures += 1
+            logger.error(f"Batched inference failed for {len(batch)} item(s): {e}")
+            for _, fut, _ in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        infer_ms = (time.perf_counter() - started) * 1000
+        self.stats.record(len(batch), waits_ms, infer_ms)
+        if self.observer is not None:
+            self.observer(len(batch), waits_ms, infer_ms)
+        for row, (_, fut, _) in zip(predictions, batch):
+            if not fut.done():
+                fut.set_result(row)
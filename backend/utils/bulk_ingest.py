@@ -0,0 +1,169 @@
+import codecs
+import json
+import logging
+import math
+import re
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = " \t\r\n"
+_decoder = json.JSONDecoder()
+
+# iot_sensors constraints (agritech-app/database/supabase-schema.sql): sensor_type
+# CHECK list with the unit stored when the device sends none, unit NOT NULL,
+# user_id/crop_id UUID. Checked before a reading is acknowledged, because a row
+# the table rejects can only be dead-lettered once it is in the write buffer.
+SENSOR_UNITS = {
+    "soil_moisture":    "%",
+    "soil_temperature": "°C",
+    "soil_ph":          "pH",
+    "npk":              "mg/kg",
+    "air_temperature":  "°C",
+    "humidity":         "%",
+}
+MAX_UNIT_LENGTH = 16
+_UUID = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+
+
+def check_reading(user_id, crop_id, sensor_type, unit=None):
+    """(unit to store, None) for a reading iot_sensors will accept, else (None, error)."""
+    if sensor_type not in SENSOR_UNITS:
+        return None, f"Unknown sensor_type '{sensor_type}', expected one of {sorted(SENSOR_UNITS)}."
+    if not isinstance(user_id, str) or not _UUID.match(user_id):
+        return None, "user_id must be a UUID."
+    if crop_id is not None and (not isinstance(crop_id, str) or not _UUID.match(crop_id)):
+        return None, "crop_id must be a UUID."
+    if unit is None:
+        return SENSOR_UNITS[sensor_type], None
+    if not isinstance(unit, str) or not 0 < len(unit) <= MAX_UNIT_LENGTH:
+        return None, f"unit must be a non-empty string of at most {MAX_UNIT_LENGTH} characters."
+    return unit, None
+
+
+class RowError(Exception):
+    """A body element that could not be parsed; reported as a per-row reject."""
+
+
+async def iter_json_rows(chunks):
+    """
+    Parse a JSON array or NDJSON body incrementally from an async iterator of
+    byte chunks, yielding each element as soon as it is complete (a dict, any
+    other JSON value, or a RowError for an unparsable NDJSON line).
+    The format is taken from the first non-blank character: '[' = array.
+    An array with a syntax error raises ValueError: nothing after it can be
+    located. Memory is bounded by one chunk plus the element being parsed.
+    """
+    text = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    mode = None
+    pos = 0
+    finished = False
+
+    async def more():
+        nonlocal buf, pos, finished
+        try:
+            chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            buf, pos = buf[pos:] + text.decode(b"", final=True), 0
+            finished = True
+            return
+        buf, pos = buf[pos:] + text.decode(chunk), 0
+
+    while mode is None:
+        stripped = buf.lstrip(_WHITESPACE)
+        if stripped:
+            mode = "array" if stripped[0] == "[" else "ndjson"
+            buf, pos = stripped[1:] if mode == "array" else stripped, 0
+        elif finished:
+            return
+        else:
+            await more()
+
+    if mode == "ndjson":
+        while True:
+            newline = buf.find("\n", pos)
+            if newline < 0:
+                if not finished:
+                    await more()
+                    continue
+                newline = len(buf)
+            line = buf[pos:newline].strip()
+            pos = newline + 1
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    yield RowError(f"Invalid JSON: {e.msg}")
+            if finished and pos >= len(buf):
+                return
+
+    # JSON array: elements separated by commas, decoded one by one with raw_decode
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE + ",":
+            pos += 1
+        if pos >= len(buf):
+            if finished:
+                raise ValueError("JSON array is not closed.")
+            await more()
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            value, end = _decoder.raw_decode(buf, pos)
+        except ValueError:
+            if finished:
+                raise ValueError(f"Invalid JSON array element near character {pos}.")
+            await more()      # element not complete yet
+            continue
+        if end == len(buf) and not finished:
+            await more()      # a bare number at the buffer edge may continue in the next chunk
+            continue
+        pos = end
+        yield value
+
+
+def _parse_timestamp(value):
+    if not isinstance(value, str):
+        raise ValueError
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).isoformat()
+
+
+def validate_readings(rows, received_at):
+    """
+    Validate a chunk of parsed sensor readings in one pass per row, with the
+    same checks as /iot/update (check_reading) plus value and timestamp.
+    Returns ([(position, row ready for iot_sensors), ...], [(position, error), ...]).
+    """
+    valid, rejects = [], []
+    for i, r in enumerate(rows):
+        if isinstance(r, RowError):
+            rejects.append((i, str(r)))
+            continue
+        if not isinstance(r, dict):
+            rejects.append((i, "Row must be a JSON object."))
+            continue
+        value = r.get("value")
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            rejects.append((i, "Invalid or missing field(s): value"))
+            continue
+        unit, error = check_reading(r.get("user_id"), r.get("crop_id"), r.get("sensor_type"), r.get("unit"))
+        if error:
+            rejects.append((i, error))
+            continue
+        timestamp = r.get("timestamp")
+        if timestamp is not None:
+            try:
+                timestamp = _parse_timestamp(timestamp)
+            except ValueError:
+                rejects.append((i, "Invalid timestamp (expected ISO 8601)."))
+                continue
+        valid.append((i, {
+            "user_id": r["user_id"],
+            "crop_id": r.get("crop_id"),
+            "sensor_type": r["sensor_type"],
+            "value": float(value),
+            "unit": unit,
+            "timestamp": timestamp or received_at,
+        }))
+    return valid, rejects
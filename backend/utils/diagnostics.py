@@ -0,0 +1,55 @@
+import itertools
+import logging
+
+import numpy as np
+
+
+def top_k(probs, k=5):
+    """Indices of the k largest probabilities, highest first. O(n) selection, then sorts only k."""
+    k = min(k, len(probs))
+    idx = np.argpartition(probs, -k)[-k:]
+    return idx[np.argsort(probs[idx])[::-1]]
+
+
+class TopK:
+    """Log argument that computes and formats the top-k classes only if the record is emitted."""
+
+    __slots__ = ("probs", "class_names", "k")
+
+    def __init__(self, probs, class_names, k=5):
+        self.probs = probs
+        self.class_names = class_names
+        self.k = k
+
+    def __str__(self):
+        parts = []
+        for idx in top_k(self.probs, self.k):
+            name = self.class_names[idx] if idx < len(self.class_names) else f"Unknown_{idx}"
+            parts.append(f"{name} ({float(self.probs[idx]) * 100:.1f}%)")
+        return ", ".join(parts)
+
+
+class DiagnosticsSampler:
+    """
+    Decides which requests get a detailed diagnostics log line:
+    - every request while the logger is at DEBUG
+    - requests slower than slow_ms (0 disables)
+    - otherwise 1 in sample_every requests (0 disables, 1 logs all)
+    """
+
+    def __init__(self, logger, sample_every=100, slow_ms=1000.0):
+        self.logger = logger
+        self.sample_every = sample_every
+        self.slow_ms = slow_ms
+        self._counter = itertools.count(1)
+
+    def reason(self, elapsed_ms):
+        """'debug', 'slow', 'sampled' or None."""
+        n = next(self._counter)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            return "debug"
+        if self.slow_ms and elapsed_ms >= self.slow_ms:
+            return "slow"
+        if self.sample_every and n % self.sample_every == 0:
+            return "sampled"
+        return None
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from utils.image_processing import DEFAULT_MAX_PIXELS, preprocess_image
+from utils.inference_backends import load_backend
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("thread", "process")
+
+# Model preloaded inside each process-pool worker (see _init_worker)
+_worker_model = None
+
+
+def _init_worker(backend, model_path, intra_op_threads):
+    """Process-pool initializer: load the model once per worker process."""
+    global _worker_model
+    _worker_model = load_backend(backend, model_path, num_threads=intra_op_threads)
+    # Warm-up pass so graph tracing is not paid by the first real batch
+    sample_shape = tuple(d or 1 for d in _worker_model.input_shape[1:])
+    _worker_model.predict(np.zeros((1,) + sample_shape, dtype=np.float32))
+
+
+def _worker_predict(batch):
+    return _worker_model.predict(batch)
+
+
+def _worker_ping():
+    return _worker_model is not None
+
+
+class InferenceExecutor:
+    """
+    Runs the CPU-bound image pipeline and model calls off the asyncio event loop.
+    - "thread": shared thread pool, uses the model already loaded in this process
+    - "process": process pool with the model preloaded in every worker
+    """
+
+    def __init__(self, kind="thread", workers=None, backend="keras", model_path=None,
+                 preprocess_mode="quality", max_pixels=DEFAULT_MAX_PIXELS):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind '{kind}'. Expected one of {EXECUTOR_KINDS}.")
+        self.kind = kind
+        cpus = os.cpu_count() or 1
+        self.workers = workers or (cpus if kind == "process" else min(4, cpus))
+        self.backend = backend
+        self.model_path = model_path
+        self.preprocess_mode = preprocess_mode
+        self.max_pixels = max_pixels
+        self._pool = None
+
+    def start(self):
+        if self._pool is not None:
+            return
+        if self.kind == "process":
+            # spawn: never fork a parent that may already have TensorFlow initialised
+            intra_op = max(1, (os.cpu_count() or 1) // self.workers)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.backend, self.model_path, intra_op),
+            )
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        logger.info(f"Inference executor started ({self.kind}, {self.workers} workers)")
+
+    async def prime(self):
+        """Spawn every process worker now so the model load is not paid by the first request."""
+        self.start()
+        if self.kind == "process":
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*[loop.run_in_executor(self._pool, _worker_ping) for _ in range(self.workers)])
+
+    def shutdown(self):
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+    async def run(self, fn, *args):
+        """Run a picklable callable on the pool."""
+        self.start()
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    async def preprocess(self, image_bytes, target_size):
+        return await self.run(preprocess_image, image_bytes, target_size, self.preprocess_mode, self.max_pixels)
+
+    async def run_batch(self, predict_fn, batch):
+        """
+        MicroBatcher runner. In process mode the worker's preloaded model is used
+        instead of predict_fn, which lives in the parent process.
+        """
+        if self.kind == "process":
+            return await self.run(_worker_predict, batch)
+        return await self.run(predict_fn, batch)
+
+    def info(self):
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "preprocess_mode": self.preprocess_mode,
+            "running": self._pool is not None
+        }
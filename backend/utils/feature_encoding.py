@@ -0,0 +1,81 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_PREFIX = "categories."
+
+
+class FeatureEncoder:
+    """
+    Fitted LabelEncoders compiled into plain dict lookups, once at load time.
+    - encode() builds the model's feature row directly as a NumPy array in
+      feature_columns order: no DataFrame, no per-column transform() calls
+    - Categories the encoder never saw fall back to classes_[0], the same
+      fallback the request path used with LabelEncoder
+    - Columns without a fitted encoder are passed through as numbers
+    categories maps each encoded column to its classes_, in encoder order.
+    """
+
+    def __init__(self, feature_columns, categories):
+        self.columns = tuple(feature_columns)
+        self.categories = {col: [str(label) for label in labels] for col, labels in categories.items()}
+        # LabelEncoder codes are positions in its sorted classes_
+        self.lookups = {col: {label: code for code, label in enumerate(labels)}
+                        for col, labels in self.categories.items()}
+        self.fallbacks = {col: 0 for col in self.categories}
+        # (column, lookup or None, fallback) in model column order
+        self._plan = tuple((col, self.lookups.get(col), self.fallbacks.get(col)) for col in self.columns)
+
+    @classmethod
+    def from_label_encoders(cls, feature_columns, feature_encoders, categorical_columns):
+        categories = {}
+        for col in categorical_columns:
+            le = feature_encoders.get(col)
+            if le is not None and hasattr(le, "transform"):
+                categories[col] = list(le.classes_)
+        return cls(feature_columns, categories)
+
+    def arrays(self):
+        """Plain string arrays for a pickle-free .npz (see compile_irrigation_forest.py)."""
+        out = {"feature_columns": np.asarray(self.columns)}
+        for col, labels in self.categories.items():
+            out[CATEGORY_PREFIX + col] = np.asarray(labels)
+        return out
+
+    @classmethod
+    def from_arrays(cls, data):
+        categories = {key[len(CATEGORY_PREFIX):]: list(value) for key, value in data.items()
+                      if key.startswith(CATEGORY_PREFIX)}
+        return cls([str(col) for col in data["feature_columns"]], categories)
+
+    @property
+    def width(self):
+        return len(self.columns)
+
+    def encode_into(self, record, out):
+        """Write one record (mapping of field -> raw value) into the 1-D array out."""
+        for i, (col, lookup, fallback) in enumerate(self._plan):
+            value = record[col]
+            out[i] = value if lookup is None else lookup.get(str(value), fallback)
+        return out
+
+    def encode(self, record):
+        """(1, width) float64 feature row for one record."""
+        row = np.empty((1, self.width), dtype=np.float64)
+        self.encode_into(record, row[0])
+        return row
+
+    def encode_many(self, records):
+        """(n, width) float64 feature matrix, one row per record, in input order."""
+        matrix = np.empty((len(records), self.width), dtype=np.float64)
+        for record, row in zip(records, matrix):
+            self.encode_into(record, row)
+        return matrix
+
+    def info(self):
+        return {
+            "columns":     len(self.columns),
+            "categorical": {col: len(lookup) for col, lookup in self.lookups.items()},
+        }
@@ -0,0 +1,162 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+class FlatForest:
+    """
+    A fitted RandomForestClassifier flattened into NumPy arrays, one entry per
+    node across all trees (tree t's nodes start at roots[t]):
+        feature, threshold, left, right  - split of each node
+        values                           - per-node class fractions (leaves are used)
+    Leaves point to themselves with threshold +inf, so every sample can take
+    exactly max_depth vectorized steps down all trees at once. Rows are cast
+    to float32 and compared with <= against float64 thresholds, exactly as
+    sklearn does, so predict() matches RandomForestClassifier.predict.
+    No scikit-learn import is needed to load or evaluate it.
+    """
+
+    def __init__(self, feature, threshold, left, right, values, roots, max_depth, classes, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.values = values
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.n_features = int(n_features)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flatten a fitted single-output RandomForestClassifier."""
+        if not hasattr(model, "estimators_") or not hasattr(model, "classes_"):
+            raise ValueError("Expected a fitted RandomForestClassifier.")
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Multi-output forests are not supported.")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset, max_depth = 0, 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+            own = np.arange(offset, offset + n)
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, own, tree.children_left + offset))
+            rights.append(np.where(is_leaf, own, tree.children_right + offset))
+            # Counts (older sklearn) or fractions (newer): normalise either way
+            node_values = tree.value[:, 0, :].astype(np.float64)
+            totals = node_values.sum(axis=1, keepdims=True)
+            values.append(node_values / np.where(totals == 0, 1, totals))
+
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            values=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            classes=np.asarray(model.classes_),
+            n_features=model.n_features_in_,
+        )
+
+    # ── evaluation ───────────────────────────────────────────────────────────
+    def leaves(self, X):
+        """(n_samples, n_trees) leaf node index reached in every tree."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis]
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, but the forest expects {self.n_features}.")
+        rows = np.arange(len(X))[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        leaves = self.leaves(X)
+        proba = np.zeros((len(leaves), self.values.shape[1]), dtype=np.float64)
+        # Accumulated tree by tree then averaged, as sklearn does
+        for t in range(self.n_trees):
+            proba += self.values[leaves[:, t]]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    # ── persistence (.npz, no pickle) ────────────────────────────────────────
+    def arrays(self):
+        return {
+            "format_version": np.asarray(FORMAT_VERSION),
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "values": self.values,
+            "roots": self.roots,
+            "max_depth": np.asarray(self.max_depth),
+            "classes": self.classes_,
+            "n_features": np.asarray(self.n_features),
+        }
+
+    def save(self, path, **extra):
+        """Write the forest plus any extra arrays (encoders, labels) to one .npz."""
+        np.savez_compressed(path, **self.arrays(), **extra)
+
+    @classmethod
+    def load(cls, path):
+        """(forest, extra arrays) from a .npz written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        forest = cls.from_arrays(arrays)
+        extra = {key: value for key, value in arrays.items() if key not in forest.arrays()}
+        return forest, extra
+
+    @classmethod
+    def from_arrays(cls, data):
+        version = int(data["format_version"])
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported flat forest format {version} (expected {FORMAT_VERSION}).")
+        return cls(
+            feature=data["feature"],
+            threshold=data["threshold"],
+            left=data["left"],
+            right=data["right"],
+            values=data["values"],
+            roots=data["roots"],
+            max_depth=data["max_depth"],
+            classes=data["classes"],
+            n_features=data["n_features"],
+        )
+
+    def info(self):
+        return {
+            "trees":     self.n_trees,
+            "nodes":     self.n_nodes,
+            "max_depth": self.max_depth,
+            "classes":   len(self.classes_),
+            "size_mb":   round(sum(a.nbytes for a in self.arrays().values()) / (1024 * 1024), 2),
+        }
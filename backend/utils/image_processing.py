@@ -5,14 +5,25 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def preprocess_image(image_bytes, target_size=(224, 224)):
+PREPROCESS_MODES = ("quality", "fast")
+
+# Upper bound on pixels the fast path will decode (after JPEG draft downscaling)
+DEFAULT_MAX_PIXELS = 16_000_000
+
+def preprocess_image(image_bytes, target_size=(224, 224), mode="quality", max_pixels=DEFAULT_MAX_PIXELS):
     """
     Enhanced preprocessing for model prediction.
     - Handles EXIF orientation (crucial for phone photos)
     - Aspect-aware center cropping
     - High-quality Lanczos resampling
     - Standard normalization
+    mode="fast" uses decoder-side downscaling instead (see preprocess_image_fast).
     """
+    if mode == "fast":
+        return preprocess_image_fast(image_bytes, target_size, max_pixels)
+    if mode != "quality":
+        raise ValueError(f"Unknown preprocessing mode '{mode}'. Expected one of {PREPROCESS_MODES}.")
+
     try:
         # Load image
         img = Image.open(io.BytesIO(image_bytes))
@@ -38,8 +49,61 @@ def preprocess_image(image_bytes, target_size=(224, 224)):
         # 6. Add batch dimension
         img_array = np.expand_dims(img_array, axis=0)
         
-        logger.info(f"Image preprocessed to shape: {img_array.shape}, mean: {np.mean(img_array):.4f}")
+        logger.debug("Image preprocessed to shape: %s", img_array.shape)
         return img_array
     except Exception as e:
         logger.error(f"Preprocessing error: {e}")
         raise ValueError(f"Error processing image: {str(e)}")
+
+
+def _center_crop_box(size, target_size):
+    """Crop box matching ImageOps.fit's centred, aspect-preserving crop."""
+    w, h = size
+    tw, th = target_size
+    target_ratio = tw / th
+    if w / h > target_ratio:
+        crop_w = h * target_ratio
+        return ((w - crop_w) / 2, 0, (w + crop_w) / 2, h)
+    crop_h = w / target_ratio
+    return (0, (h - crop_h) / 2, w, (h + crop_h) / 2)
+
+def preprocess_image_fast(image_bytes, target_size=(224, 224), max_pixels=DEFAULT_MAX_PIXELS):
+    """
+    Low-latency preprocessing for large phone photos.
+    - JPEG: decoder-side downscaling via draft() (DCT scaling to 1/2, 1/4 or 1/8)
+    - Rejects images that would still decode to more than max_pixels
+    - Two-stage resize: integer box reduce, then bilinear to the target size
+    - Stays uint8 until a single final float normalisation
+    """
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+
+        # 1. Ask the JPEG decoder for the smallest scale still >= 2x the target
+        if img.format == "JPEG":
+            img.draft("RGB", (target_size[0] * 2, target_size[1] * 2))
+
+        # 2. Cap decoded pixel count before anything is decoded
+        if img.width * img.height > max_pixels:
+            raise ValueError(f"Image too large to decode ({img.width}x{img.height} > {max_pixels} pixels).")
+
+        # 3. Fix EXIF orientation and ensure RGB
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        # 4. Centre crop + two-stage resize (reduce() by an integer factor, then bilinear)
+        img = img.resize(
+            target_size,
+            Image.Resampling.BILINEAR,
+            box=_center_crop_box(img.size, target_size),
+            reducing_gap=2.0
+        )
+
+        # 5. uint8 -> float32 in one pass, then add batch dimension
+        img_array = np.multiply(np.asarray(img, dtype=np.uint8), np.float32(1.0 / 255.0), dtype=np.float32)
+        return img_array[np.newaxis]
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Preprocessing error: {e}")
+        raise ValueError(f"Error processing image: {str(e)}")
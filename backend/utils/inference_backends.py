@@ -0,0 +1,119 @@
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKEND_KINDS = ("keras", "tflite", "onnx")
+BACKEND_EXTENSIONS = {".h5": "keras", ".keras": "keras", ".tflite": "tflite", ".onnx": "onnx"}
+
+
+def backend_for_path(path):
+    """Guess the backend kind from a model file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in BACKEND_EXTENSIONS:
+        raise ValueError(f"Cannot infer inference backend for '{path}'.")
+    return BACKEND_EXTENSIONS[ext]
+
+
+class KerasBackend:
+    """Full TensorFlow/Keras model (.h5). Heaviest import and memory footprint."""
+
+    name = "keras"
+
+    def __init__(self, path, num_threads=None):
+        import tensorflow as tf
+
+        if num_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+        self.model = tf.keras.models.load_model(path)
+        self.input_shape = tuple(self.model.input_shape)
+        self.output_dim = int(self.model.output_shape[-1])
+
+    def predict(self, batch):
+        return self.model.predict(batch, verbose=0)
+
+
+class TFLiteBackend:
+    """
+    TFLite flatbuffer (float32, float16 or int8 quantized).
+    Uses tflite_runtime when installed so serving workers never import TensorFlow.
+    """
+
+    name = "tflite"
+
+    def __init__(self, path, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+
+        self.interpreter = Interpreter(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.input_shape = (None,) + tuple(int(d) for d in self._input["shape"][1:])
+        self.output_dim = int(self._output["shape"][-1])
+        self._batch_size = int(self._input["shape"][0])
+        # An interpreter holds mutable tensor buffers: one call at a time
+        self._lock = threading.Lock()
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input["index"], batch.shape)
+                self.interpreter.allocate_tensors()
+                self._input = self.interpreter.get_input_details()[0]
+                self._output = self.interpreter.get_output_details()[0]
+                self._batch_size = batch.shape[0]
+
+            scale, zero_point = self._input["quantization"]
+            if self._input["dtype"] != np.float32 and scale:
+                batch = np.round(batch / scale + zero_point).astype(self._input["dtype"])
+            self.interpreter.set_tensor(self._input["index"], batch)
+            self.interpreter.invoke()
+            out = self.interpreter.get_tensor(self._output["index"])
+
+            scale, zero_point = self._output["quantization"]
+            if self._output["dtype"] != np.float32 and scale:
+                out = (out.astype(np.float32) - zero_point) * scale
+            return np.array(out, dtype=np.float32)
+
+
+class ONNXBackend:
+    """ONNX model executed with onnxruntime on CPU."""
+
+    name = "onnx"
+
+    def __init__(self, path, num_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        inp = self.session.get_inputs()[0]
+        out = self.session.get_outputs()[0]
+        self._input_name = inp.name
+        self.input_shape = tuple(d if isinstance(d, int) else None for d in inp.shape)
+        self.output_dim = int(out.shape[-1])
+
+    def predict(self, batch):
+        return self.session.run(None, {self._input_name: np.asarray(batch, dtype=np.float32)})[0]
+
+
+_BACKENDS = {"keras": KerasBackend, "tflite": TFLiteBackend, "onnx": ONNXBackend}
+
+
+def load_backend(kind, path, num_threads=None):
+    """Load a model file with the requested inference backend."""
+    if kind not in _BACKENDS:
+        raise ValueError(f"Unknown inference backend '{kind}'. Expected one of {BACKEND_KINDS}.")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model file not found at {path}")
+    backend = _BACKENDS[kind](path, num_threads=num_threads)
+    logger.info(f"Inference backend '{kind}' loaded from {path} (input {backend.input_shape}, {backend.output_dim} classes)")
+    return backend
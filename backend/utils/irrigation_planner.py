@@ -0,0 +1,125 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Fields the planner overwrites per scenario; everything else comes from the field
+WEATHER_FIELDS = ("Temperature_C", "Humidity", "Rainfall_mm", "Sunlight_Hours", "Wind_Speed_kmh")
+
+# Single-bucket soil water balance (rough agronomic defaults, per day):
+#   moisture += (rain * RAIN_EFFICIENCY + irrigation * method efficiency - ET) * MOISTURE_PCT_PER_MM
+RAIN_EFFICIENCY = 0.8
+MOISTURE_PCT_PER_MM = 0.5
+IRRIGATION_EFFICIENCY = {"drip": 0.9, "sprinkler": 0.75, "flood": 0.6, "surface": 0.6, "furrow": 0.65}
+DEFAULT_EFFICIENCY = 0.7
+
+
+def evapotranspiration_mm(day):
+    """Crude daily crop water loss from sunlight, temperature, humidity and wind."""
+    et = 0.5 * day["Sunlight_Hours"] * (1 + 0.02 * (day["Temperature_C"] - 20))
+    et *= (1 - 0.5 * day["Humidity"] / 100) * (1 + 0.01 * day["Wind_Speed_kmh"])
+    return max(0.0, et)
+
+
+def level_ranks(model_classes, labels, level_order):
+    """Need rank in [0, 1] for each predict_proba column (0 = lowest irrigation level)."""
+    order = [name.lower() for name in level_order]
+    names = [labels[int(code)] for code in model_classes]
+    if not all(n.lower() in order for n in names):
+        logger.warning(f"Irrigation labels {names} not all in level order {list(level_order)}; using encoder order")
+        raw = np.arange(len(names), dtype=np.float64)
+    else:
+        raw = np.array([order.index(n.lower()) for n in names], dtype=np.float64)
+    span = raw.max() - raw.min()
+    return (raw - raw.min()) / span if span else np.zeros(len(names)), names
+
+
+class IrrigationPlanner:
+    """
+    Beam search over daily irrigation amounts for one field and a weather forecast.
+    - Each day every kept scenario is expanded by every candidate amount; soil
+      moisture and Previous_Irrigation_mm follow from the water balance above
+    - All expansions of a day are scored with ONE predict_proba call: the
+      field's encoded row is tiled and only the changing columns are written
+    - Cost per day = expected irrigation level still needed (0-1)
+      + water_weight * amount / max amount; the beam_width cheapest
+      distinct scenarios (by moisture and last amount) survive to the next day
+    model: anything with predict_proba and classes_ (FlatForest or sklearn).
+    """
+
+    def __init__(self, model, encoder, labels, level_order=("Low", "Medium", "High")):
+        self.model = model
+        self.encoder = encoder
+        self.ranks, self.level_names = level_ranks(model.classes_, labels, level_order)
+        # Column positions of the fields written per scenario (absent ones are skipped)
+        planned = WEATHER_FIELDS + ("Soil_Moisture", "Previous_Irrigation_mm")
+        self.col = {name: i for i, name in enumerate(encoder.columns) if name in planned}
+
+    def plan(self, field, forecast, options_mm, beam_width=16, water_weight=0.3):
+        options = np.asarray(sorted(set(float(o) for o in options_mm)), dtype=np.float64)
+        max_option = options.max() if options.max() > 0 else 1.0
+        efficiency = IRRIGATION_EFFICIENCY.get(str(field.get("Irrigation_Type", "")).lower(), DEFAULT_EFFICIENCY)
+        base_row = self.encoder.encode(field)[0]
+        n_days = len(forecast)
+
+        # Beam state, one entry per kept scenario
+        moisture = np.array([float(field["Soil_Moisture"])])
+        cost = np.zeros(1)
+        actions = np.zeros((1, 0), dtype=np.int32)       # option index per day
+        levels = np.zeros((1, 0), dtype=np.int32)        # predicted level (argmax) per day
+        needs = np.zeros((1, 0))
+        moistures = np.zeros((1, 0))
+        scored = 0
+
+        for day in forecast:
+            loss = evapotranspiration_mm(day)
+            # (beam, option) grid, flattened beam-major
+            next_moisture = moisture[:, None] + (
+                day["Rainfall_mm"] * RAIN_EFFICIENCY + options[None, :] * efficiency - loss
+            ) * MOISTURE_PCT_PER_MM
+            next_moisture = np.clip(next_moisture, 0.0, 100.0).ravel()
+            option_idx = np.tile(np.arange(len(options)), len(moisture))
+            parent = np.repeat(np.arange(len(moisture)), len(options))
+
+            rows = np.tile(base_row, (len(next_moisture), 1))
+            values = dict(day, Soil_Moisture=next_moisture, Previous_Irrigation_mm=options[option_idx])
+            for name, i in self.col.items():
+                rows[:, i] = values[name]
+            proba = self.model.predict_proba(rows)
+            scored += len(rows)
+
+            need = proba @ self.ranks
+            total = cost[parent] + need + water_weight * options[option_idx] / max_option
+
+            # Cheapest first, one scenario per (moisture bucket, last amount), then cut to the beam
+            order = np.argsort(total, kind="stable")
+            keys = np.round(next_moisture[order] * 2).astype(np.int64) * len(options) + option_idx[order]
+            _, first = np.unique(keys, return_index=True)
+            keep = order[np.sort(first)][:beam_width]
+
+            moisture, cost = next_moisture[keep], total[keep]
+            actions = np.column_stack([actions[parent[keep]], option_idx[keep]])
+            levels = np.column_stack([levels[parent[keep]], np.argmax(proba[keep], axis=1)])
+            needs = np.column_stack([needs[parent[keep]], need[keep]])
+            moistures = np.column_stack([moistures[parent[keep]], moisture])
+
+        best = int(np.argmin(cost))
+        days = []
+        for d, day in enumerate(forecast):
+            days.append({
+                "day":            d + 1,
+                "date":           day.get("date"),
+                "irrigate_mm":    float(options[actions[best, d]]),
+                "rainfall_mm":    float(day["Rainfall_mm"]),
+                "soil_moisture":  round(float(moistures[best, d]), 2),
+                "irrigation_level": self.level_names[levels[best, d]],
+                "need_score":     round(float(needs[best, d]), 4),
+            })
+        return {
+            "schedule":        days,
+            "total_irrigation_mm": float(options[actions[best]].sum()),
+            "total_cost":      round(float(cost[best]), 4),
+            "scenarios_scored": scored,
+            "model_calls":     n_days,
+        }
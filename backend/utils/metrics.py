@@ -0,0 +1,224 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+# Prometheus text exposition (format 0.0.4) without the prometheus_client dependency.
+# Hot-path cost of an observation: one bisect and a locked add on a pre-bound child.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Timer:
+    __slots__ = ("_child", "_started")
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._started)
+
+
+class _InProgress:
+    __slots__ = ("_child",)
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._child.inc()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.dec()
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount=1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+    def track_inprogress(self):
+        return _InProgress(self)
+
+
+class _HistogramChild:
+    __slots__ = ("_upper", "counts", "sum", "_lock")
+
+    def __init__(self, buckets):
+        self._upper = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self._upper, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwargs):
+        """Child for one label combination. Bind once at import time on hot paths."""
+        if kwargs:
+            values = tuple(kwargs[n] for n in self.labelnames)
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            yield self.name, _label_str(self.labelnames, key), child.value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_num(value)}" for name, labels, value in self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for upper, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", _label_str(self.labelnames, key, f'le="{_num(upper)}"'), cumulative
+            yield f"{self.name}_sum", _label_str(self.labelnames, key), total
+            yield f"{self.name}_count", _label_str(self.labelnames, key), cumulative
+
+
+class Registry:
+    """
+    Holds metrics plus scrape-time callbacks. A callback returns an iterable of
+    (name, kind, help, [(labels_dict, value), ...]) and is only evaluated when
+    /metrics is scraped, so stats that already exist cost nothing per request.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._callbacks = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def register_callback(self, fn):
+        self._callbacks.append(fn)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for fn in self._callbacks:
+            for name, kind, documentation, samples in fn():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_label_str(labels.keys(), labels.values())} {_num(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Shared metrics, bound to label values by each router at import time
+REQUEST_SECONDS = Histogram("agritech_request_duration_seconds", "End-to-end handler latency.", ("endpoint",))
+STAGE_SECONDS = Histogram("agritech_stage_duration_seconds", "Latency of one stage of a request.", ("endpoint", "stage"))
+IN_FLIGHT = Gauge("agritech_requests_in_flight", "Requests currently being handled.", ("endpoint",))
+SUPABASE_SECONDS = Histogram("agritech_supabase_duration_seconds", "Supabase query latency.", ("operation",))
+
+
+def instrument(endpoint):
+    """Decorator for async handlers: in-flight gauge + end-to-end latency. Keeps the signature for FastAPI."""
+    seconds = REQUEST_SECONDS.labels(endpoint)
+    in_flight = IN_FLIGHT.labels(endpoint)
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with in_flight.track_inprogress(), seconds.time():
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,327 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_MODES = ("activate", "shadow")
+
+
+def _label(slot, idx):
+    return slot.class_names[idx] if idx < len(slot.class_names) else f"Unknown_{idx}"
+
+
+class ModelSlot:
+    """
+    Everything one model version needs to serve requests: backend, response
+    table (which carries the class list), executor and micro-batcher.
+    Handlers take the active slot once per request and use only that slot, so a
+    swap never mixes one model's probabilities with another's class list.
+    """
+
+    def __init__(self, spec, version, backend, table, executor, batcher):
+        self.spec = dict(spec)
+        self.version = version
+        self.backend = backend
+        self.table = table
+        self.executor = executor
+        self.batcher = batcher
+        self.loaded_at = time.time()
+        self.in_flight = 0
+
+    @property
+    def class_names(self):
+        return self.table.class_names
+
+    @property
+    def target_size(self):
+        """Input (height, width) expected by the model."""
+        shape = self.backend.input_shape
+        return (shape[1], shape[2]) if len(shape) >= 3 else (224, 224)
+
+    async def start(self):
+        await self.executor.prime()
+        await self.batcher.start()
+
+    async def stop(self):
+        await self.batcher.stop()
+        self.executor.shutdown()
+
+    def info(self):
+        return {
+            "version":     self.version,
+            "backend":     self.backend.name,
+            "model_path":  self.spec.get("model_path"),
+            "class_path":  self.spec.get("class_path"),
+            "classes":     len(self.class_names),
+            "loaded_at":   time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.loaded_at)),
+            "in_flight":   self.in_flight,
+        }
+
+
+class ShadowStats:
+    """Agreement and latency of a shadow candidate against the active model."""
+
+    def __init__(self, window=1024):
+        self.compared = 0
+        self.agreed = 0
+        self.errors = 0
+        self.active_ms = deque(maxlen=window)
+        self.candidate_ms = deque(maxlen=window)
+        self.disagreements = deque(maxlen=20)
+
+    def record(self, active_label, candidate_label, active_ms, candidate_ms):
+        self.compared += 1
+        if active_label == candidate_label:
+            self.agreed += 1
+        else:
+            self.disagreements.append({"active": active_label, "candidate": candidate_label})
+        self.active_ms.append(active_ms)
+        self.candidate_ms.append(candidate_ms)
+
+    @staticmethod
+    def _latency(samples):
+        if not samples:
+            return {"mean_ms": 0.0, "p95_ms": 0.0}
+        ordered = sorted(samples)
+        return {
+            "mean_ms": round(sum(ordered) / len(ordered), 3),
+            "p95_ms":  round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        }
+
+    def snapshot(self):
+        return {
+            "compared":       self.compared,
+            "agreement":      round(self.agreed / self.compared, 4) if self.compared else None,
+            "errors":         self.errors,
+            "active_latency": self._latency(self.active_ms),
+            "candidate_latency": self._latency(self.candidate_ms),
+            "recent_disagreements": list(self.disagreements),
+        }
+
+
+class ModelRegistry:
+    """
+    Active model plus an optional shadow candidate.
+    - load(): build a slot off the event loop (load, validate, warm up), start
+      its workers, then either swap it in as active or attach it as candidate
+    - One load at a time: start_load()/load() claim `loading` synchronously
+      and raise RuntimeError while another load holds it
+    - The swap is one assignment; the retired slot finishes its in-flight
+      requests (up to drain_timeout_s) before its workers are stopped, and
+      close() waits for those drains before stopping the remaining slots
+    - Shadow mode: a sampled fraction of live /predict images is re-scored by
+      the candidate in the background; responses are never affected
+    build_slot(spec) is a blocking callable returning a ModelSlot.
+    on_activate(new_slot, old_slot) runs on the event loop right after a swap.
+    """
+
+    def __init__(self, build_slot, shadow_fraction=0.1, drain_timeout_s=30.0, on_activate=None):
+        self.build_slot = build_slot
+        self.shadow_fraction = shadow_fraction
+        self.drain_timeout_s = drain_timeout_s
+        self.on_activate = on_activate
+        self.active = None
+        self.candidate = None
+        self.previous_spec = None
+        self.loading = None
+        self.last_error = None
+        self.shadow_stats = ShadowStats()
+        self.events = deque(maxlen=50)
+        self._tasks = set()
+        self._drains = {}         # drain task -> retiring slot
+
+    def _event(self, kind, **detail):
+        self.events.append({"at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "event": kind, **detail})
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    # ── request side ─────────────────────────────────────────────────────────
+    def acquire(self):
+        """Active slot for one request (None if no model); pair with release()."""
+        slot = self.active
+        if slot is not None:
+            slot.in_flight += 1
+        return slot
+
+    @staticmethod
+    def release(slot):
+        if slot is not None:
+            slot.in_flight -= 1
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+    def _claim(self, spec, mode):
+        # No await between the check and the assignment, so two callers cannot both pass
+        if mode not in REGISTRY_MODES:
+            raise ValueError(f"Unknown mode '{mode}'. Expected one of {REGISTRY_MODES}.")
+        if self.loading is not None:
+            raise RuntimeError("A model load is already in progress.")
+        self.loading = dict(spec, mode=mode)
+
+    async def load(self, spec, mode="activate"):
+        """Load, validate and warm up a model, then activate it or attach it as shadow candidate."""
+        self._claim(spec, mode)
+        return await self._load(spec, mode)
+
+    async def _load(self, spec, mode):
+        started = time.perf_counter()
+        slot = None
+        # Shielded: a cancelled load leaves the thread running, and the slot it
+        # eventually returns must still be shut down
+        build = asyncio.ensure_future(asyncio.to_thread(self.build_slot, spec))
+        try:
+            slot = await asyncio.shield(build)
+            await slot.start()
+        except BaseException as e:
+            if slot is not None:
+                await self._discard(slot)
+            elif not build.done():
+                build.add_done_callback(self._discard_built)
+            if isinstance(e, Exception):
+                self.last_error = str(e)
+                self._event("load_failed", model_path=spec.get("model_path"), error=str(e))
+                logger.error(f"Model load failed for {spec.get('model_path')}: {e}")
+            raise
+        finally:
+            self.loading = None
+        seconds = round(time.perf_counter() - started, 2)
+        self._event("loaded", version=slot.version, mode=mode, seconds=seconds)
+        logger.info(f"Model {slot.version} loaded in {seconds}s ({mode})")
+        if mode == "shadow":
+            self.set_candidate(slot)
+        else:
+            self.activate(slot)
+        return slot
+
+    @staticmethod
+    async def _discard(slot):
+        """Stop a slot that never went live (start failed or the load was cancelled)."""
+        try:
+            await slot.stop()
+        except Exception as e:
+            logger.warning(f"Stopping discarded model {slot.version} failed: {e}")
+
+    @staticmethod
+    def _discard_built(build):
+        # Built after its load was cancelled: never started, so only the executor holds resources
+        if build.cancelled() or build.exception() is not None:
+            return
+        slot = build.result()
+        slot.executor.shutdown()
+        logger.info(f"Model {slot.version} discarded (load was cancelled)")
+
+    def start_load(self, spec, mode="activate"):
+        """Background load; progress and errors are visible in snapshot(). Raises RuntimeError if busy."""
+        self._claim(spec, mode)
+
+        async def run():
+            try:
+                await self._load(spec, mode)
+            except Exception:
+                pass
+        return self._spawn(run())
+
+    def activate(self, slot):
+        old, self.active = self.active, slot
+        if self.on_activate is not None:
+            self.on_activate(slot, old)
+        if old is not None:
+            self.previous_spec = old.spec
+            self._event("activated", version=slot.version, replaced=old.version)
+            self._retire(old)
+        else:
+            self._event("activated", version=slot.version)
+
+    def set_candidate(self, slot):
+        old, self.candidate = self.candidate, slot
+        self.shadow_stats = ShadowStats()
+        if old is not None:
+            self._retire(old)
+
+    def promote(self):
+        """Make the shadow candidate the active model."""
+        slot, self.candidate = self.candidate, None
+        if slot is None:
+            raise ValueError("No candidate model to promote.")
+        self.activate(slot)
+        return slot
+
+    def drop_candidate(self):
+        slot, self.candidate = self.candidate, None
+        if slot is not None:
+            self._event("candidate_dropped", version=slot.version)
+            self._retire(slot)
+        return slot
+
+    def _retire(self, slot):
+        async def drain():
+            deadline = time.monotonic() + self.drain_timeout_s
+            while slot.in_flight > 0 and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            await slot.stop()
+            logger.info(f"Model {slot.version} retired")
+        task = self._spawn(drain())
+        self._drains[task] = slot
+        task.add_done_callback(lambda t: self._drains.pop(t, None))
+
+    async def close(self):
+        # Loads and shadow scoring are abandoned; retiring slots get to finish draining
+        abandoned = [task for task in self._tasks if task not in self._drains]
+        for task in abandoned:
+            task.cancel()
+        if abandoned:
+            # Lets a cancelled load stop the slot it had already built
+            await asyncio.wait(abandoned, timeout=5)
+        if self._drains:
+            await asyncio.wait(list(self._drains), timeout=self.drain_timeout_s + 5)
+        # A drain that is still stuck is cancelled, and its slot is stopped here instead
+        for task, slot in list(self._drains.items()):
+            task.cancel()
+            await slot.stop()
+        for slot in (self.active, self.candidate):
+            if slot is not None:
+                await slot.stop()
+
+    # ── shadow scoring ───────────────────────────────────────────────────────
+    def maybe_shadow(self, active_slot, image, active_probs, active_ms):
+        """Fire-and-forget re-scoring of one image by the candidate (sampled)."""
+        candidate = self.candidate
+        if candidate is None or random.random() >= self.shadow_fraction:
+            return
+        self._spawn(self._shadow_score(active_slot, candidate, image, active_probs, active_ms))
+
+    async def _shadow_score(self, active_slot, candidate, image, active_probs, active_ms):
+        candidate.in_flight += 1
+        try:
+            started = time.perf_counter()
+            probs = await candidate.batcher.submit(image)
+            candidate_ms = (time.perf_counter() - started) * 1000
+            # Compared by label, so candidates with a re-ordered class list still line up
+            active_label = _label(active_slot, int(np.argmax(active_probs)))
+            candidate_label = _label(candidate, int(np.argmax(probs)))
+            self.shadow_stats.record(active_label, candidate_label, active_ms, candidate_ms)
+        except Exception as e:
+            self.shadow_stats.errors += 1
+            logger.error(f"Shadow scoring failed on {candidate.version}: {e}")
+        finally:
+            candidate.in_flight -= 1
+
+    def snapshot(self):
+        return {
+            "active":        self.active.info() if self.active is not None else None,
+            "candidate":     self.candidate.info() if self.candidate is not None else None,
+            "shadow_fraction": self.shadow_fraction,
+            "shadow":        self.shadow_stats.snapshot() if self.candidate is not None else None,
+            "previous":      self.previous_spec,
+            "loading":       self.loading,
+            "last_error":    self.last_error,
+            "events":        list(self.events),
+        }
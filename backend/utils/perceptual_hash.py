@@ -0,0 +1,127 @@
+import logging
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def _area_resize(gray, rows, cols):
+    """Box-filter downscale by averaging pixel bins (no PIL round-trip)."""
+    h, w = gray.shape
+    row_edges = np.linspace(0, h, rows + 1).astype(int)[:-1]
+    col_edges = np.linspace(0, w, cols + 1).astype(int)[:-1]
+    sums = np.add.reduceat(np.add.reduceat(gray, row_edges, axis=0), col_edges, axis=1)
+    counts = np.outer(np.diff(np.append(row_edges, h)), np.diff(np.append(col_edges, w)))
+    return sums / counts
+
+
+def dhash(img_array, hash_size=8):
+    """
+    64-bit difference hash of a preprocessed image array.
+    Accepts (H, W, 3) or (1, H, W, 3), float or uint8 — the array produced by
+    preprocess_image is already downscaled, so no second decode is needed.
+    """
+    arr = np.asarray(img_array)
+    if arr.ndim == 4:
+        arr = arr[0]
+    gray = arr[..., :3].astype(np.float32) @ _LUMA
+    small = _area_resize(gray, hash_size, hash_size + 1)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateIndex:
+    """
+    Multi-index hash table for Hamming-distance lookups over 64-bit hashes.
+    The hash is split into max_distance + 1 chunks; by the pigeonhole principle
+    any hash within max_distance matches at least one chunk exactly, so only
+    those buckets are scanned. Entries expire after ttl_seconds and the index
+    is LRU-bounded to max_entries.
+    """
+
+    def __init__(self, max_distance=4, max_entries=10000, ttl_seconds=3600):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+
+        n_chunks = max_distance + 1
+        widths = [HASH_BITS // n_chunks + (1 if i < HASH_BITS % n_chunks else 0) for i in range(n_chunks)]
+        self._chunks = []   # (shift, mask) per chunk
+        shift = HASH_BITS
+        for width in widths:
+            shift -= width
+            self._chunks.append((shift, (1 << width) - 1))
+        self._tables = [{} for _ in self._chunks]
+        self._entries = OrderedDict()   # hash -> (expires_at, value)
+
+        self.hits = 0
+        self.misses = 0
+
+    def _keys(self, h):
+        return [(h >> shift) & mask for shift, mask in self._chunks]
+
+    def add(self, h, value):
+        if h in self._entries:
+            self._remove(h)
+        self._entries[h] = (time.time() + self.ttl, value)
+        for table, key in zip(self._tables, self._keys(h)):
+            table.setdefault(key, set()).add(h)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, h):
+        self._entries.pop(h, None)
+        for table, key in zip(self._tables, self._keys(h)):
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(h)
+                if not bucket:
+                    del table[key]
+
+    def lookup(self, h, accept=None):
+        """
+        Return (distance, value) of the closest live entry within max_distance, else None.
+        accept: optional predicate on the stored value (e.g. same model version).
+        """
+        now = time.time()
+        candidates = set()
+        for table, key in zip(self._tables, self._keys(h)):
+            candidates |= table.get(key, set())
+
+        best = None
+        for c in candidates:
+            expires_at, value = self._entries[c]
+            if expires_at <= now:
+                self._remove(c)
+                continue
+            if accept is not None and not accept(value):
+                continue
+            d = hamming(h, c)
+            if d <= self.max_distance and (best is None or d < best[0]):
+                best = (d, c, value)
+
+        if best is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(best[1])
+        self.hits += 1
+        return best[0], best[2]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries":      len(self._entries),
+            "max_distance": self.max_distance,
+            "hits":         self.hits,
+            "misses":       self.misses,
+            "hit_ratio":    round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCache:
+    """
+    Content-addressed cache for /predict results.
+    - Key: SHA-256 of the raw image bytes + model version + language
+    - In-memory LRU tier bounded by entry count and payload bytes, with a TTL
+    - Optional SQLite tier on disk that survives restarts
+    The *_async methods are for the event loop: the memory tier is served
+    inline, SQLite reads/writes and hashing run in worker threads. The two
+    tiers have separate locks, so a slow disk query never blocks a memory hit.
+    """
+
+    def __init__(self, max_entries=2048, max_bytes=64 * 1024 * 1024, ttl_seconds=86400,
+                 disk_path=None, disk_max_entries=100000):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self.disk_path = disk_path
+        self.disk_max_entries = disk_max_entries
+
+        self._entries = OrderedDict()   # key -> (expires_at, payload_bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()        # memory tier
+        self._disk_lock = threading.Lock()   # SQLite connection
+        self._db = None
+        self._disk_writes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if disk_path:
+            self._open_disk(disk_path)
+
+    @staticmethod
+    def image_digest(image_bytes):
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    @classmethod
+    async def image_digest_async(cls, image_bytes):
+        """SHA-256 off the event loop (hashlib releases the GIL on large buffers)."""
+        return await asyncio.to_thread(cls.image_digest, image_bytes)
+
+    @staticmethod
+    def make_key(image_digest, model_version, language):
+        return f"{image_digest}:{model_version}:{language}"
+
+    def _open_disk(self, path):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "key TEXT PRIMARY KEY, payload BLOB NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_predictions_access ON predictions(last_access)")
+            logger.info(f"Prediction cache disk tier at {path}")
+        except Exception as e:
+            logger.error(f"Prediction cache disk tier disabled: {e}")
+            self._db = None
+
+    def get(self, key):
+        payload = self.get_encoded(key)
+        return json.loads(payload) if payload is not None else None
+
+    def get_encoded(self, key):
+        """Cached result as the stored JSON bytes (no decode)."""
+        payload = self._get_memory(key)
+        if payload is None and self._db is not None:
+            payload = self._get_disk(key)
+        if payload is None:
+            self.misses += 1
+        return payload
+
+    async def get_encoded_async(self, key):
+        payload = self._get_memory(key)
+        if payload is None and self._db is not None:
+            payload = await asyncio.to_thread(self._get_disk, key)
+        if payload is None:
+            self.misses += 1
+        return payload
+
+    def _get_memory(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+            self._drop(key)
+            return None
+
+    def _get_disk(self, key):
+        """Blocking SQLite lookup; a hit is promoted to the memory tier."""
+        now = time.time()
+        with self._disk_lock:
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT payload, expires_at FROM predictions WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._db.execute("UPDATE predictions SET last_access = ? WHERE key = ?", (now, key))
+            except Exception as e:
+                logger.error(f"Prediction cache disk read failed: {e}")
+                return None
+        payload, expires_at = bytes(row[0]), row[1]
+        with self._lock:
+            self._store(key, expires_at, payload)
+            self.disk_hits += 1
+        return payload
+
+    def put(self, key, value):
+        self.put_encoded(key, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def put_encoded(self, key, payload):
+        """Store an already JSON-encoded result."""
+        now = time.time()
+        with self._lock:
+            self._store(key, now + self.ttl, payload)
+        if self._db is not None:
+            self._put_disk(key, payload, now + self.ttl, now)
+
+    def put_encoded_async(self, key, payload):
+        """Memory tier now; the SQLite write is handed to a worker thread and not awaited."""
+        now = time.time()
+        with self._lock:
+            self._store(key, now + self.ttl, payload)
+        if self._db is not None:
+            asyncio.get_running_loop().run_in_executor(None, self._put_disk, key, payload, now + self.ttl, now)
+
+    def _put_disk(self, key, payload, expires_at, now):
+        with self._disk_lock:
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO predictions (key, payload, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, payload, expires_at, now)
+                )
+                self._disk_writes += 1
+                if self._disk_writes % 256 == 0:
+                    self._prune_disk(now)
+            except Exception as e:
+                logger.error(f"Prediction cache disk write failed: {e}")
+
+    def _store(self, key, expires_at, payload):
+        if key in self._entries:
+            self._drop(key)
+        if len(payload) > self.max_bytes:
+            return
+        self._entries[key] = (expires_at, payload)
+        self._bytes += len(payload)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            old_key, _ = next(iter(self._entries.items()))
+            self._drop(old_key)
+            self.evictions += 1
+
+    def _drop(self, key):
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def _prune_disk(self, now):
+        self._db.execute("DELETE FROM predictions WHERE expires_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM predictions WHERE key IN ("
+            "SELECT key FROM predictions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.disk_max_entries,)
+        )
+
+    def close(self):
+        with self._disk_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries":    len(self._entries),
+            "bytes":      self._bytes,
+            "hits":       self.hits,
+            "disk_hits":  self.disk_hits,
+            "misses":     self.misses,
+            "evictions":  self.evictions,
+            "hit_ratio":  round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "disk_tier":  self._db is not None,
+        }
@@ -0,0 +1,79 @@
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def parse_resolutions(spec):
+    """'Soil_Moisture=0.5,Temperature_C=0.5' -> {'Soil_Moisture': 0.5, 'Temperature_C': 0.5}"""
+    steps = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, step = part.partition("=")
+        steps[name.strip()] = float(step)
+    return steps
+
+
+class QuantizedMemo:
+    """
+    LRU memo for model outputs keyed on inputs snapped to a grid.
+    - Numeric fields listed in steps are rounded to the nearest multiple of
+      their step; other fields (categories, unlisted numbers) are used as-is
+    - quantize() also returns the snapped record, and callers score that, so
+      every input in a bucket gets exactly the answer the bucket's key maps to
+    - Bounded by entry count; single-threaded (event loop) use
+    """
+
+    def __init__(self, steps, max_entries=50000):
+        self.steps = dict(steps)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def quantize(self, record):
+        """(hashable key, record with quantized values)."""
+        key = []
+        snapped = dict(record)
+        for name, value in record.items():
+            step = self.steps.get(name)
+            if step and isinstance(value, (int, float)):
+                bucket = round(value / step)
+                snapped[name] = round(bucket * step, 9)
+                key.append(bucket)
+            else:
+                key.append(value)
+        return tuple(key), snapped
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries":     len(self._entries),
+            "max_entries": self.max_entries,
+            "hits":        self.hits,
+            "misses":      self.misses,
+            "evictions":   self.evictions,
+            "hit_ratio":   round(self.hits / lookups, 4) if lookups else 0.0,
+            "resolutions": self.steps,
+        }
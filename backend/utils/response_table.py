@@ -0,0 +1,160 @@
+import hashlib
+import json
+import logging
+import os
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ("Low", "Medium", "High")
+DEFAULT_LANGUAGE = "en"
+
+# Response field -> key in models/translations.py
+LOCALIZED_FIELDS = {
+    "cause":      "cause",
+    "treatment":  "solution",
+    "prevention": "prevention",
+    "fertilizer": "fertilizer_advice",
+}
+
+
+def severity_for(confidence):
+    """Severity band from a 0-100 confidence."""
+    if confidence >= 85:
+        return "High"
+    if confidence >= 60:
+        return "Medium"
+    return "Low"
+
+
+def _json(value):
+    # Same encoding as FastAPI's JSONResponse
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def source_signature(paths):
+    """(path, mtime_ns, size) per source file; None for a missing file."""
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            signature.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+class ResponseEntry:
+    """
+    Fully resolved /predict payload for one (class, severity, language), minus
+    the confidence. The JSON is pre-encoded as the bytes before and after the
+    confidence value, so serving a result is a single concatenation.
+    """
+
+    __slots__ = ("payload", "prefix", "suffix")
+
+    def __init__(self, disease, raw_class, severity, info):
+        self.payload = MappingProxyType({
+            "disease":    disease,
+            "raw_class":  raw_class,
+            "severity":   severity,
+            "cause":      info["cause"],
+            "treatment":  info["treatment"],
+            "prevention": info["prevention"],
+            "fertilizer": info["fertilizer"],
+        })
+        self.prefix = b'{"disease":' + _json(disease) + b',"raw_class":' + _json(raw_class) + b',"confidence":'
+        self.suffix = b"".join(
+            b"," + _json(key) + b":" + _json(self.payload[key])
+            for key in ("severity", "cause", "treatment", "prevention", "fertilizer")
+        ) + b"}"
+
+    def render(self, confidence, extra=None):
+        """Response as a dict, in the field order the frontend expects."""
+        p = self.payload
+        result = {
+            "disease":    p["disease"],
+            "raw_class":  p["raw_class"],
+            "confidence": round(confidence, 2),
+            "severity":   p["severity"],
+            "cause":      p["cause"],
+            "treatment":  p["treatment"],
+            "prevention": p["prevention"],
+            "fertilizer": p["fertilizer"],
+        }
+        if extra:
+            result.update(extra)
+        return result
+
+    def encode(self, confidence, extra=None):
+        """Response as JSON bytes; extra keys are appended after the fixed fields."""
+        body = self.prefix + _json(round(confidence, 2)) + self.suffix
+        if extra:
+            body = body[:-1] + b"".join(b"," + _json(k) + b":" + _json(v) for k, v in extra.items()) + b"}"
+        return body
+
+
+class ResponseTable:
+    """
+    Immutable table of ResponseEntry objects indexed by
+    (class_index, severity, language), built once from the class names, the
+    recommendation sources and the static translations. Replaced as a whole
+    when any source changes, so readers never see a half-built table.
+    """
+
+    def __init__(self, class_names, resolve_info, translations, version=""):
+        self.class_names = tuple(class_names)
+        self.version = version
+        self._resolve_info = resolve_info
+        self._translations = translations
+        self.languages = (DEFAULT_LANGUAGE,) + tuple(sorted(
+            {lang for per_class in translations.values() for lang in per_class} - {DEFAULT_LANGUAGE}
+        ))
+
+        entries = {}
+        for class_index in range(len(self.class_names)):
+            for severity in SEVERITIES:
+                for language in self.languages:
+                    entries[(class_index, severity, language)] = self._build_entry(class_index, severity, language)
+        self._entries = MappingProxyType(entries)
+
+    def _build_entry(self, class_index, severity, language):
+        if class_index < len(self.class_names):
+            class_label = self.class_names[class_index]
+        else:
+            class_label = f"Unknown_Disease_Index_{class_index}"
+
+        info = dict(self._resolve_info(class_label, severity))
+        # Format disease name for display (e.g. "Potato___Early_Blight" → "Potato Early Blight")
+        display_name = class_label.replace("___", " ").replace("_", " ")
+
+        localized = self._translations.get(class_index, {}).get(language)
+        if localized:
+            display_name = localized.get("disease", display_name)
+            for field, source_key in LOCALIZED_FIELDS.items():
+                info[field] = localized.get(source_key, info[field])
+
+        return ResponseEntry(display_name, class_label, severity, info)
+
+    def lookup(self, class_index, confidence, language=DEFAULT_LANGUAGE):
+        """Entry for a prediction; unknown languages fall back to English."""
+        severity = severity_for(confidence)
+        if language not in self.languages:
+            language = DEFAULT_LANGUAGE
+        entry = self._entries.get((class_index, severity, language))
+        if entry is None:
+            # Model emitted an index beyond class_names.json; rare, so not tabled
+            entry = self._build_entry(class_index, severity, language)
+        return entry
+
+    def stats(self):
+        return {
+            "version":   self.version,
+            "classes":   len(self.class_names),
+            "languages": list(self.languages),
+            "entries":   len(self._entries),
+        }
+
+    @staticmethod
+    def version_for(signature):
+        return hashlib.sha1(repr(signature).encode("utf-8")).hexdigest()[:12]
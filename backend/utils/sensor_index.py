@@ -0,0 +1,85 @@
+import logging
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Reported sensor_type variants -> canonical key used by smart-advice
+SENSOR_ALIASES = {
+    "moisture": "moisture", "soil_moisture": "moisture",
+    "temp": "temperature", "temperature": "temperature", "soil_temp": "temperature",
+    "soil_temperature": "temperature",
+    "humidity": "humidity", "air_humidity": "humidity",
+    "ph": "ph", "soil_ph": "ph",
+    "nitrogen": "nitrogen", "n": "nitrogen",
+    "phosphorus": "phosphorus", "p": "phosphorus",
+    "potassium": "potassium", "k": "potassium",
+}
+GENERAL_CROP = "general"
+
+
+def canonical_sensor_key(sensor_type):
+    s_type = (sensor_type or "").lower()
+    return SENSOR_ALIASES.get(s_type, s_type)
+
+
+def reading_epoch(timestamp):
+    """Seconds since the epoch for an ISO 8601 timestamp (now if missing/unparsable)."""
+    if isinstance(timestamp, str):
+        try:
+            return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+class LatestReadingIndex:
+    """
+    Newest value per (user_id, crop_id, canonical sensor key), in memory.
+    - update() is called on ingest; an older reading never replaces a newer one,
+      so late or out-of-order rows (bulk uploads, hydration) are harmless
+    - latest(user_id) is a dict walk over that user's crops only, independent
+      of how much history iot_sensors holds
+    Single-threaded (event loop) use; rows are fetched off-loop and applied
+    with update_many().
+    """
+
+    def __init__(self):
+        self._users = {}          # user_id -> {crop_key: {sensor_key: (epoch, value)}}
+        self.readings = 0
+        self.hydrated = False
+
+    def update(self, user_id, crop_id, sensor_type, value, timestamp=None):
+        epoch = reading_epoch(timestamp)
+        crops = self._users.setdefault(user_id, {})
+        sensors = crops.setdefault(crop_id or GENERAL_CROP, {})
+        key = canonical_sensor_key(sensor_type)
+        current = sensors.get(key)
+        if current is None:
+            self.readings += 1
+        elif current[0] > epoch:
+            return epoch
+        sensors[key] = (epoch, value)
+        return epoch
+
+    def update_many(self, rows):
+        """Rows read from iot_sensors (user_id, crop_id, sensor_type, value, timestamp)."""
+        for r in rows:
+            self.update(r.get("user_id"), r.get("crop_id"), r.get("sensor_type"), r.get("value"), r.get("timestamp"))
+
+    def has_user(self, user_id):
+        return user_id in self._users
+
+    def latest(self, user_id):
+        """{crop_key: {sensor_key: value}} for one user ({} if unknown)."""
+        return {
+            crop: {key: value for key, (_, value) in sensors.items()}
+            for crop, sensors in self._users.get(user_id, {}).items()
+        }
+
+    def stats(self):
+        return {
+            "users":     len(self._users),
+            "readings":  self.readings,
+            "hydrated":  self.hydrated,
+        }
@@ -0,0 +1,222 @@
+import logging
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.sensor_index import GENERAL_CROP, canonical_sensor_key, reading_epoch
+
+logger = logging.getLogger(__name__)
+
+# Bucket width in seconds per rollup resolution ("raw" keeps individual points)
+RESOLUTIONS = {"raw": 0, "5m": 300, "1h": 3600, "1d": 86400}
+DEFAULT_CAPACITY = {"raw": 720, "5m": 2016, "1h": 1440, "1d": 730}
+
+RAW_POINT_BYTES = 8 + 4          # float64 epoch + float32 value
+BUCKET_BYTES = 4 + 4 + 8 + 4 + 4  # int32 bucket, int32 count, float64 sum, float32 min, float32 max
+
+
+def series_bytes(capacity):
+    """Array memory of one series for a {resolution: slots} capacity."""
+    return sum(
+        slots * (RAW_POINT_BYTES if RESOLUTIONS[name] == 0 else BUCKET_BYTES)
+        for name, slots in capacity.items()
+    )
+
+
+class RawRing:
+    """The last `capacity` points in arrival order."""
+
+    def __init__(self, capacity):
+        self.epoch = np.full(capacity, np.nan, dtype=np.float64)
+        self.value = np.zeros(capacity, dtype=np.float32)
+        self.head = 0
+
+    def add(self, epoch, value):
+        i = self.head % len(self.epoch)
+        self.epoch[i] = epoch
+        self.value[i] = value
+        self.head += 1
+
+    def query(self, start, end):
+        mask = (self.epoch >= start) & (self.epoch <= end)
+        order = np.argsort(self.epoch[mask], kind="stable")
+        t = self.epoch[mask][order]
+        v = self.value[mask][order].astype(np.float64)
+        return {"t": t.astype(np.int64).tolist(), "value": np.round(v, 4).tolist()}
+
+    @property
+    def nbytes(self):
+        return self.epoch.nbytes + self.value.nbytes
+
+
+class BucketRing:
+    """
+    Fixed-width time buckets in a ring: bucket b lives in slot b % capacity.
+    A slot holding an older bucket is reset when a newer bucket lands on it;
+    a point for a bucket older than the slot's current one has aged out of
+    the window and is ignored. Out-of-order points inside the window are fine.
+    """
+
+    def __init__(self, width, capacity):
+        self.width = width
+        self.bucket = np.full(capacity, -1, dtype=np.int32)
+        self.count = np.zeros(capacity, dtype=np.int32)
+        self.sum = np.zeros(capacity, dtype=np.float64)
+        self.min = np.zeros(capacity, dtype=np.float32)
+        self.max = np.zeros(capacity, dtype=np.float32)
+
+    def add(self, epoch, value):
+        b = int(epoch // self.width)
+        i = b % len(self.bucket)
+        current = self.bucket[i]
+        if current > b:
+            return False
+        if current < b:
+            self.bucket[i] = b
+            self.count[i] = 1
+            self.sum[i] = value
+            self.min[i] = value
+            self.max[i] = value
+            return True
+        self.count[i] += 1
+        self.sum[i] += value
+        if value < self.min[i]:
+            self.min[i] = value
+        if value > self.max[i]:
+            self.max[i] = value
+        return True
+
+    def query(self, start, end):
+        mask = (self.bucket >= int(start // self.width)) & (self.bucket <= int(end // self.width)) & (self.count > 0)
+        order = np.argsort(self.bucket[mask], kind="stable")
+        count = self.count[mask][order]
+        return {
+            "t":     (self.bucket[mask][order].astype(np.int64) * self.width).tolist(),
+            "min":   np.round(self.min[mask][order].astype(np.float64), 4).tolist(),
+            "max":   np.round(self.max[mask][order].astype(np.float64), 4).tolist(),
+            "mean":  np.round(self.sum[mask][order] / count, 4).tolist(),
+            "count": count.tolist(),
+        }
+
+    @property
+    def nbytes(self):
+        return self.bucket.nbytes + self.count.nbytes + self.sum.nbytes + self.min.nbytes + self.max.nbytes
+
+
+class RollupSeries:
+    """One (user, crop, sensor) series at every resolution."""
+
+    def __init__(self, capacity):
+        self.rings = {
+            name: RawRing(slots) if RESOLUTIONS[name] == 0 else BucketRing(RESOLUTIONS[name], slots)
+            for name, slots in capacity.items()
+        }
+
+    def add(self, epoch, value):
+        for ring in self.rings.values():
+            ring.add(epoch, value)
+
+    @property
+    def nbytes(self):
+        return sum(ring.nbytes for ring in self.rings.values())
+
+
+class RollupStore:
+    """
+    Min/max/mean rollups of sensor readings per (user_id, crop_id, sensor),
+    updated incrementally on ingest and queried without touching iot_sensors.
+    - Only sensors listed in `sensors` (canonical keys) are tracked
+    - Memory is preallocated per series (series_bytes(capacity)) and the
+      number of series is capped at max_series; the least recently updated
+      series is evicted to make room
+    - A reading passed with its iot_sensors id is counted once, however often
+      it is seen (own ingest, then again from the table); each id is kept with
+      the iot_sensors.seq it was read with (None until the table is read), until
+      forget_through() drops those at or below anything re-read, and at most
+      max_ids of them (oldest forgotten first)
+    Single-threaded (event loop) use.
+    """
+
+    def __init__(self, sensors, capacity=None, max_series=1000, max_ids=100000):
+        self.sensors = {canonical_sensor_key(s) for s in sensors}
+        self.capacity = {name: int(slots) for name, slots in (capacity or DEFAULT_CAPACITY).items() if slots}
+        unknown = set(self.capacity) - set(RESOLUTIONS)
+        if unknown:
+            raise ValueError(f"Unknown rollup resolution(s): {sorted(unknown)}")
+        self.max_series = max_series
+        self._series = OrderedDict()
+        self.max_ids = max_ids
+        self._seen = OrderedDict()    # reading id -> iot_sensors.seq (None until read back), in arrival order
+        self.points = 0
+        self.duplicates = 0
+        self.evictions = 0
+
+    def add(self, user_id, crop_id, sensor_type, value, timestamp=None, reading_id=None, seq=None):
+        key = canonical_sensor_key(sensor_type)
+        if key not in self.sensors or value is None:
+            return False
+        epoch = reading_epoch(timestamp)
+        if reading_id is not None:
+            if reading_id in self._seen:
+                if seq is not None:
+                    self._seen[reading_id] = seq
+                self.duplicates += 1
+                return False
+            self._seen[reading_id] = seq
+            if len(self._seen) > self.max_ids:
+                self._seen.popitem(last=False)
+        series_key = (user_id, crop_id or GENERAL_CROP, key)
+        series = self._series.get(series_key)
+        if series is None:
+            while len(self._series) >= self.max_series:
+                self._series.popitem(last=False)
+                self.evictions += 1
+            series = self._series[series_key] = RollupSeries(self.capacity)
+        else:
+            self._series.move_to_end(series_key)
+        series.add(epoch, float(value))
+        self.points += 1
+        return True
+
+    def forget_through(self, seq):
+        """Drop remembered ids read back with iot_sensors.seq <= seq (never re-read after that)."""
+        self._seen = OrderedDict((rid, s) for rid, s in self._seen.items() if s is None or s > seq)
+
+    def add_many(self, rows):
+        """Rows shaped like iot_sensors (id, seq, user_id, crop_id, sensor_type, value, timestamp)."""
+        # Oldest first, so each series' raw ring keeps the newest points
+        for r in sorted(rows, key=lambda r: reading_epoch(r.get("timestamp"))):
+            self.add(r.get("user_id"), r.get("crop_id"), r.get("sensor_type"), r.get("value"), r.get("timestamp"),
+                     r.get("id"), r.get("seq"))
+
+    def query(self, user_id, crop_id, resolution, start, end, sensors=None):
+        """{sensor: column-wise points} for one user and crop within [start, end] (epochs)."""
+        if resolution not in self.capacity:
+            raise ValueError(f"Unknown resolution '{resolution}', expected one of {list(self.capacity)}")
+        crop = crop_id or GENERAL_CROP
+        wanted = {canonical_sensor_key(s) for s in sensors} if sensors else self.sensors
+        return {
+            key: self._series[(user_id, crop, key)].rings[resolution].query(start, end)
+            for key in sorted(wanted)
+            if (user_id, crop, key) in self._series
+        }
+
+    def window_s(self, resolution):
+        """Time span a resolution covers (raw: 0, bounded by points instead)."""
+        return RESOLUTIONS[resolution] * self.capacity[resolution]
+
+    def stats(self):
+        per_series = series_bytes(self.capacity)
+        return {
+            "series":           len(self._series),
+            "max_series":       self.max_series,
+            "points":           self.points,
+            "duplicates":       self.duplicates,
+            "tracked_ids":      len(self._seen),
+            "evictions":        self.evictions,
+            "bytes_per_series": per_series,
+            "bytes":            per_series * len(self._series),
+            "max_bytes":        per_series * self.max_series,
+            "capacity":         self.capacity,
+            "sensors":          sorted(self.sensors),
+        }
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SubsystemUnavailable(Exception):
+    """Raised by a loader when its subsystem is intentionally off (missing config or files)."""
+
+
+class StartupReport:
+    """
+    Runs startup loaders concurrently off the event loop and records, per
+    component, whether it came up and how long it took.
+    Statuses: pending, ready, unavailable (not configured), failed.
+    """
+
+    def __init__(self):
+        self.components = {}
+        self.total_seconds = None
+
+    def register(self, name, required=False):
+        self.components[name] = {"status": "pending", "required": required, "seconds": None, "detail": None}
+
+    async def run(self, name, loader, required=False):
+        """Run a blocking loader in a worker thread and record its outcome."""
+        if name not in self.components:
+            self.register(name, required)
+        component = self.components[name]
+        started = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(loader)
+            component["status"] = "ready"
+            return result
+        except SubsystemUnavailable as e:
+            component["status"] = "unavailable"
+            component["detail"] = str(e)
+        except Exception as e:
+            component["status"] = "failed"
+            component["detail"] = str(e)
+            logger.error(f"Startup component '{name}' failed: {e}")
+        finally:
+            component["seconds"] = round(time.perf_counter() - started, 3)
+            logger.info(f"Startup component '{name}': {component['status']} in {component['seconds']:.3f}s")
+        return None
+
+    async def run_all(self, loaders):
+        """loaders: iterable of (name, loader, required). All run concurrently."""
+        started = time.perf_counter()
+        for name, _, required in loaders:
+            self.register(name, required)
+        await asyncio.gather(*[self.run(name, loader, required) for name, loader, required in loaders])
+        self.total_seconds = round(time.perf_counter() - started, 3)
+
+    @property
+    def ready(self):
+        return all(c["status"] == "ready" for c in self.components.values() if c["required"])
+
+    def snapshot(self):
+        return {
+            "ready":         self.ready,
+            "startup_seconds": self.total_seconds,
+            "components":    {name: dict(c) for name, c in self.components.items()},
+        }
@@ -0,0 +1,98 @@
+import io
+import logging
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from PIL import Image, ImageOps
+
+from utils.image_processing import DEFAULT_MAX_PIXELS
+
+logger = logging.getLogger(__name__)
+
+
+def decode_for_tiling(image_bytes, max_side=1024, max_pixels=DEFAULT_MAX_PIXELS):
+    """
+    Decode a field/drone photo to a uint8 (H, W, 3) array whose longest side
+    is at most max_side. JPEGs are downscaled in the decoder (draft) first.
+    """
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        if img.format == "JPEG":
+            img.draft("RGB", (max_side, max_side))
+        if img.width * img.height > max_pixels:
+            raise ValueError(f"Image too large to decode ({img.width}x{img.height} > {max_pixels} pixels).")
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        if max(img.size) > max_side:
+            scale = max_side / max(img.size)
+            img = img.resize(
+                (max(1, round(img.width * scale)), max(1, round(img.height * scale))),
+                Image.Resampling.BILINEAR,
+                reducing_gap=2.0
+            )
+        return np.asarray(img, dtype=np.uint8)
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Tiling decode error: {e}")
+        raise ValueError(f"Error processing image: {str(e)}")
+
+
+def tile_view(img, tile, stride):
+    """
+    Strided (rows, cols, tile, tile, 3) view of every tile position; no pixels
+    are copied. A right/bottom margin narrower than stride is not covered.
+    """
+    h, w = img.shape[:2]
+    if h < tile or w < tile:
+        raise ValueError(f"Image ({w}x{h}) is smaller than one {tile}x{tile} tile.")
+    # sliding_window_view -> (H-t+1, W-t+1, 1, t, t, 3); keep every stride-th origin
+    return sliding_window_view(img, (tile, tile, img.shape[2]))[::stride, ::stride, 0]
+
+
+def prepare_tiles(image_bytes, tile, stride, max_side=1024, max_pixels=DEFAULT_MAX_PIXELS, max_tiles=1024):
+    """
+    Decode and tile one image into a model-ready float32 batch.
+    Returns (batch (N, tile, tile, 3), (rows, cols), (width, height)).
+    Module-level so it can run on a process pool.
+    """
+    img = decode_for_tiling(image_bytes, max_side, max_pixels)
+    tiles = tile_view(img, tile, stride)
+    rows, cols = tiles.shape[:2]
+    if rows * cols > max_tiles:
+        raise ValueError(f"Image yields {rows * cols} tiles (max {max_tiles}); increase stride or lower max_side.")
+    # The only copy: the multiply reads the strided uint8 view and writes a new
+    # C-contiguous float32 array, which the reshape then only relabels
+    batch = np.multiply(tiles, np.float32(1.0 / 255.0), dtype=np.float32, order="C")
+    batch = batch.reshape(rows * cols, tile, tile, img.shape[2])
+    return batch, (rows, cols), (img.shape[1], img.shape[0])
+
+
+def summarize_tiles(probs, grid, min_confidence=0.0):
+    """
+    Per-tile class map and per-class coverage from an (N, C) probability matrix.
+    Tiles whose top confidence is below min_confidence (0-1) count as uncertain (-1).
+    """
+    rows, cols = grid
+    top = probs.argmax(axis=1)
+    conf = probs[np.arange(len(top)), top]
+    labels = np.where(conf >= min_confidence, top, -1)
+
+    classes, counts = np.unique(labels, return_counts=True)
+    order = np.argsort(-counts, kind="stable")
+    coverage = []
+    for idx in order:
+        class_index = int(classes[idx])
+        mask = labels == class_index
+        coverage.append({
+            "class_index": class_index,
+            "tiles": int(counts[idx]),
+            "coverage": round(float(counts[idx]) / len(labels), 4),
+            "mean_confidence": round(float(conf[mask].mean()) * 100, 2),
+        })
+    return {
+        "class_map": labels.reshape(rows, cols).tolist(),
+        "confidence_map": np.round(conf * 100, 1).reshape(rows, cols).tolist(),
+        "coverage": coverage,
+    }
@@ -0,0 +1,122 @@
+import json
+import logging
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 16
+
+# (format, offset, magic bytes)
+_SIGNATURES = (
+    ("jpeg", 0, b"\xff\xd8\xff"),
+    ("png",  0, b"\x89PNG\r\n\x1a\n"),
+    ("gif",  0, b"GIF87a"),
+    ("gif",  0, b"GIF89a"),
+    ("bmp",  0, b"BM"),
+    ("tiff", 0, b"II*\x00"),
+    ("tiff", 0, b"MM\x00*"),
+    ("webp", 8, b"WEBP"),          # RIFF....WEBP
+    ("zip",  0, b"PK\x03\x04"),
+)
+IMAGE_FORMATS = frozenset({"jpeg", "png", "gif", "bmp", "tiff", "webp"})
+
+
+def sniff_format(head):
+    """Format name from the leading bytes of a file, or None if unrecognised."""
+    for name, offset, magic in _SIGNATURES:
+        if head[offset:offset + len(magic)] == magic:
+            if name == "webp" and head[:4] != b"RIFF":
+                continue
+            return name
+    return None
+
+
+async def read_upload(file, max_bytes, allowed=IMAGE_FORMATS, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Read an UploadFile in chunks, enforcing a byte limit and sniffing the real
+    format from the first bytes (the client's Content-Type is not trusted).
+    Returns (data, format). Raises HTTPException 413 for oversized uploads and
+    400 for empty or non-allowed payloads, before the rest is read.
+    allowed=None accepts any format.
+    """
+    size = getattr(file, "size", None)
+    if size is not None and size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes // (1024 * 1024)} MB limit.")
+
+    head = await file.read(chunk_size)
+    if not head:
+        raise HTTPException(status_code=400, detail="Empty image file received.")
+    fmt = sniff_format(head[:SNIFF_BYTES])
+    if allowed is not None and fmt not in allowed:
+        raise HTTPException(status_code=400, detail="Uploaded file is not an image.")
+
+    chunks = [head]
+    total = len(head)
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes // (1024 * 1024)} MB limit.")
+        chunks.append(chunk)
+    return b"".join(chunks), fmt
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware capping request body size per path, so oversized uploads
+    are refused before the multipart parser spools them.
+    - A declared Content-Length above the limit is answered with 413 at once
+    - Otherwise received bytes are counted and the request fails with 413 as
+      soon as the limit is crossed
+    limits: {path: max_body_bytes}
+    """
+
+    def __init__(self, app, limits):
+        self.app = app
+        self.limits = dict(limits)
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        for key, value in scope.get("headers", []):
+            if key == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = 0
+                if declared > limit:
+                    logger.info(f"Rejected {scope['path']} upload: Content-Length {declared} > {limit}")
+                    await self._reject(send, limit)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # HTTPException passes through FastAPI's body parsing as-is
+                    raise HTTPException(status_code=413, detail=f"Request body exceeds {limit // (1024 * 1024)} MB limit.")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send, limit):
+        body = json.dumps({"detail": f"Request body exceeds {limit // (1024 * 1024)} MB limit."}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Bounded in-process write-behind queue for append-only rows.
+    - offer() accepts a row immediately, or returns False when max_rows are
+      already waiting (the caller answers 503 so devices back off)
+    - A background task flushes up to batch_size rows per bulk write, as soon
+      as batch_size rows are waiting or flush_interval_s after the oldest one
+    - A batch failing with a permanent error (is_permanent(exc), e.g. a
+      constraint violation) is bisected until the offending rows are isolated;
+      those go to dead_letter and the rest are written
+    - A transient failure puts the unwritten rows back at the head and retries
+      with backoff; after max_retries consecutive failures they are
+      dead-lettered instead, so one outage cannot wedge the buffer forever.
+      Rows that no longer fit in the buffer are dropped and counted
+    - close() stops the task and flushes whatever is left; rows that cannot
+      be written on shutdown are dead-lettered
+    write_rows(rows) and dead_letter([(row, error), ...]) are blocking
+    callables run in a worker thread.
+    """
+
+    def __init__(self, write_rows, max_rows=50000, batch_size=500, flush_interval_s=2.0, max_backoff_s=30.0,
+                 is_permanent=None, dead_letter=None, max_retries=10):
+        self.write_rows = write_rows
+        self.max_rows = max_rows
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.max_backoff_s = max_backoff_s
+        self.is_permanent = is_permanent or (lambda e: False)
+        self.dead_letter = dead_letter
+        self.max_retries = max_retries
+        self._rows = deque()
+        self._oldest_at = None
+        self._wakeup = None
+        self._task = None
+        self._closing = False
+        self._failures_in_row = 0
+
+        self.accepted = 0
+        self.rejected = 0
+        self.flushed_rows = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.dead_lettered = 0
+        self.last_flush_ms = 0.0
+        self.last_error = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    # ── request side ─────────────────────────────────────────────────────────
+    def offer(self, row):
+        if len(self._rows) >= self.max_rows:
+            self.rejected += 1
+            return False
+        if not self._rows:
+            self._oldest_at = time.monotonic()
+        self._rows.append(row)
+        self.accepted += 1
+        if len(self._rows) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def offer_many(self, rows):
+        """Accept as many rows as fit, in order; returns how many were taken."""
+        room = max(0, self.max_rows - len(self._rows))
+        taken = rows[:room]
+        if taken:
+            if not self._rows:
+                self._oldest_at = time.monotonic()
+            self._rows.extend(taken)
+            self.accepted += len(taken)
+            if len(self._rows) >= self.batch_size and self._wakeup is not None:
+                self._wakeup.set()
+        self.rejected += len(rows) - len(taken)
+        return len(taken)
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            # Let a flush already in progress finish instead of cancelling it mid-write
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        # Final drain: stop at the first failure rather than retry forever on shutdown
+        while self._rows:
+            if not await self.flush():
+                rows = list(self._rows)
+                self._rows.clear()
+                logger.error(f"Write-behind shutdown flush failed, dead-lettering {len(rows)} row(s)")
+                await self._dead_letter([(row, f"shutdown: {self.last_error}") for row in rows])
+                break
+
+    async def _run(self):
+        while not self._closing:
+            timeout = self.flush_interval_s
+            if self._rows and self._oldest_at is not None:
+                timeout = max(0.0, self._oldest_at + self.flush_interval_s - time.monotonic())
+            if self._failures_in_row:
+                timeout = min(self.max_backoff_s, self.flush_interval_s * 2 ** self._failures_in_row)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._rows and not self._closing:
+                await self.flush()
+
+    def _write_isolating(self, batch):
+        """
+        Blocking: write batch, bisecting around rows that fail permanently.
+        Returns (dead [(row, error)], unwritten rows, transient error); rows are
+        unwritten only when a transient error stopped the pass, in original order.
+        """
+        dead = []
+        pending = [batch]         # stack of chunks; the next one to write is on top
+        while pending:
+            chunk = pending.pop()
+            try:
+                self.write_rows(chunk)
+            except Exception as e:
+                if not self.is_permanent(e):
+                    unwritten = chunk + [row for rest in reversed(pending) for row in rest]
+                    return dead, unwritten, e
+                if len(chunk) == 1:
+                    dead.append((chunk[0], str(e)))
+                    continue
+                mid = len(chunk) // 2
+                pending.append(chunk[mid:])
+                pending.append(chunk[:mid])
+        return dead, [], None
+
+    async def _dead_letter(self, dead):
+        self.dead_lettered += len(dead)
+        logger.error(f"Write-behind dead-lettered {len(dead)} row(s), e.g. {dead[0][1]}")
+        if self.dead_letter is not None:
+            try:
+                await asyncio.to_thread(self.dead_letter, dead)
+            except Exception as e:
+                logger.error(f"Write-behind dead-letter sink failed, {len(dead)} row(s) lost: {e}")
+
+    async def flush(self):
+        """Write one batch; True on success (or nothing to write)."""
+        if not self._rows:
+            return True
+        batch = [self._rows.popleft() for _ in range(min(self.batch_size, len(self._rows)))]
+        self._oldest_at = time.monotonic() if self._rows else None
+        started = time.perf_counter()
+        dead, unwritten, error = await asyncio.to_thread(self._write_isolating, batch)
+        if dead:
+            await self._dead_letter(dead)
+        if unwritten:
+            self.failed_flushes += 1
+            self._failures_in_row += 1
+            self.last_error = str(error)
+            logger.error(f"Write-behind flush of {len(unwritten)} row(s) failed "
+                         f"(attempt {self._failures_in_row}/{self.max_retries}): {error}")
+            self.flushed_rows += len(batch) - len(dead) - len(unwritten)
+            if self._failures_in_row >= self.max_retries:
+                self._failures_in_row = 0
+                await self._dead_letter([(row, f"gave up after {self.max_retries} attempts: {error}")
+                                         for row in unwritten])
+                return False
+            # Back at the head in original order; whatever no longer fits is dropped
+            room = self.max_rows - len(self._rows)
+            keep = unwritten[:max(0, room)]
+            self.dropped += len(unwritten) - len(keep)
+            self._rows.extendleft(reversed(keep))
+            self._oldest_at = time.monotonic()
+            return False
+        self._failures_in_row = 0
+        self.flushes += 1
+        self.flushed_rows += len(batch) - len(dead)
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        if len(self._rows) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def stats(self):
+        return {
+            "buffered":       len(self._rows),
+            "max_rows":       self.max_rows,
+            "accepted":       self.accepted,
+            "rejected":       self.rejected,
+            "flushed_rows":   self.flushed_rows,
+            "flushes":        self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "dropped":        self.dropped,
+            "dead_lettered":  self.dead_lettered,
+            "last_flush_ms":  round(self.last_flush_ms, 3),
+            "last_error":     self.last_error,
+        }